@@ -0,0 +1,143 @@
+"""Benchmark the read path of a user's collection (GET /user_books?since=0).
+
+Compares the ORM path (Book objects, stdlib json) with the lean one used by
+app.py (column tuples, json_backend) on an in-memory SQLite database:
+
+    python bench_collection.py --books 50000
+"""
+
+import argparse
+import json
+import time
+
+from sqlalchemy import create_engine, insert, select
+from sqlalchemy.orm import Session
+
+import json_backend
+from app import Book, User, UserBooks, db
+
+
+def populate(session, count):
+    session.add(User(id=1, username="reader", password_hash="x"))
+    session.execute(
+        insert(Book),
+        [
+            {
+                "id": i,
+                "title": f"Book {i}",
+                "author": f"Author {i % 997}",
+                "year_published": 1900 + i % 120,
+                "price": round(5 + i % 50 * 0.37, 2),
+            }
+            for i in range(1, count + 1)
+        ],
+    )
+    session.execute(
+        insert(UserBooks),
+        [
+            {
+                "user_id": 1,
+                "book_id": i,
+                "year_published": 1900 + i % 120,
+                "price": round(5 + i % 50 * 0.37, 2),
+            }
+            for i in range(1, count + 1)
+        ],
+    )
+    session.commit()
+
+
+def orm_path(session):
+    books = session.scalars(
+        select(Book)
+        .join(UserBooks, UserBooks.book_id == Book.id)
+        .where(UserBooks.user_id == 1)
+    ).all()
+    data = [
+        {
+            "id": book.id,
+            "title": book.title,
+            "author": book.author,
+            "year_published": book.year_published,
+            "price": book.price,
+            "user_id": 1,
+        }
+        for book in books
+    ]
+    # What jsonify did with Flask's default provider
+    body = json.dumps({"books": data}, sort_keys=True, separators=(",", ":"))
+    session.expunge_all()
+    return body
+
+
+def lean_rows(session):
+    return session.execute(
+        select(
+            UserBooks.book_id,
+            Book.title,
+            Book.author,
+            UserBooks.year_published,
+            UserBooks.price,
+        )
+        .join(Book, Book.id == UserBooks.book_id)
+        .where(UserBooks.user_id == 1)
+    )
+
+
+def lean_dicts(rows):
+    return (
+        {
+            "id": book_id,
+            "title": title,
+            "author": author,
+            "year_published": year_published,
+            "price": price,
+            "user_id": 1,
+        }
+        for book_id, title, author, year_published, price in rows
+    )
+
+
+def lean_path(session):
+    return json_backend.dumps(
+        {"books": list(lean_dicts(lean_rows(session)))}, sort_keys=True
+    )
+
+
+def streamed_path(session):
+    return b"".join(
+        json_backend.iter_json_object({}, "books", lean_dicts(lean_rows(session)))
+    )
+
+
+def measure(path, session, count, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        path(session)
+        best = min(best, time.perf_counter() - start)
+    return count / best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--books", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    engine = create_engine("sqlite://")
+    db.metadata.create_all(engine)
+    with Session(engine) as session:
+        populate(session, args.books)
+        print(f"{args.books} books, JSON backend: {json_backend.JSON_BACKEND}")
+        for name, path in [
+            ("ORM objects + json", orm_path),
+            ("column tuples + backend", lean_path),
+            ("column tuples, streamed", streamed_path),
+        ]:
+            rate = measure(path, session, args.books, args.repeat)
+            print(f"{name:<26}{rate:>12,.0f} rows/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,220 @@
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+from contextlib import contextmanager
+
+import faiss
+from langchain_community.docstore.in_memory import InMemoryDocstore
+from langchain_community.vectorstores import FAISS
+
+try:
+    import fcntl
+except ImportError:  # Windows: a single development server, nothing to serialize
+    fcntl = None
+
+# Manutenzione incrementale dell'indice FAISS costruito dalla tabella book
+
+MANIFEST_FILE = "manifest.json"
+EMBEDDING_FILE = "embedding.json"
+# Indexes saved before the embedding model was recorded were built by OpenAIEmbeddings()
+LEGACY_EMBEDDING_ID = "openai:text-embedding-ada-002"
+EMBED_BATCH_SIZE = int(os.getenv("RAG_EMBED_BATCH_SIZE", "256"))
+# Versioni dell'indice tenute su disco: la corrente e la precedente (un worker
+# che ha risolto il link appena prima dello scambio può starla ancora leggendo)
+KEPT_VERSIONS = 2
+
+
+class EmbeddingMismatch(RuntimeError):
+    """Raised when an index was built by another embedding model than the configured one."""
+
+
+def write_embedding_id(index_path, embedding_id):
+    with open(os.path.join(index_path, EMBEDDING_FILE), "w") as f:
+        json.dump({"embedding": embedding_id}, f)
+
+
+def check_embedding_id(index_path, embedding_id):
+    """Refuse an index whose vectors don't come from ``embedding_id``.
+
+    Query vectors of another model live in another space (often of another
+    size): searching them against this index would return garbage.
+    """
+    path = os.path.join(index_path, EMBEDDING_FILE)
+    index_embedding_id = LEGACY_EMBEDDING_ID
+    if os.path.exists(path):
+        with open(path) as f:
+            index_embedding_id = json.load(f)["embedding"]
+    if index_embedding_id != embedding_id:
+        raise EmbeddingMismatch(
+            f"The index in {index_path} was built with {index_embedding_id}, "
+            f"not {embedding_id}: delete it to rebuild it with the new model"
+        )
+
+
+def book_document(book):
+    """Return the text embedded for a book and the metadata stored with it."""
+    text = f"Book: {book.title}\nAuthor: {book.author}\nGenres: {book.genres or ''}"
+    metadata = {"book_id": book.id, "title": book.title, "author": book.author}
+    return text, metadata
+
+
+def document_id(book_id):
+    return f"book-{book_id}"
+
+
+def content_hash(text):
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def load_manifest(index_path):
+    """Return the manifest of an index (``{"books": {book_id: hash}}``), or None.
+
+    An index without a manifest was built from books.csv and can't be updated
+    incrementally.
+    """
+    path = os.path.join(index_path, MANIFEST_FILE)
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+@contextmanager
+def index_lock(index_path):
+    """Hold an exclusive lock on the index, shared by every process (gunicorn workers).
+
+    Whoever builds, syncs or saves the index holds it, so two workers never
+    write the index at the same time or sync from an outdated copy.
+    """
+    with open(f"{index_path}.lock", "a") as lock_file:
+        if fcntl is not None:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def current_index_path(index_path):
+    """Return the directory of the current version (``index_path`` links to it)."""
+    return os.path.realpath(index_path)
+
+
+def index_version(index_path):
+    """Return a value that changes whenever a new index is saved, or None without index."""
+    path = current_index_path(index_path)
+    if not os.path.isdir(path):
+        return None
+    mtimes = [os.path.getmtime(os.path.join(path, name)) for name in os.listdir(path)]
+    return path, max(mtimes, default=None)
+
+
+def _version_number(name):
+    return int(name.rsplit(".v-", 1)[1].split("-", 1)[0])
+
+
+def _remove_old_versions(index_path):
+    parent = os.path.dirname(os.path.abspath(index_path))
+    prefix = f"{os.path.basename(index_path)}.v-"
+    versions = sorted(
+        (name for name in os.listdir(parent) if name.startswith(prefix)),
+        key=_version_number,
+    )
+    current = os.path.basename(current_index_path(index_path))
+    for name in versions[:-KEPT_VERSIONS]:
+        if name != current:
+            shutil.rmtree(os.path.join(parent, name), ignore_errors=True)
+
+
+def save_index(vector_store, manifest, index_path, embedding_id=None):
+    """Write the index and its manifest to a new version, then point ``index_path`` to it.
+
+    ``index_path`` is a symlink replaced with ``os.replace``: readers find the
+    old version or the new one, never a missing index or one without the
+    matching manifest. Call it under ``index_lock``.
+    """
+    version_path = f"{index_path}.v-{time.time_ns()}-{os.getpid()}"
+    vector_store.save_local(version_path)
+    with open(os.path.join(version_path, MANIFEST_FILE), "w") as f:
+        json.dump(manifest, f)
+    if embedding_id is not None:
+        write_embedding_id(version_path, embedding_id)
+
+    if os.path.isdir(index_path) and not os.path.islink(index_path):
+        # Index saved before versions existed: turn it into the first version
+        os.rename(index_path, f"{index_path}.v-0-{os.getpid()}")
+    link_path = f"{index_path}.link-{os.getpid()}-{threading.get_ident()}"
+    os.symlink(os.path.basename(version_path), link_path)
+    os.replace(link_path, index_path)
+    _remove_old_versions(index_path)
+
+
+def clone_vector_store(vector_store):
+    """Copy a FAISS store in memory, so it can be updated while the original serves searches."""
+    return FAISS(
+        embedding_function=vector_store.embedding_function,
+        index=faiss.clone_index(vector_store.index),
+        docstore=InMemoryDocstore(dict(vector_store.docstore._dict)),
+        index_to_docstore_id=dict(vector_store.index_to_docstore_id),
+        normalize_L2=vector_store._normalize_L2,
+        distance_strategy=vector_store.distance_strategy,
+    )
+
+
+def sync_index(
+    vector_store,
+    manifest,
+    books,
+    embedding_model,
+    book_ids=None,
+    batch_size=EMBED_BATCH_SIZE,
+):
+    """Apply the catalog changes to ``vector_store`` (modified in place).
+
+    ``books`` are the catalog rows (id, title, author, genres). When
+    ``book_ids`` is None they are the whole catalog and every indexed book not
+    among them is removed; otherwise only the listed ids are checked, and those
+    missing from ``books`` are removed. Only new or changed books are embedded,
+    ``batch_size`` texts per call. ``vector_store`` may be None when nothing is
+    indexed yet. Returns ``(vector_store, stats)``.
+    """
+    indexed = manifest.setdefault("books", {})
+    wanted = {}
+    for book in books:
+        text, metadata = book_document(book)
+        wanted[str(book.id)] = (content_hash(text), text, metadata)
+
+    checked = indexed.keys() if book_ids is None else [str(i) for i in book_ids]
+    stale = [
+        book_id
+        for book_id in checked
+        if book_id in indexed
+        and (book_id not in wanted or wanted[book_id][0] != indexed[book_id])
+    ]
+    if stale and vector_store is not None:
+        vector_store.delete([document_id(book_id) for book_id in stale])
+    for book_id in stale:
+        del indexed[book_id]
+
+    new = [book_id for book_id in wanted if book_id not in indexed]
+    for start in range(0, len(new), batch_size):
+        batch = new[start : start + batch_size]
+        texts = [wanted[book_id][1] for book_id in batch]
+        metadatas = [wanted[book_id][2] for book_id in batch]
+        ids = [document_id(book_id) for book_id in batch]
+        if vector_store is None:
+            vector_store = FAISS.from_texts(
+                texts, embedding_model, metadatas=metadatas, ids=ids
+            )
+        else:
+            vector_store.add_texts(texts, metadatas=metadatas, ids=ids)
+        for book_id in batch:
+            indexed[book_id] = wanted[book_id][0]
+
+    removed = len([book_id for book_id in stale if book_id not in wanted])
+    stats = {"embedded": len(new), "removed": removed, "indexed": len(indexed)}
+    return vector_store, stats
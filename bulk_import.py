@@ -0,0 +1,250 @@
+import csv
+import io
+import json
+import math
+import time
+
+from sqlalchemy import select, tuple_
+from sqlalchemy.exc import SQLAlchemyError
+
+from upsert import insert_for
+
+# Import in blocco dei libri di un utente da file CSV o JSON Lines
+
+CHUNK_SIZE = 1000
+MAX_REPORTED_ERRORS = 1000
+
+
+class BulkImportError(ValueError):
+    """Raised when the upload can't be read at all (unknown format, bad header...)."""
+
+
+def detect_format(format_hint, content_type, filename):
+    """Pick "csv" or "jsonl" from an explicit hint, the file name or the content type."""
+    if format_hint:
+        fmt = format_hint.lower()
+    elif filename and filename.lower().endswith((".jsonl", ".ndjson")):
+        fmt = "jsonl"
+    elif filename and filename.lower().endswith(".csv"):
+        fmt = "csv"
+    elif content_type and ("ndjson" in content_type or "jsonl" in content_type):
+        fmt = "jsonl"
+    else:
+        fmt = "csv"
+    if fmt not in ("csv", "jsonl"):
+        raise BulkImportError(f"Unsupported format: {fmt}")
+    return fmt
+
+
+def iter_records(binary_stream, fmt):
+    """Yield ``(row_number, record)`` pairs, reading the stream line by line.
+
+    ``record`` is a dict, or an error message when the line can't be parsed.
+    """
+    text_stream = io.TextIOWrapper(binary_stream, encoding="utf-8-sig", newline="")
+
+    if fmt == "csv":
+        reader = csv.DictReader(text_stream)
+        if reader.fieldnames is None:
+            return
+        missing = {"title", "author"} - set(reader.fieldnames)
+        if missing:
+            raise BulkImportError(f"Missing CSV columns: {', '.join(sorted(missing))}")
+        for row_number, record in enumerate(reader, start=1):
+            yield row_number, record
+        return
+
+    for row_number, line in enumerate(text_stream, start=1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as e:
+            yield row_number, f"Invalid JSON: {e}"
+            continue
+        if not isinstance(record, dict):
+            yield row_number, "Each line must be a JSON object"
+            continue
+        yield row_number, record
+
+
+def validate_record(record):
+    """Return ``(values, None)`` for a valid record or ``(None, error)``."""
+    values = {}
+    for field in ("title", "author"):
+        value = record.get(field)
+        value = value.strip() if isinstance(value, str) else ""
+        if not value:
+            return None, f"Missing {field}"
+        if len(value) > 255:
+            return None, f"{field} is longer than 255 characters"
+        values[field] = value
+
+    try:
+        values["year_published"] = int(record.get("year_published"))
+    except (TypeError, ValueError, OverflowError):
+        return None, "year_published must be an integer"
+
+    try:
+        values["price"] = float(record.get("price"))
+    except (TypeError, ValueError):
+        return None, "price must be a number"
+    # float() also accepts "nan" and "inf"
+    if not math.isfinite(values["price"]):
+        return None, "price must be a finite number"
+    if values["price"] < 0:
+        return None, "price must not be negative"
+
+    genres = record.get("genres")
+    values["genres"] = str(genres)[:255] if genres not in (None, "") else None
+    return values, None
+
+
+def import_chunk(session, book_model, user_books_model, user_id, rows):
+    """Upsert one chunk of validated rows and link them to the user.
+
+    ``rows`` is a list of ``(row_number, values)``. Returns a dict mapping each
+    row number to "added" or "already_owned", the ids of the chunk's books and
+    the ids of those that were new to the catalog. The caller commits.
+    """
+    # ON CONFLICT can't touch the same row twice in one statement: keep the
+    # first occurrence of each (title, author) in the chunk
+    unique_books = {}
+    for _, values in rows:
+        unique_books.setdefault((values["title"], values["author"]), values)
+
+    # Core statements executed with a list of parameters: SQLAlchemy compiles
+    # them once (cached) and sends the rows as batched multi-row INSERTs
+    books_table = book_model.__table__
+    book_columns = (
+        books_table.c.id,
+        books_table.c.title,
+        books_table.c.author,
+        books_table.c.price,
+        books_table.c.year_published,
+    )
+    statement = (
+        insert_for(session, books_table)
+        .on_conflict_do_nothing(
+            index_elements=[books_table.c.title, books_table.c.author]
+        )
+        .returning(*book_columns)
+    )
+    # The catalog's price and year (an existing book keeps its own) go into the links
+    books = {
+        (title, author): (book_id, price, year_published)
+        for book_id, title, author, price, year_published in session.execute(
+            statement, list(unique_books.values())
+        )
+    }
+    new_book_ids = {book[0] for book in books.values()}
+    # Books already in the catalog were left untouched: read them
+    existing = [key for key in unique_books if key not in books]
+    if existing:
+        books.update(
+            ((title, author), (book_id, price, year_published))
+            for book_id, title, author, price, year_published in session.execute(
+                select(*book_columns).where(
+                    tuple_(books_table.c.title, books_table.c.author).in_(existing)
+                )
+            )
+        )
+    book_ids = {key: book[0] for key, book in books.items()}
+
+    user_books_table = user_books_model.__table__
+    statement = (
+        insert_for(session, user_books_table)
+        .on_conflict_do_nothing(index_elements=["user_id", "book_id"])
+        .returning(user_books_table.c.book_id)
+    )
+    links = [
+        {
+            "user_id": user_id,
+            "book_id": book_id,
+            "price": price,
+            "year_published": year_published,
+        }
+        for book_id, price, year_published in books.values()
+    ]
+    added_ids = set(session.execute(statement, links).scalars())
+
+    results = {}
+    for row_number, values in rows:
+        book_id = book_ids[(values["title"], values["author"])]
+        if book_id in added_ids:
+            results[row_number] = "added"
+            added_ids.discard(book_id)  # Later duplicates in the file are already owned
+        else:
+            results[row_number] = "already_owned"
+    return results, set(book_ids.values()), new_book_ids
+
+
+def run_import(
+    session,
+    book_model,
+    user_books_model,
+    user_id,
+    records,
+    chunk_size=CHUNK_SIZE,
+    book_ids=None,
+    new_book_ids=None,
+    before_commit=None,
+):
+    """Validate and import ``(row_number, record)`` pairs chunk by chunk.
+
+    Every chunk is committed on its own, so a database error only fails the
+    rows of that chunk. The ids of the committed books are added to the
+    ``book_ids`` set, if given, and those of the books new to the catalog to
+    ``new_book_ids``; ``before_commit(chunk_book_ids, chunk_new_book_ids)``
+    runs in each chunk's transaction. Returns the report sent back to the client.
+    """
+    report = {"total": 0, "added": 0, "already_owned": 0, "failed": 0, "errors": []}
+    start_time = time.perf_counter()
+
+    def add_error(row_number, message):
+        report["failed"] += 1
+        if len(report["errors"]) < MAX_REPORTED_ERRORS:
+            report["errors"].append({"row": row_number, "error": message})
+
+    def flush(chunk):
+        try:
+            results, chunk_book_ids, chunk_new_book_ids = import_chunk(
+                session, book_model, user_books_model, user_id, chunk
+            )
+            if before_commit is not None:
+                before_commit(chunk_book_ids, chunk_new_book_ids)
+            session.commit()
+        except SQLAlchemyError as e:
+            session.rollback()
+            for row_number, _ in chunk:
+                add_error(row_number, f"Database Error: {e.__class__.__name__}")
+            return
+        if book_ids is not None:
+            book_ids.update(chunk_book_ids)
+        if new_book_ids is not None:
+            new_book_ids.update(chunk_new_book_ids)
+        for status in results.values():
+            report[status] += 1
+
+    chunk = []
+    for row_number, record in records:
+        report["total"] += 1
+        if isinstance(record, str):
+            add_error(row_number, record)
+            continue
+        values, error = validate_record(record)
+        if error:
+            add_error(row_number, error)
+            continue
+        chunk.append((row_number, values))
+        if len(chunk) >= chunk_size:
+            flush(chunk)
+            chunk = []
+    if chunk:
+        flush(chunk)
+
+    elapsed = time.perf_counter() - start_time
+    report["errors_truncated"] = report["failed"] > len(report["errors"])
+    report["seconds"] = round(elapsed, 3)
+    report["rows_per_second"] = round(report["total"] / elapsed) if elapsed else None
+    return report
@@ -0,0 +1,305 @@
+import logging
+import math
+import re
+import threading
+import unicodedata
+from collections import Counter, defaultdict
+
+import numpy as np
+from sqlalchemy import text
+
+logger = logging.getLogger(__name__)
+
+# Ricerca nel catalogo: indice testuale (PostgreSQL o in memoria) fuso con la ricerca vettoriale
+
+RRF_K = 60
+MAX_SEARCH_RESULTS = 500
+# Changed books read from the catalog per query when the index catches up
+DELTA_CHUNK_SIZE = 1000
+
+# Le espressioni devono coincidere con quelle degli indici della migrazione 9e4b1d7c3a52
+SEARCH_DOCUMENT = (
+    "to_tsvector('simple', coalesce(title, '') || ' ' || coalesce(author, '') "
+    "|| ' ' || coalesce(genres, ''))"
+)
+FUZZY_DOCUMENT = "lower(title || ' ' || author)"
+
+FULL_TEXT_QUERY = text(
+    f"SELECT id FROM book, websearch_to_tsquery('simple', :query) AS q "
+    f"WHERE {SEARCH_DOCUMENT} @@ q "
+    f"ORDER BY ts_rank_cd({SEARCH_DOCUMENT}, q) DESC, id LIMIT :limit"
+)
+# Trigram word similarity (pg_trgm): matches titles and authors with typos
+FUZZY_QUERY = text(
+    f"SELECT id FROM book WHERE lower(:query) <% {FUZZY_DOCUMENT} "
+    f"ORDER BY lower(:query) <<-> {FUZZY_DOCUMENT}, id LIMIT :limit"
+)
+
+
+def tokenize(value):
+    """Lowercase words without accents: "Cien Años" -> ["cien", "anos"]."""
+    value = unicodedata.normalize("NFKD", value or "")
+    value = "".join(char for char in value if not unicodedata.combining(char))
+    return re.findall(r"\w+", value.lower())
+
+
+def trigrams(term):
+    padded = f"  {term} "
+    return {padded[i : i + 3] for i in range(len(padded) - 2)}
+
+
+def reciprocal_rank_fusion(rankings, k=RRF_K):
+    """Merge ranked lists of ids: each list adds ``1 / (k + rank)`` to an id's score.
+
+    Returns ``(id, score)`` pairs, best first.
+    """
+    scores = defaultdict(float)
+    for ranking in rankings:
+        for rank, item in enumerate(ranking, start=1):
+            scores[item] += 1.0 / (k + rank)
+    return sorted(scores.items(), key=lambda pair: (-pair[1], pair[0]))
+
+
+class InvertedIndex:
+    """In-process full-text index of the catalog (used when the database isn't PostgreSQL).
+
+    Documents are scored with BM25, computed with numpy over dense document
+    slots. A query word that isn't in the vocabulary is matched against the
+    words sharing most of its trigrams, so small typos still find the book.
+    """
+
+    def __init__(self, k1=1.2, b=0.75, fuzzy_similarity=0.4, max_fuzzy_terms=10):
+        self.k1 = k1
+        self.b = b
+        self.fuzzy_similarity = fuzzy_similarity
+        self.max_fuzzy_terms = max_fuzzy_terms
+        self._postings = defaultdict(dict)  # term -> {slot: term frequency}
+        self._arrays = {}  # term -> (slots, frequencies), rebuilt after a change
+        self._trigrams = defaultdict(set)  # trigram -> terms
+        self._slots = {}  # book_id -> slot
+        self._book_ids = []  # slot -> book_id (None once the book is removed)
+        self._terms = []  # slot -> terms
+        self._free_slots = []
+        self._lengths = np.zeros(1024, dtype=np.float32)
+        self._total_length = 0
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self._slots)
+
+    def _new_slot(self, book_id):
+        if self._free_slots:
+            slot = self._free_slots.pop()
+            self._book_ids[slot] = book_id
+        else:
+            slot = len(self._book_ids)
+            self._book_ids.append(book_id)
+            self._terms.append(None)
+            if slot >= len(self._lengths):
+                self._lengths = np.resize(self._lengths, 2 * len(self._lengths))
+        return slot
+
+    def add(self, book_id, *fields):
+        terms = [term for field in fields for term in tokenize(field)]
+        with self._lock:
+            self.remove(book_id)
+            slot = self._new_slot(book_id)
+            self._slots[book_id] = slot
+            self._terms[slot] = terms
+            self._lengths[slot] = len(terms)
+            self._total_length += len(terms)
+            for term, frequency in Counter(terms).items():
+                if term not in self._postings:
+                    for trigram in trigrams(term):
+                        self._trigrams[trigram].add(term)
+                self._postings[term][slot] = frequency
+                self._arrays.pop(term, None)
+
+    def remove(self, book_id):
+        with self._lock:
+            slot = self._slots.pop(book_id, None)
+            if slot is None:
+                return
+            terms = self._terms[slot]
+            self._total_length -= len(terms)
+            for term in set(terms):
+                postings = self._postings[term]
+                del postings[slot]
+                self._arrays.pop(term, None)
+                if not postings:
+                    del self._postings[term]
+                    for trigram in trigrams(term):
+                        self._trigrams[trigram].discard(term)
+            self._book_ids[slot] = None
+            self._terms[slot] = None
+            self._lengths[slot] = 0
+            self._free_slots.append(slot)
+
+    def _postings_arrays(self, term):
+        arrays = self._arrays.get(term)
+        if arrays is None:
+            postings = self._postings[term]
+            arrays = (
+                np.fromiter(postings.keys(), dtype=np.int64, count=len(postings)),
+                np.fromiter(postings.values(), dtype=np.float32, count=len(postings)),
+            )
+            self._arrays[term] = arrays
+        return arrays
+
+    def _fuzzy_terms(self, term):
+        """The vocabulary terms most similar to ``term`` (shared trigrams over all trigrams)."""
+        term_trigrams = trigrams(term)
+        shared = Counter()
+        for trigram in term_trigrams:
+            shared.update(self._trigrams.get(trigram, ()))
+        matches = []
+        for candidate, count in shared.items():
+            similarity = count / (len(term_trigrams) + len(candidate) + 1 - count)
+            if similarity >= self.fuzzy_similarity:
+                matches.append((candidate, similarity))
+        matches.sort(key=lambda match: -match[1])
+        return matches[: self.max_fuzzy_terms]
+
+    def search(self, query, limit):
+        """Return up to ``limit`` ``(book_id, score)`` pairs, best first."""
+        with self._lock:
+            documents = len(self._slots)
+            if not documents:
+                return []
+            average_length = self._total_length / documents
+            scores = np.zeros(len(self._book_ids), dtype=np.float32)
+
+            for term in set(tokenize(query)):
+                if term in self._postings:
+                    matches = [(term, 1.0)]
+                else:
+                    matches = self._fuzzy_terms(term)
+                for match, weight in matches:
+                    slots, frequencies = self._postings_arrays(match)
+                    idf = math.log(
+                        1 + (documents - len(slots) + 0.5) / (len(slots) + 0.5)
+                    )
+                    norm = self.k1 * (
+                        1 - self.b + self.b * self._lengths[slots] / average_length
+                    )
+                    scores[slots] += (
+                        weight
+                        * idf
+                        * frequencies
+                        * (self.k1 + 1)
+                        / (frequencies + norm)
+                    )
+
+            matched = np.flatnonzero(scores)
+            if len(matched) > limit:
+                matched = matched[np.argpartition(-scores[matched], limit - 1)[:limit]]
+            ranked = sorted(
+                ((self._book_ids[slot], float(scores[slot])) for slot in matched),
+                key=lambda pair: (-pair[1], pair[0]),
+            )
+        return ranked
+
+
+class CatalogSearch:
+    """Hybrid search: lexical ranking(s) and vector ranking merged with RRF.
+
+    ``catalog(book_ids=None)`` returns (id, title, author, genres) rows and
+    ``vector_search(query, k)`` the ids of the most similar books.
+    ``version()`` returns the catalog version, bumped by every catalog write
+    in any process, and ``changes(since, version)`` the ids of the books
+    changed in between: when the version moves, the in-process index
+    re-indexes just those books. Without ``changes`` it is rebuilt instead.
+    """
+
+    def __init__(self, db, catalog, vector_search=None, version=None, changes=None):
+        self._db = db
+        self._catalog = catalog
+        self._vector_search = vector_search
+        self._version = version
+        self._changes = changes
+        self._index = None
+        self._index_version = None
+        self._lock = threading.Lock()
+
+    def _use_postgres(self):
+        return self._db.engine.dialect.name == "postgresql"
+
+    def _current_version(self):
+        return self._version() if self._version is not None else None
+
+    def _build(self, version):
+        index = InvertedIndex()
+        for book in self._catalog():
+            index.add(book.id, book.title, book.author, book.genres)
+        self._index = index
+        self._index_version = version
+
+    def _apply_changes(self, version):
+        """Re-index the books changed after the index's version, up to ``version``."""
+        if self._changes is None:
+            self._build(version)
+            return
+        changed = list(self._changes(self._index_version, version))
+        for start in range(0, len(changed), DELTA_CHUNK_SIZE):
+            book_ids = changed[start : start + DELTA_CHUNK_SIZE]
+            found = {book.id: book for book in self._catalog(book_ids)}
+            for book_id in book_ids:
+                book = found.get(book_id)
+                if book is None:
+                    self._index.remove(book_id)
+                else:
+                    self._index.add(book.id, book.title, book.author, book.genres)
+        self._index_version = version
+
+    def _inverted_index(self):
+        version = self._current_version()
+        index = self._index
+        if index is not None and not self._is_newer(version):
+            return index
+        # Only the first build makes searches wait: later, while one thread
+        # applies the changes, the others search the index as it is
+        if not self._lock.acquire(blocking=index is None):
+            return index
+        try:
+            if self._index is None:
+                self._build(version)
+            elif self._is_newer(version):
+                self._apply_changes(version)
+            return self._index
+        finally:
+            self._lock.release()
+
+    def _is_newer(self, version):
+        if version is None or self._index_version is None:
+            return version != self._index_version
+        return version > self._index_version
+
+    def refresh(self):
+        """Bring the index up to the current catalog version.
+
+        Call it after committing a change to the catalog, so the writer's
+        next search doesn't pay for it.
+        """
+        if self._index is not None:
+            self._inverted_index()
+
+    def lexical_rankings(self, query, limit):
+        if self._use_postgres():
+            params = {"query": query, "limit": limit}
+            session = self._db.session
+            return [
+                session.execute(FULL_TEXT_QUERY, params).scalars().all(),
+                session.execute(FUZZY_QUERY, params).scalars().all(),
+            ]
+        return [[book_id for book_id, _ in self._inverted_index().search(query, limit)]]
+
+    def search(self, query, limit):
+        """Return ``(book_id, score)`` pairs for the best ``limit`` books."""
+        rankings = self.lexical_rankings(query, limit)
+        if self._vector_search is not None:
+            try:
+                rankings.append(self._vector_search(query, limit))
+            except Exception as e:
+                # The text results are still useful without the vector side
+                logger.warning("Vector search unavailable: %s", e)
+        return reciprocal_rank_fusion(rankings)[:limit]
@@ -0,0 +1,118 @@
+from sqlalchemy import insert, select, update
+
+from upsert import insert_for
+
+# Registro delle modifiche alle collezioni: ogni utente ha un numero di versione
+# e il client scarica solo i libri cambiati dopo la versione che ha già
+
+
+def record_changes(session, user_model, change_model, owners, book_ids):
+    """Log ``book_ids`` as changed in the collection of every user in ``owners``.
+
+    ``owners`` is a list of user ids or a SELECT of user ids. Each owner's
+    ``collection_version`` is bumped once and the books are logged under the
+    new version, in the caller's transaction. Bumping takes a lock on the
+    user's row, so the versions of a user are committed in order. Returns
+    ``{user_id: version}``.
+    """
+    book_ids = list(book_ids)
+    if not book_ids:
+        return {}
+    users = user_model.__table__
+    versions = dict(
+        session.execute(
+            update(users)
+            .where(users.c.id.in_(owners))
+            .values(collection_version=users.c.collection_version + 1)
+            .returning(users.c.id, users.c.collection_version)
+        ).all()
+    )
+    if versions:
+        session.execute(
+            insert(change_model.__table__),
+            [
+                {"user_id": user_id, "version": version, "book_id": book_id}
+                for user_id, version in versions.items()
+                for book_id in book_ids
+            ],
+        )
+    return versions
+
+
+def collection_version(session, user_model, user_id):
+    return session.scalar(
+        select(user_model.collection_version).where(user_model.id == user_id)
+    )
+
+
+def changed_book_ids(session, change_model, user_id, since, version):
+    """Ids of the books logged for ``user_id`` after ``since``, up to ``version``."""
+    return set(
+        session.scalars(
+            select(change_model.book_id)
+            .where(
+                change_model.user_id == user_id,
+                change_model.version > since,
+                change_model.version <= version,
+            )
+            .distinct()
+        )
+    )
+
+
+# Contatori di versione di una sola riga (catalogo), usati dalla ricerca e dagli ETag
+def bump_version(session, version_model):
+    """Bump a single-row version counter, in the caller's transaction.
+
+    Every writer updates the same row, so call it just before the commit to
+    hold its lock as briefly as possible. ``version_model`` is the model of
+    the counter's table, or the table itself (scripts without the app).
+    Returns the new version.
+    """
+    table = getattr(version_model, "__table__", version_model)
+    statement = insert_for(session, table).values(id=1, version=1)
+    statement = statement.on_conflict_do_update(
+        index_elements=[table.c.id], set_={"version": table.c.version + 1}
+    ).returning(table.c.version)
+    return session.execute(statement).scalar_one()
+
+
+def read_version(session, version_model):
+    return (
+        session.scalar(select(version_model.version).where(version_model.id == 1)) or 0
+    )
+
+
+# Versione del catalogo: cambia solo quando una riga di book è inserita, modificata
+# o eliminata, e i libri cambiati sono registrati sotto la nuova versione
+def bump_catalog_version(session, version_model, change_model, book_ids):
+    """Bump the catalog version and log ``book_ids`` under it, in the caller's transaction.
+
+    Versions are committed in order (see ``bump_version``), so a reader that
+    saw version ``v`` finds every change after it with ``changed_catalog_ids``.
+    ``change_model`` is the model of the book_change table, or the table itself.
+    """
+    version = bump_version(session, version_model)
+    book_ids = set(book_ids)
+    if book_ids:
+        table = getattr(change_model, "__table__", change_model)
+        session.execute(
+            insert(table),
+            [{"version": version, "book_id": book_id} for book_id in book_ids],
+        )
+    return version
+
+
+def catalog_version(session, version_model):
+    return read_version(session, version_model)
+
+
+def changed_catalog_ids(session, change_model, since, version):
+    """Ids of the books logged after catalog version ``since``, up to ``version``."""
+    return set(
+        session.scalars(
+            select(change_model.book_id)
+            .where(change_model.version > since, change_model.version <= version)
+            .distinct()
+        )
+    )
@@ -0,0 +1,184 @@
+import time
+from datetime import datetime, timezone
+
+from caching import TTLCache
+from singleflight import SingleFlight
+
+# Default lifetime of a generated description: 30 days
+DEFAULT_TTL = 30 * 24 * 3600
+# Default lifetime of an in-memory copy: an invalidation made by another
+# process is seen here at most this many seconds later
+DEFAULT_MEMORY_TTL = 60
+
+
+def normalize_key(title, author):
+    """Build the cache key for a (title, author) pair, ignoring case and spacing."""
+    title = " ".join((title or "").lower().split())
+    author = " ".join((author or "").lower().split())
+    return f"{title}|{author}"
+
+
+class SQLDescriptionStore:
+    """Persisted tier of the description cache, backed by the book_description table."""
+
+    def __init__(self, db, model):
+        self.db = db
+        self.model = model
+
+    def load(self, key):
+        """Return ``(description, created_at_epoch)`` for a key, or None."""
+        row = self.db.session.get(self.model, key)
+        if row is None:
+            return None
+        created_at = row.created_at.replace(tzinfo=timezone.utc).timestamp()
+        return row.description, created_at
+
+    def save(self, key, title, author, description):
+        row = self.model(
+            key=key,
+            title=title,
+            author=author,
+            description=description,
+            created_at=datetime.now(timezone.utc).replace(tzinfo=None),
+        )
+        self.db.session.merge(row)
+        self.db.session.commit()
+
+    def delete(self, key):
+        self.db.session.query(self.model).filter_by(key=key).delete()
+        self.db.session.commit()
+
+
+class DescriptionCache:
+    """Two-tier cache for LLM book descriptions.
+
+    Lookups hit an in-memory LRU first and fall back to the persisted store.
+    Stored entries older than ``ttl`` seconds are treated as missing; the
+    in-memory copies only live ``memory_ttl`` seconds, since other processes
+    can't evict them when they invalidate a description. A memory hit costs
+    no round trip to the store: code that must see another process' latest
+    write reads with ``refresh=True``.
+
+    Concurrent misses for the same book are coalesced: threads of this process
+    wait for the one fetch in flight, and with a ``lease`` (see
+    ``singleflight.SQLLease``) workers that find another worker generating the
+    description wait for it to appear in the store instead of calling the LLM.
+    """
+
+    def __init__(
+        self,
+        store,
+        maxsize=1024,
+        ttl=DEFAULT_TTL,
+        memory_ttl=DEFAULT_MEMORY_TTL,
+        clock=time.time,
+        lease=None,
+        poll_interval=0.25,
+        sleep=time.sleep,
+    ):
+        self.store = store
+        self.ttl = ttl
+        self._clock = clock
+        self.memory = TTLCache(maxsize=maxsize, ttl=memory_ttl, clock=clock)
+        self.flight = SingleFlight()
+        self.lease = lease
+        self.poll_interval = poll_interval
+        self._sleep = sleep
+        self.store_hits = 0
+        self.fetches = 0
+        self.remote_waits = 0
+
+    def get(self, title, author, refresh=False):
+        """Return the cached description, or None.
+
+        ``refresh=True`` skips the in-memory tier and reads the store.
+        """
+        key = normalize_key(title, author)
+        entry = None if refresh else self.memory.get(key)
+        if entry is None:
+            entry = self.store.load(key)
+            if entry is None:
+                return None
+            self.store_hits += 1
+            self.memory.set(key, entry)
+
+        # The copy keeps the stored row's created_at: it expires with the row
+        description, created_at = entry
+        if self.ttl is not None and self._clock() - created_at > self.ttl:
+            self.memory.pop(key)
+            return None
+        return description
+
+    def set(self, title, author, description):
+        key = normalize_key(title, author)
+        self.store.save(key, title, author, description)
+        self.memory.set(key, (description, self._clock()))
+
+    def get_or_fetch(self, title, author, fetch, fallback=None, refresh=False):
+        """Return the cached description or generate it with ``fetch(title, author)``.
+
+        Results equal to ``fallback`` (the "not available" message) are not cached.
+        ``refresh=True`` only trusts the store (see ``get``).
+        """
+        description = self.get(title, author, refresh)
+        if description is not None:
+            return description
+
+        return self.flight.do(
+            normalize_key(title, author),
+            lambda: self._fetch_once(title, author, fetch, fallback, refresh),
+        )
+
+    def _fetch(self, title, author, fetch, fallback):
+        self.fetches += 1
+        description = fetch(title, author)
+        if description and description != fallback:
+            self.set(title, author, description)
+        return description
+
+    def _fetch_once(self, title, author, fetch, fallback, refresh=False):
+        """Fetch, unless another worker already is: then wait for its result."""
+        if self.lease is None:
+            return self._fetch(title, author, fetch, fallback)
+
+        key = normalize_key(title, author)
+        deadline = time.monotonic() + self.lease.ttl
+        waited = False
+        while True:
+            if self.lease.acquire(key):
+                try:
+                    # The previous holder may have stored it just before releasing
+                    description = self.get(title, author, refresh)
+                    if description is not None:
+                        return description
+                    return self._fetch(title, author, fetch, fallback)
+                finally:
+                    self.lease.release(key)
+
+            if not waited:
+                self.remote_waits += 1
+                waited = True
+            self._sleep(self.poll_interval)
+            description = self.get(title, author, refresh)
+            if description is not None:
+                return description
+            if time.monotonic() >= deadline:
+                # The other worker is stuck: don't keep the user waiting any longer
+                return self._fetch(title, author, fetch, fallback)
+
+    def invalidate(self, title, author):
+        key = normalize_key(title, author)
+        self.memory.pop(key)
+        self.store.delete(key)
+
+    def stats(self):
+        stats = self.memory.stats()
+        stats.update(
+            store_hits=self.store_hits,
+            fetches=self.fetches,
+            ttl=self.ttl,
+            memory_ttl=self.memory.ttl,
+            coalesced=self.flight.followers,
+            remote_waits=self.remote_waits,
+        )
+        return stats
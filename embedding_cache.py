@@ -0,0 +1,116 @@
+import hashlib
+import os
+import sqlite3
+import threading
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+from book_index import EMBED_BATCH_SIZE
+
+# Cache degli embedding dei documenti, indicizzata per hash del testo e nome del modello
+
+EMBEDDING_CACHE_PATH = os.getenv("RAG_EMBEDDING_CACHE", "embedding_cache.sqlite3")
+
+
+def embedding_key(model_name, text):
+    """Content address of an embedding: the same text embedded by another model is another entry."""
+    return hashlib.sha256(f"{model_name}\0{text}".encode("utf-8")).hexdigest()
+
+
+class SQLiteEmbeddingStore:
+    """Embeddings stored as float32 blobs in a local SQLite file.
+
+    ``path=":memory:"`` keeps them in memory (useful in tests).
+    """
+
+    def __init__(self, path=EMBEDDING_CACHE_PATH):
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, vector BLOB NOT NULL)"
+        )
+        self._conn.commit()
+        self._lock = threading.Lock()
+
+    def get_many(self, keys):
+        """Return a dict with the cached vectors of ``keys`` (missing keys are absent)."""
+        found = {}
+        with self._lock:
+            # SQLite limits the number of parameters of a statement
+            for start in range(0, len(keys), 500):
+                batch = keys[start : start + 500]
+                placeholders = ", ".join("?" * len(batch))
+                rows = self._conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})",
+                    batch,
+                )
+                for key, blob in rows:
+                    found[key] = np.frombuffer(blob, dtype=np.float32).tolist()
+        return found
+
+    def put_many(self, items):
+        """Store ``(key, vector)`` pairs."""
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, vector) VALUES (?, ?)",
+                [
+                    (key, np.asarray(vector, dtype=np.float32).tobytes())
+                    for key, vector in items
+                ],
+            )
+            self._conn.commit()
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+
+
+class CachedEmbeddings(Embeddings):
+    """Wrap an embedding model so each document text is embedded only once.
+
+    Cache misses are deduplicated and sent to the model ``batch_size`` texts at
+    a time. Queries are not cached: they go straight to the model.
+    """
+
+    def __init__(self, model, store, model_name, batch_size=EMBED_BATCH_SIZE):
+        self.model = model
+        self.store = store
+        self.model_name = model_name
+        self.batch_size = batch_size
+        self.hits = 0
+        self.misses = 0
+
+    def embed_documents(self, texts):
+        keys = [embedding_key(self.model_name, text) for text in texts]
+        vectors = self.store.get_many(list(set(keys)))
+
+        # One call per distinct missing text, even if it appears several times
+        missing = {}
+        for key, text in zip(keys, texts):
+            if key not in vectors:
+                missing.setdefault(key, text)
+        self.hits += len(texts) - len(missing)
+        self.misses += len(missing)
+
+        missing_keys = list(missing)
+        for start in range(0, len(missing_keys), self.batch_size):
+            batch = missing_keys[start : start + self.batch_size]
+            embedded = self.model.embed_documents([missing[key] for key in batch])
+            # Same float32 precision as the stored vectors: a hit returns exactly what a miss did
+            embedded = np.asarray(embedded, dtype=np.float32)
+            self.store.put_many(zip(batch, embedded))
+            vectors.update(zip(batch, embedded.tolist()))
+
+        return [list(vectors[key]) for key in keys]
+
+    def embed_query(self, text):
+        return self.model.embed_query(text)
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 3) if total else None,
+            "batch_size": self.batch_size,
+        }
@@ -0,0 +1,267 @@
+import argparse
+import itertools
+import json
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import openai
+
+import get_bookDescription
+import llm_gateway
+
+# Script che genera in blocco le descrizioni mancanti dei libri nella tabella book
+
+CHECKPOINT_PATH = "enrich_checkpoint.json"
+
+# Errors worth retrying here too: the gateway's, plus an open circuit breaker
+RETRYABLE_ERRORS = llm_gateway.RETRYABLE_ERRORS + (llm_gateway.LLMUnavailable,)
+
+
+def load_checkpoint(path):
+    if not os.path.exists(path):
+        return {"last_book_id": 0, "done": 0, "failed": []}
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_checkpoint(path, checkpoint):
+    # Write to a temporary file first so a crash never leaves a truncated checkpoint
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(checkpoint, f)
+    os.replace(tmp_path, path)
+
+
+class DescriptionEnricher:
+    """Generate descriptions for many books with bounded concurrency.
+
+    ``generate(title, author)`` runs on worker threads and may raise; ``save(book,
+    description)`` is always called from the calling thread, so it can safely use
+    the database session. Books are processed in id order and the checkpoint is
+    written after every batch; it lists the books that failed until a later
+    run enriches them (see ``failed_description_batches``).
+    """
+
+    def __init__(
+        self,
+        generate,
+        save,
+        concurrency=4,
+        max_attempts=5,
+        base_delay=1.0,
+        max_delay=60.0,
+        checkpoint_path=CHECKPOINT_PATH,
+        sleep=time.sleep,
+    ):
+        self.generate = generate
+        self.save = save
+        self.concurrency = concurrency
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.checkpoint_path = checkpoint_path
+        self.sleep = sleep
+        # When the API rate-limits one worker, every worker waits until this moment
+        self._paused_until = 0.0
+        self._pause_lock = threading.Lock()
+
+    def _wait_if_paused(self):
+        delay = self._paused_until - time.monotonic()
+        if delay > 0:
+            self.sleep(delay)
+
+    def _pause(self, delay):
+        with self._pause_lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + delay)
+
+    def generate_with_retry(self, title, author):
+        for attempt in range(1, self.max_attempts + 1):
+            self._wait_if_paused()
+            try:
+                return self.generate(title, author)
+            except RETRYABLE_ERRORS as e:
+                if attempt == self.max_attempts:
+                    raise
+                # Exponential backoff with full jitter, unless the API told us how long to wait
+                delay = random.uniform(
+                    0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1))
+                )
+                if isinstance(e, openai.RateLimitError):
+                    delay = llm_gateway.retry_after(e) or delay
+                    self._pause(delay)
+                print(f"Retrying '{title}' in {delay:.1f}s ({type(e).__name__})")
+                self.sleep(delay)
+
+    def run(self, batches):
+        """Process an iterable of book batches; each book has id, title and author."""
+        checkpoint = load_checkpoint(self.checkpoint_path)
+        failed = set(checkpoint["failed"])
+        start_time = time.time()
+
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            for batch in batches:
+                futures = {
+                    executor.submit(
+                        self.generate_with_retry, book.title, book.author
+                    ): book
+                    for book in batch
+                }
+                for future in as_completed(futures):
+                    book = futures[future]
+                    try:
+                        self.save(book, future.result())
+                        checkpoint["done"] += 1
+                        failed.discard(book.id)
+                    except Exception as e:
+                        print(f"Failed to enrich book {book.id}: {e}")
+                        failed.add(book.id)
+
+                if batch:
+                    # Retried books are behind the checkpoint: it never moves back
+                    checkpoint["last_book_id"] = max(
+                        checkpoint["last_book_id"], *(book.id for book in batch)
+                    )
+                    checkpoint["failed"] = sorted(failed)
+                    save_checkpoint(self.checkpoint_path, checkpoint)
+
+        elapsed = time.time() - start_time
+        print(
+            f"Enriched {checkpoint['done']} books "
+            f"({len(checkpoint['failed'])} failed) in {elapsed:.1f} seconds"
+        )
+        return checkpoint
+
+
+def _without_description(books):
+    """The books that have no cached description yet."""
+    from app import BookDescription, db
+    from description_cache import normalize_key
+
+    keys = [normalize_key(book.title, book.author) for book in books]
+    existing = {
+        key
+        for (key,) in db.session.query(BookDescription.key).filter(
+            BookDescription.key.in_(keys)
+        )
+    }
+    return [book for book, key in zip(books, keys) if key not in existing]
+
+
+def missing_description_batches(after_id, batch_size):
+    """Yield batches of books (ordered by id) that have no cached description yet."""
+    from app import Book
+
+    last_id = after_id
+    while True:
+        books = (
+            Book.query.filter(Book.id > last_id)
+            .order_by(Book.id)
+            .limit(batch_size)
+            .all()
+        )
+        if not books:
+            return
+        last_id = books[-1].id
+        yield _without_description(books)
+
+
+def failed_description_batches(book_ids, batch_size):
+    """Yield batches of the books ``book_ids`` that still have no description.
+
+    Used to retry the books a previous run failed to enrich.
+    """
+    from app import Book
+
+    book_ids = sorted(book_ids)
+    for start in range(0, len(book_ids), batch_size):
+        chunk = book_ids[start : start + batch_size]
+        books = Book.query.filter(Book.id.in_(chunk)).order_by(Book.id).all()
+        yield _without_description(books)
+
+
+def enqueue_missing(batch_size):
+    """Queue a background description job for every book without a description."""
+    from app import app, job_queue
+    from job_queue import BACKGROUND_PRIORITY
+
+    queued = 0
+    with app.app_context():
+        for books in missing_description_batches(0, batch_size):
+            for book in books:
+                # Same key as the page's request: a visitor waiting for it gets the same job
+                job_queue.enqueue(
+                    "description",
+                    {"book_id": book.id},
+                    priority=BACKGROUND_PRIORITY,
+                    dedupe_key=f"description:{book.id}",
+                )
+                queued += 1
+    print(f"Queued {queued} description jobs")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Precompute LLM descriptions for books in the inventory."
+    )
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--batch-size", type=int, default=50)
+    parser.add_argument("--max-attempts", type=int, default=5)
+    parser.add_argument("--checkpoint", default=CHECKPOINT_PATH)
+    parser.add_argument(
+        "--restart", action="store_true", help="ignore the checkpoint and start over"
+    )
+    parser.add_argument(
+        "--enqueue",
+        action="store_true",
+        help="queue the descriptions for job_worker.py instead of generating them here",
+    )
+    args = parser.parse_args()
+
+    if args.enqueue:
+        enqueue_missing(args.batch_size)
+        return
+
+    from sqlalchemy.exc import SQLAlchemyError
+
+    from app import app, db, description_cache
+
+    def save(book, description):
+        try:
+            description_cache.set(book.title, book.author, description)
+        except SQLAlchemyError:
+            db.session.rollback()
+            raise
+
+    if args.restart and os.path.exists(args.checkpoint):
+        os.remove(args.checkpoint)
+
+    with app.app_context():
+        checkpoint = load_checkpoint(args.checkpoint)
+        enricher = DescriptionEnricher(
+            # The enricher retries (and pauses every worker on rate limits) itself
+            lambda title, author: get_bookDescription.generate_book_description(
+                title, author, max_retries=0
+            ),
+            save,
+            concurrency=args.concurrency,
+            max_attempts=args.max_attempts,
+            checkpoint_path=args.checkpoint,
+        )
+        if checkpoint["failed"]:
+            print(f"Retrying {len(checkpoint['failed'])} books that failed before")
+        # The books that failed in the previous runs first, then the new ones
+        enricher.run(
+            itertools.chain(
+                failed_description_batches(checkpoint["failed"], args.batch_size),
+                missing_description_batches(
+                    checkpoint["last_book_id"], args.batch_size
+                ),
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()
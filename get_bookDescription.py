@@ -1,30 +1,45 @@
-from openai import OpenAI
-import os
-
-client = OpenAI(
-    # This is the default and can be omitted
-    api_key=os.environ.get("OPENAI_API_KEY"),
-)
-
-
-# Function to fetch book description using gpt-4o-mini model
-def fetch_book_description(title, author):
-
-    print(title, author)
-    prompt = (
-        f"Provide a brief plot description for the book titled '{title}' by {author}."
-    )
-
-    try:
-        response = client.chat.completions.create(
-            model="gpt-4o-mini",  # or "gpt-4" if you have access
-            messages=[
-                {"role": "system", "content": "You are a helpful assistant."},
-                {"role": "user", "content": prompt},
-            ],
-            max_tokens=300,
-        )
-        return response.choices[0].message.content
-    except Exception as e:
-        print(f"Error fetching description: {e}")
-        return "Description not available."
+from llm_gateway import gateway
+
+# Client OpenAI condiviso del gateway (connessioni in pool, timeout, nessun retry dell'SDK)
+client = getattr(gateway.backend, "client", None)
+
+# Message returned when the LLM call fails (never cached)
+DESCRIPTION_NOT_AVAILABLE = "Description not available."
+
+
+def _description_prompt(title, author):
+    return (
+        f"Provide a brief plot description for the book titled '{title}' by {author}."
+    )
+
+
+# Function to generate a book description using gpt-4o-mini model (errors are raised)
+def generate_book_description(title, author, max_retries=None):
+    return gateway.chat(
+        _description_prompt(title, author),
+        model="gpt-4o-mini",  # or "gpt-4" if you have access
+        max_tokens=300,
+        max_retries=max_retries,
+    )
+
+
+# Async version for batch jobs that fan out many descriptions at once
+async def agenerate_book_description(title, author, max_retries=None):
+    return await gateway.achat(
+        _description_prompt(title, author),
+        model="gpt-4o-mini",
+        max_tokens=300,
+        max_retries=max_retries,
+    )
+
+
+# Function to fetch book description using gpt-4o-mini model
+def fetch_book_description(title, author):
+
+    print(title, author)
+
+    try:
+        return generate_book_description(title, author)
+    except Exception as e:
+        print(f"Error fetching description: {e}")
+        return DESCRIPTION_NOT_AVAILABLE
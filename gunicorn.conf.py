@@ -0,0 +1,37 @@
+import multiprocessing
+import os
+
+# Configurazione di gunicorn per la produzione: gunicorn app:app
+# (gunicorn legge questo file dalla directory corrente)
+
+bind = os.getenv("BIND", f"0.0.0.0:{os.getenv('PORT', '8000')}")
+
+# Each worker holds its own FAISS index and caches in memory: a few processes,
+# many threads. Most of a request's time is spent waiting on the database or
+# the LLM, and the SSE streams keep a thread busy for the whole answer.
+workers = int(os.getenv("WEB_CONCURRENCY", str(min(multiprocessing.cpu_count(), 4))))
+worker_class = "gthread"
+threads = int(os.getenv("GUNICORN_THREADS", "8"))
+
+# Longer than the slowest LLM call (LLM_TIMEOUT for every retry)
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "120"))
+graceful_timeout = 30
+keepalive = 5
+
+# Recycle workers now and then, at different times, to bound memory growth
+max_requests = int(os.getenv("GUNICORN_MAX_REQUESTS", "5000"))
+max_requests_jitter = max_requests // 10
+
+accesslog = "-"
+errorlog = "-"
+
+
+def post_worker_init(worker):
+    """Runs in each worker after it loaded the app and before it accepts connections.
+
+    Keep it short: the worker sends no heartbeat until it returns, and the
+    arbiter kills it after ``timeout`` seconds.
+    """
+    from app import warm_up
+
+    warm_up(worker.wsgi)
@@ -0,0 +1,79 @@
+import functools
+import hashlib
+import os
+
+from flask import current_app, make_response, request, send_from_directory, url_for
+
+# Cache HTTP: ETag calcolati dai contatori di versione (304 senza eseguire la
+# view) e URL con l'impronta del contenuto per i file statici
+
+# The browser keeps the response but checks it with If-None-Match before reusing it
+REVALIDATE = "private, no-cache"
+STATIC_MAX_AGE = 365 * 24 * 3600
+
+
+def make_etag(*parts):
+    digest = hashlib.sha256("\0".join(str(part) for part in parts).encode())
+    return digest.hexdigest()[:32]
+
+
+def conditional(validator, cache_control=REVALIDATE):
+    """Answer ``304 Not Modified`` when the client's copy is current, without running the view.
+
+    ``validator(**view_args)`` returns the values the response depends on
+    (version counters, the user id...) and runs before the view, so it must
+    be cheap. The ETag also covers the path and the query string. Only 200
+    responses get the ETag, and a view can opt out by setting its own
+    ``Cache-Control`` header.
+    """
+
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            etag = make_etag(request.full_path, *validator(*args, **kwargs))
+            if request.if_none_match.contains(etag):
+                response = make_response("", 304)
+            else:
+                response = make_response(view(*args, **kwargs))
+                if response.status_code != 200 or "Cache-Control" in response.headers:
+                    return response
+            response.set_etag(etag)
+            response.headers["Cache-Control"] = cache_control
+            return response
+
+        return wrapper
+
+    return decorator
+
+
+@functools.lru_cache(maxsize=256)
+def _fingerprint(path, mtime):
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()[:12]
+
+
+def static_fingerprint(filename):
+    path = os.path.join(current_app.static_folder, filename)
+    return _fingerprint(path, os.path.getmtime(path))
+
+
+def static_url(filename):
+    """URL of a static file that changes with its content (``/assets/<hash>/app.js``)."""
+    return url_for(
+        "fingerprinted_static",
+        fingerprint=static_fingerprint(filename),
+        filename=filename,
+    )
+
+
+def send_fingerprinted(fingerprint, filename):
+    """Serve a static file; under its current fingerprint it can be cached for a year."""
+    response = send_from_directory(current_app.static_folder, filename)
+    # An old fingerprint (a page rendered before a deploy) gets the new content, uncached
+    if fingerprint == static_fingerprint(filename):
+        response.headers["Cache-Control"] = (
+            f"public, max-age={STATIC_MAX_AGE}, immutable"
+        )
+    else:
+        response.headers["Cache-Control"] = "no-cache"
+    return response
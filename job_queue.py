@@ -0,0 +1,387 @@
+import json
+import logging
+import os
+import random
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import and_, delete, func, or_, select, update
+from sqlalchemy.orm import Session
+
+from upsert import insert_for
+
+logger = logging.getLogger(__name__)
+
+# Coda di lavori nel database: le chiamate lente all'LLM escono dalle richieste
+# e vengono eseguite dai processi worker (job_worker.py), senza broker esterni
+
+JOB_VISIBILITY_TIMEOUT = int(os.getenv("JOB_VISIBILITY_TIMEOUT", "120"))
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+# Quanto restano nella tabella i lavori finiti (i client leggono lì il risultato)
+JOB_RETENTION = int(os.getenv("JOB_RETENTION", str(24 * 3600)))
+# Intervallo minimo tra due salvataggi del risultato parziale di un lavoro
+JOB_PROGRESS_INTERVAL = float(os.getenv("JOB_PROGRESS_INTERVAL", "1"))
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+PENDING = (QUEUED, RUNNING)
+
+# Someone is waiting for the answer: ahead of the batch jobs
+INTERACTIVE_PRIORITY = 10
+BACKGROUND_PRIORITY = 0
+
+
+def _utcnow():
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def _greatest(session, *values):
+    # SQLite's scalar max() is PostgreSQL's greatest()
+    if session.get_bind().dialect.name == "sqlite":
+        return func.max(*values)
+    return func.greatest(*values)
+
+
+class JobQueue:
+    """Jobs stored in a table shared by the web workers and the job workers.
+
+    ``model`` has the columns of ``app.Job``. A claimed job stays invisible to
+    the other workers for ``visibility_timeout`` seconds: if its worker dies,
+    the job is claimed again after that, up to its ``max_attempts``. Every
+    operation runs on a connection of its own and commits at once.
+    """
+
+    def __init__(
+        self,
+        db,
+        model,
+        visibility_timeout=JOB_VISIBILITY_TIMEOUT,
+        retry_delay=5.0,
+        retention=JOB_RETENTION,
+        clock=_utcnow,
+    ):
+        self.db = db
+        self.model = model
+        self.visibility_timeout = visibility_timeout
+        self.retry_delay = retry_delay
+        self.retention = retention
+        self._clock = clock
+
+    @property
+    def _table(self):
+        return self.model.__table__
+
+    def enqueue(
+        self,
+        kind,
+        payload,
+        priority=BACKGROUND_PRIORITY,
+        dedupe_key=None,
+        max_attempts=JOB_MAX_ATTEMPTS,
+        user_id=None,
+    ):
+        """Add a job and return its id.
+
+        With ``dedupe_key``, while a job with the same key is queued or running
+        no new job is added: its id is returned instead, and its priority is
+        raised to ``priority`` if that is higher (a visitor asking for a book
+        queued by a batch doesn't wait behind the whole batch). ``user_id`` is
+        the user who asked for the job; a shared job keeps its first one.
+        """
+        table = self._table
+        now = self._clock()
+        values = {
+            "kind": kind,
+            "payload": json.dumps(payload),
+            "dedupe_key": dedupe_key,
+            "user_id": user_id,
+            "status": QUEUED,
+            "priority": priority,
+            "attempts": 0,
+            "max_attempts": max_attempts,
+            "available_at": now,
+            "created_at": now,
+        }
+        with Session(self.db.engine) as session:
+            statement = insert_for(session, table).values(**values)
+            if dedupe_key is not None:
+                statement = statement.on_conflict_do_update(
+                    index_elements=[table.c.dedupe_key],
+                    index_where=table.c.status.in_(PENDING),
+                    set_={
+                        "priority": _greatest(
+                            session, table.c.priority, statement.excluded.priority
+                        )
+                    },
+                )
+            job_id = session.execute(statement.returning(table.c.id)).scalar_one()
+            session.commit()
+        return job_id
+
+    def claim(self, kinds=None):
+        """Take the next job (highest priority, then oldest) and return it, or None.
+
+        The job is a dict with ``id``, ``kind``, ``payload``, ``attempts`` and
+        ``max_attempts``.
+        """
+        table = self._table
+        now = self._clock()
+        visible = or_(
+            and_(table.c.status == QUEUED, table.c.available_at <= now),
+            # Its worker didn't finish it in time (crashed or stuck)
+            and_(table.c.status == RUNNING, table.c.locked_until < now),
+        )
+        candidate = select(table.c.id).where(
+            visible, table.c.attempts < table.c.max_attempts
+        )
+        if kinds is not None:
+            candidate = candidate.where(table.c.kind.in_(list(kinds)))
+        # SKIP LOCKED (PostgreSQL): workers claiming at the same time take different jobs
+        candidate = (
+            candidate.order_by(table.c.priority.desc(), table.c.id)
+            .limit(1)
+            .with_for_update(skip_locked=True)
+            .scalar_subquery()
+        )
+        statement = (
+            update(table)
+            .where(table.c.id == candidate)
+            .values(
+                status=RUNNING,
+                attempts=table.c.attempts + 1,
+                locked_until=now + timedelta(seconds=self.visibility_timeout),
+            )
+            .returning(
+                table.c.id,
+                table.c.kind,
+                table.c.payload,
+                table.c.attempts,
+                table.c.max_attempts,
+            )
+        )
+        with Session(self.db.engine) as session:
+            row = session.execute(statement).first()
+            session.commit()
+        if row is None:
+            return None
+        return {
+            "id": row.id,
+            "kind": row.kind,
+            "payload": json.loads(row.payload),
+            "attempts": row.attempts,
+            "max_attempts": row.max_attempts,
+        }
+
+    def _finish(self, job, **values):
+        """Update a claimed job; return False if the claim was lost.
+
+        After the visibility timeout another worker may have claimed the job
+        again: ``attempts`` tells the claims apart, so a late worker can't
+        overwrite the new attempt.
+        """
+        table = self._table
+        with Session(self.db.engine) as session:
+            updated = session.execute(
+                update(table)
+                .where(
+                    table.c.id == job["id"],
+                    table.c.status == RUNNING,
+                    table.c.attempts == job["attempts"],
+                )
+                .values(locked_until=None, **values)
+            ).rowcount
+            session.commit()
+        return updated == 1
+
+    def progress(self, job, partial):
+        """Store the partial result of a running job; return False if the claim was lost.
+
+        Readers of the job see it as its ``result`` until it's done. The claim
+        is extended too: a job that reports progress isn't stuck.
+        """
+        table = self._table
+        locked_until = self._clock() + timedelta(seconds=self.visibility_timeout)
+        with Session(self.db.engine) as session:
+            updated = session.execute(
+                update(table)
+                .where(
+                    table.c.id == job["id"],
+                    table.c.status == RUNNING,
+                    table.c.attempts == job["attempts"],
+                )
+                .values(result=json.dumps(partial), locked_until=locked_until)
+            ).rowcount
+            session.commit()
+        return updated == 1
+
+    def complete(self, job, result):
+        """Record the result of a claimed job; return False if the claim was lost."""
+        return self._finish(
+            job, status=DONE, result=json.dumps(result), finished_at=self._clock()
+        )
+
+    def fail(self, job, error):
+        """Record a failed attempt: the job is retried later, or fails for good.
+
+        Returns False if the claim was lost (see ``complete``).
+        """
+        now = self._clock()
+        # The partial result of the attempt is dropped
+        if job["attempts"] >= job["max_attempts"]:
+            return self._finish(
+                job, status=FAILED, result=None, error=str(error), finished_at=now
+            )
+        # Exponential backoff with jitter
+        delay = random.uniform(0.5, 1.0) * self.retry_delay * 2 ** (job["attempts"] - 1)
+        return self._finish(
+            job,
+            status=QUEUED,
+            result=None,
+            error=str(error),
+            available_at=now + timedelta(seconds=delay),
+        )
+
+    def get(self, job_id):
+        """Return the state of a job (``result``, partial while it runs, and ``user_id``), or None."""
+        table = self._table
+        with Session(self.db.engine) as session:
+            row = session.execute(
+                select(
+                    table.c.id,
+                    table.c.kind,
+                    table.c.user_id,
+                    table.c.status,
+                    table.c.attempts,
+                    table.c.result,
+                    table.c.error,
+                ).where(table.c.id == job_id)
+            ).first()
+        if row is None:
+            return None
+        return {
+            "id": row.id,
+            "kind": row.kind,
+            "user_id": row.user_id,
+            "status": row.status,
+            "attempts": row.attempts,
+            "result": json.loads(row.result) if row.result is not None else None,
+            "error": row.error if row.status == FAILED else None,
+        }
+
+    def maintain(self):
+        """Fail the abandoned jobs that used all their attempts and purge the old finished ones."""
+        table = self._table
+        now = self._clock()
+        with Session(self.db.engine) as session:
+            session.execute(
+                update(table)
+                .where(
+                    table.c.status == RUNNING,
+                    table.c.locked_until < now,
+                    table.c.attempts >= table.c.max_attempts,
+                )
+                .values(
+                    status=FAILED,
+                    error="Visibility timeout expired",
+                    locked_until=None,
+                    finished_at=now,
+                )
+            )
+            session.execute(
+                delete(table).where(
+                    table.c.status.in_((DONE, FAILED)),
+                    table.c.finished_at < now - timedelta(seconds=self.retention),
+                )
+            )
+            session.commit()
+
+    def stats(self):
+        table = self._table
+        with Session(self.db.engine) as session:
+            counts = dict(
+                session.execute(
+                    select(table.c.status, func.count()).group_by(table.c.status)
+                ).all()
+            )
+        return {status: counts.get(status, 0) for status in (*PENDING, DONE, FAILED)}
+
+
+class Worker:
+    """Run the jobs of a ``JobQueue`` with ``handlers`` (``{kind: handler(payload, progress) -> result}``).
+
+    A handler can call ``progress(partial)`` to publish its partial result
+    (saved at most every ``progress_interval`` seconds). A handler that
+    raises fails the attempt; the queue retries it with backoff.
+    """
+
+    def __init__(
+        self,
+        queue,
+        handlers,
+        poll_interval=1.0,
+        maintenance_interval=60,
+        progress_interval=JOB_PROGRESS_INTERVAL,
+    ):
+        self.queue = queue
+        self.handlers = handlers
+        self.poll_interval = poll_interval
+        self.maintenance_interval = maintenance_interval
+        self.progress_interval = progress_interval
+        self.done = 0
+        self.failed = 0
+
+    def _progress(self, job):
+        last_saved = None
+
+        def report(partial):
+            nonlocal last_saved
+            now = time.monotonic()
+            # The final result is saved anyway: skipping an update loses nothing
+            if last_saved is None or now - last_saved >= self.progress_interval:
+                last_saved = now
+                self.queue.progress(job, partial)
+
+        return report
+
+    def run_once(self):
+        """Run one job; return False if there was none to run."""
+        job = self.queue.claim(self.handlers)
+        if job is None:
+            return False
+        start_time = time.perf_counter()
+        try:
+            result = self.handlers[job["kind"]](job["payload"], self._progress(job))
+        except Exception as e:
+            self.failed += 1
+            logger.warning("Job %s (%s) failed: %s", job["id"], job["kind"], e)
+            self.queue.fail(job, e)
+        else:
+            self.done += 1
+            elapsed = time.perf_counter() - start_time
+            if self.queue.complete(job, result):
+                logger.info(
+                    "Job %s (%s) done in %.2fs", job["id"], job["kind"], elapsed
+                )
+            else:
+                logger.warning(
+                    "Job %s (%s) done in %.2fs, after another worker claimed it: "
+                    "result discarded",
+                    job["id"],
+                    job["kind"],
+                    elapsed,
+                )
+        return True
+
+    def run(self, stop=None):
+        """Run jobs until ``stop`` (a threading.Event) is set."""
+        stop = stop or threading.Event()
+        next_maintenance = 0.0
+        while not stop.is_set():
+            if time.monotonic() >= next_maintenance:
+                self.queue.maintain()
+                next_maintenance = time.monotonic() + self.maintenance_interval
+            if not self.run_once():
+                stop.wait(self.poll_interval)
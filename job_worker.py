@@ -0,0 +1,85 @@
+import argparse
+import logging
+import signal
+import threading
+
+from job_queue import Worker
+
+logger = logging.getLogger(__name__)
+
+# Processo che esegue i lavori in coda (descrizioni e raccomandazioni generate dall'LLM)
+
+
+def in_app_context(app, handler):
+    """Run ``handler`` in an app context of its own, as a request would."""
+
+    def run(payload, progress):
+        with app.app_context():
+            return handler(payload, progress)
+
+    return run
+
+
+def run_worker(app, worker, stop):
+    # The queue reaches the database through the app's engine
+    with app.app_context():
+        worker.run(stop)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Run the queued LLM jobs of the book store."
+    )
+    parser.add_argument(
+        "--threads", type=int, default=4, help="jobs run at the same time"
+    )
+    parser.add_argument(
+        "--kinds", nargs="+", help="only run these kinds of jobs (default: all)"
+    )
+    parser.add_argument("--poll-interval", type=float, default=1.0)
+    args = parser.parse_args()
+
+    import rag
+    from app import JOB_HANDLERS, app, job_queue
+
+    kinds = args.kinds or list(JOB_HANDLERS)
+    unknown = set(kinds) - set(JOB_HANDLERS)
+    if unknown:
+        parser.error(f"unknown job kinds: {', '.join(sorted(unknown))}")
+    handlers = {kind: in_app_context(app, JOB_HANDLERS[kind]) for kind in kinds}
+
+    if "recommendation" in handlers:
+        # Load the index before the first job instead of during it
+        try:
+            rag.warmup()
+        except Exception:
+            logger.exception("RAG warmup failed")
+
+    stop = threading.Event()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        # Finish the running jobs, then exit
+        signal.signal(signum, lambda *_: stop.set())
+
+    workers = [
+        Worker(job_queue, handlers, poll_interval=args.poll_interval)
+        for _ in range(args.threads)
+    ]
+    threads = [
+        threading.Thread(target=run_worker, args=(app, worker, stop), daemon=True)
+        for worker in workers
+    ]
+    for thread in threads:
+        thread.start()
+    logger.info(
+        "Job worker running %s jobs on %d threads", ", ".join(kinds), args.threads
+    )
+    while any(thread.is_alive() for thread in threads):
+        for thread in threads:
+            thread.join(timeout=1)
+    done = sum(worker.done for worker in workers)
+    failed = sum(worker.failed for worker in workers)
+    logger.info("Job worker stopped: %d done, %d failed", done, failed)
+
+
+if __name__ == "__main__":
+    main()
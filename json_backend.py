@@ -0,0 +1,75 @@
+import json
+import os
+
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # Optional: the standard library encoder is used instead
+    orjson = None
+
+# Codifica JSON delle risposte: orjson se installato, altrimenti il modulo json
+
+JSON_BACKEND = os.getenv("JSON_BACKEND", "orjson" if orjson else "json")
+if JSON_BACKEND == "orjson" and orjson is None:
+    raise RuntimeError("JSON_BACKEND=orjson but orjson is not installed")
+STREAM_CHUNK_ROWS = 500
+
+
+def dumps(obj, default=None, sort_keys=False):
+    """Encode ``obj`` as compact UTF-8 JSON bytes with the configured backend."""
+    if JSON_BACKEND == "orjson":
+        # Dates and dataclasses go through ``default``, as with Flask's encoder
+        option = (
+            orjson.OPT_PASSTHROUGH_DATETIME
+            | orjson.OPT_PASSTHROUGH_DATACLASS
+            | orjson.OPT_NON_STR_KEYS
+        )
+        if sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        return orjson.dumps(obj, default=default, option=option)
+    return json.dumps(
+        obj,
+        default=default,
+        sort_keys=sort_keys,
+        separators=(",", ":"),
+        ensure_ascii=False,
+    ).encode("utf-8")
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """Flask JSON provider (``jsonify``, ``request.get_json``) that encodes with ``dumps``."""
+
+    def _encode(self, obj):
+        return dumps(obj, default=self.default, sort_keys=self.sort_keys)
+
+    def dumps(self, obj, **kwargs):
+        return self._encode(obj).decode("utf-8")
+
+    def response(self, *args, **kwargs):
+        # Bytes straight into the response, without a round trip through str
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(
+            self._encode(obj) + b"\n", mimetype=self.mimetype
+        )
+
+
+def iter_json_object(fields, array_name, items, chunk_size=STREAM_CHUNK_ROWS):
+    """Encode ``fields`` plus an ``array_name`` array of ``items`` as one JSON object, piece by piece.
+
+    The array is encoded ``chunk_size`` items at a time, so a streamed
+    response starts before the last row is read and never holds them all.
+    """
+    head = dumps(fields)[:-1]
+    yield head + (b"," if fields else b"") + dumps(array_name) + b":["
+    chunk = []
+    separator = b""
+    for item in items:
+        chunk.append(item)
+        if len(chunk) >= chunk_size:
+            yield separator + dumps(chunk)[1:-1]
+            separator = b","
+            chunk = []
+    if chunk:
+        yield separator + dumps(chunk)[1:-1]
+    yield b"]}"
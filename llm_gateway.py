@@ -0,0 +1,343 @@
+import asyncio
+import os
+import random
+import threading
+import time
+from contextlib import asynccontextmanager, contextmanager
+
+import httpx
+import openai
+from openai import AsyncOpenAI, OpenAI
+
+# Punto di accesso unico all'LLM: connessioni condivise, timeout, limite di
+# concorrenza, retry con jitter e circuit breaker
+
+LLM_BACKEND = os.getenv("LLM_BACKEND", "openai")
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "30"))
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "2"))
+# Quanto aspettare al massimo un posto libero prima di rinunciare
+LLM_QUEUE_TIMEOUT = float(os.getenv("LLM_QUEUE_TIMEOUT", "10"))
+
+# Errors worth retrying: rate limits, timeouts, connection drops and 5xx responses
+RETRYABLE_ERRORS = (
+    openai.RateLimitError,
+    openai.APIConnectionError,
+    openai.APITimeoutError,
+    openai.InternalServerError,
+)
+
+
+class LLMUnavailable(Exception):
+    """Raised without calling the API: the circuit is open or no slot freed up in time."""
+
+
+def retry_after(error):
+    """Return the delay (seconds) requested by the API in a rate-limit response, if any."""
+    response = getattr(error, "response", None)
+    if response is None:
+        return None
+    headers = response.headers
+    if headers.get("retry-after-ms"):
+        return float(headers["retry-after-ms"]) / 1000
+    if headers.get("retry-after"):
+        try:
+            return float(headers["retry-after"])
+        except ValueError:
+            return None
+    return None
+
+
+class CircuitBreaker:
+    """Stop calling an upstream that keeps failing.
+
+    After ``failure_threshold`` consecutive failures the circuit opens and calls
+    are refused for ``reset_timeout`` seconds; then one trial call is let
+    through (half-open) and its outcome closes or re-opens the circuit.
+    """
+
+    def __init__(self, failure_threshold=5, reset_timeout=30.0, clock=time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+        self._failures = 0
+        self._opened_at = None
+        self._trial_running = False
+        self._lock = threading.Lock()
+        self.opened = 0
+
+    @property
+    def state(self):
+        if self._opened_at is None:
+            return "closed"
+        if self._clock() - self._opened_at >= self.reset_timeout:
+            return "half_open"
+        return "open"
+
+    def before_call(self):
+        with self._lock:
+            state = self.state
+            if state == "open" or (state == "half_open" and self._trial_running):
+                raise LLMUnavailable("LLM circuit breaker is open")
+            if state == "half_open":
+                self._trial_running = True
+
+    def cancel_call(self):
+        """The call announced by ``before_call`` didn't happen."""
+        with self._lock:
+            self._trial_running = False
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial_running = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._trial_running or self._failures >= self.failure_threshold:
+                if self._opened_at is None:
+                    self.opened += 1
+                self._opened_at = self._clock()
+            self._trial_running = False
+
+
+class OpenAIBackend:
+    """Chat completions through the OpenAI SDK, on pooled HTTP connections."""
+
+    def __init__(self, timeout=LLM_TIMEOUT, max_connections=LLM_MAX_CONCURRENCY):
+        limits = httpx.Limits(
+            max_connections=max_connections, max_keepalive_connections=max_connections
+        )
+        self.http_client = httpx.Client(limits=limits, timeout=timeout)
+        self.async_http_client = httpx.AsyncClient(limits=limits, timeout=timeout)
+        # The gateway retries: the SDK must not retry on its own as well
+        self.client = OpenAI(
+            api_key=os.environ.get("OPENAI_API_KEY"),
+            timeout=timeout,
+            max_retries=0,
+            http_client=self.http_client,
+        )
+        self.async_client = AsyncOpenAI(
+            api_key=os.environ.get("OPENAI_API_KEY"),
+            timeout=timeout,
+            max_retries=0,
+            http_client=self.async_http_client,
+        )
+
+    def complete(self, messages, model, max_tokens, timeout):
+        response = self.client.chat.completions.create(
+            model=model, messages=messages, max_tokens=max_tokens, timeout=timeout
+        )
+        return response.choices[0].message.content
+
+    async def acomplete(self, messages, model, max_tokens, timeout):
+        response = await self.async_client.chat.completions.create(
+            model=model, messages=messages, max_tokens=max_tokens, timeout=timeout
+        )
+        return response.choices[0].message.content
+
+
+class FakeBackend:
+    """Offline backend: answers with ``respond(messages)`` (echoes the prompt by default)."""
+
+    def __init__(self, respond=None):
+        self.respond = respond or (
+            lambda messages: f"Fake answer to: {messages[-1]['content']}"
+        )
+        self.calls = []
+        self.http_client = None
+        self.async_http_client = None
+
+    def complete(self, messages, model, max_tokens, timeout):
+        self.calls.append(messages)
+        return self.respond(messages)
+
+    async def acomplete(self, messages, model, max_tokens, timeout):
+        return self.complete(messages, model, max_tokens, timeout)
+
+
+class LLMGateway:
+    """Shared entry point for every LLM call of the app.
+
+    At most ``max_concurrency`` calls (sync and async together) are in flight;
+    retryable errors are retried ``max_retries`` times with jittered
+    exponential backoff, and a circuit breaker fails fast while the upstream
+    is down, so a slow or broken API can't tie up every worker.
+    """
+
+    def __init__(
+        self,
+        backend,
+        max_concurrency=LLM_MAX_CONCURRENCY,
+        timeout=LLM_TIMEOUT,
+        queue_timeout=LLM_QUEUE_TIMEOUT,
+        max_retries=LLM_MAX_RETRIES,
+        base_delay=0.5,
+        max_delay=8.0,
+        breaker=None,
+        sleep=time.sleep,
+    ):
+        self.backend = backend
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self.queue_timeout = queue_timeout
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.breaker = breaker or CircuitBreaker()
+        self.sleep = sleep
+        self._semaphore = threading.BoundedSemaphore(max_concurrency)
+        self._stats_lock = threading.Lock()
+        self._stats = {
+            "calls": 0,
+            "failures": 0,
+            "retries": 0,
+            "rejected": 0,
+            "in_flight": 0,
+        }
+
+    def _count(self, name, delta=1):
+        with self._stats_lock:
+            self._stats[name] += delta
+
+    def _backoff(self, attempt, error):
+        delay = random.uniform(0, min(self.max_delay, self.base_delay * 2**attempt))
+        if isinstance(error, openai.RateLimitError):
+            delay = retry_after(error) or delay
+        return delay
+
+    @contextmanager
+    def slot(self):
+        """Hold one of the concurrency slots and report the outcome to the breaker.
+
+        Used directly by callers that talk to the API through other clients
+        (e.g. the LangChain chain in rag.py).
+        """
+        self.breaker.before_call()
+        if not self._semaphore.acquire(timeout=self.queue_timeout):
+            self.breaker.cancel_call()
+            self._count("rejected")
+            raise LLMUnavailable("Too many LLM calls in flight")
+        self._count("in_flight")
+        try:
+            yield
+        except RETRYABLE_ERRORS:
+            self.breaker.record_failure()
+            raise
+        except BaseException:
+            # The upstream answered (e.g. a 400) or the caller gave up: it isn't down
+            self.breaker.record_success()
+            raise
+        else:
+            self.breaker.record_success()
+        finally:
+            self._count("in_flight", -1)
+            self._semaphore.release()
+
+    @asynccontextmanager
+    async def aslot(self):
+        self.breaker.before_call()
+        # The slots are shared with the threads: poll instead of blocking the event loop
+        deadline = time.monotonic() + self.queue_timeout
+        while not self._semaphore.acquire(blocking=False):
+            if time.monotonic() >= deadline:
+                self.breaker.cancel_call()
+                self._count("rejected")
+                raise LLMUnavailable("Too many LLM calls in flight")
+            await asyncio.sleep(0.01)
+        self._count("in_flight")
+        try:
+            yield
+        except RETRYABLE_ERRORS:
+            self.breaker.record_failure()
+            raise
+        except BaseException:
+            self.breaker.record_success()
+            raise
+        else:
+            self.breaker.record_success()
+        finally:
+            self._count("in_flight", -1)
+            self._semaphore.release()
+
+    def _messages(self, prompt, system):
+        return [
+            {"role": "system", "content": system},
+            {"role": "user", "content": prompt},
+        ]
+
+    def chat(
+        self,
+        prompt,
+        system="You are a helpful assistant.",
+        model="gpt-4o-mini",
+        max_tokens=300,
+        timeout=None,
+        max_retries=None,
+    ):
+        """Return the model's answer to ``prompt``; errors are raised after the retries."""
+        messages = self._messages(prompt, system)
+        max_retries = self.max_retries if max_retries is None else max_retries
+        for attempt in range(max_retries + 1):
+            self._count("calls")
+            try:
+                with self.slot():
+                    return self.backend.complete(
+                        messages, model, max_tokens, timeout or self.timeout
+                    )
+            except RETRYABLE_ERRORS as e:
+                self._count("failures")
+                if attempt == max_retries:
+                    raise
+                self._count("retries")
+                self.sleep(self._backoff(attempt, e))
+
+    async def achat(
+        self,
+        prompt,
+        system="You are a helpful assistant.",
+        model="gpt-4o-mini",
+        max_tokens=300,
+        timeout=None,
+        max_retries=None,
+    ):
+        """Async version of ``chat``, for batch jobs that fan out many calls."""
+        messages = self._messages(prompt, system)
+        max_retries = self.max_retries if max_retries is None else max_retries
+        for attempt in range(max_retries + 1):
+            self._count("calls")
+            try:
+                async with self.aslot():
+                    return await self.backend.acomplete(
+                        messages, model, max_tokens, timeout or self.timeout
+                    )
+            except RETRYABLE_ERRORS as e:
+                self._count("failures")
+                if attempt == max_retries:
+                    raise
+                self._count("retries")
+                await asyncio.sleep(self._backoff(attempt, e))
+
+    def stats(self):
+        with self._stats_lock:
+            stats = dict(self._stats)
+        stats.update(
+            max_concurrency=self.max_concurrency,
+            circuit=self.breaker.state,
+            circuit_opened=self.breaker.opened,
+        )
+        return stats
+
+
+def create_backend(name=LLM_BACKEND):
+    if name == "openai":
+        return OpenAIBackend()
+    if name == "fake":
+        return FakeBackend()
+    raise ValueError(f"Unknown LLM backend: {name}")
+
+
+# Gateway condiviso da tutto il processo
+gateway = LLMGateway(create_backend())
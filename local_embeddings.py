@@ -0,0 +1,69 @@
+import os
+import threading
+
+from langchain_core.embeddings import Embeddings
+
+# Backend di embedding locale (CPU) basato su transformers, senza chiamate di rete
+
+DEFAULT_LOCAL_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+LOCAL_BATCH_SIZE = int(os.getenv("RAG_LOCAL_EMBEDDING_BATCH_SIZE", "32"))
+
+
+class LocalEmbeddings(Embeddings):
+    """Sentence embeddings computed in-process with a Hugging Face model.
+
+    The tokenizer and the model are loaded once and kept in memory; texts are
+    embedded in batches (mean pooling over the tokens, L2-normalized vectors).
+    """
+
+    def __init__(
+        self,
+        model_name=DEFAULT_LOCAL_MODEL,
+        batch_size=LOCAL_BATCH_SIZE,
+        max_length=256,
+        device="cpu",
+    ):
+        # Optional dependencies: only needed with RAG_EMBEDDING_BACKEND=local
+        import torch
+        from transformers import AutoModel, AutoTokenizer
+
+        self._torch = torch
+        self.model_name = model_name
+        self.model_id = f"local:{model_name}"
+        self.batch_size = batch_size
+        self.max_length = max_length
+        self.device = device
+        self._tokenizer = AutoTokenizer.from_pretrained(model_name)
+        self._model = AutoModel.from_pretrained(model_name).to(device).eval()
+        # One forward pass at a time: torch already uses every core for a batch
+        self._lock = threading.Lock()
+
+    def _embed(self, texts):
+        torch = self._torch
+        # Batches of texts of similar length waste less work on padding
+        order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+        vectors = [None] * len(texts)
+
+        for start in range(0, len(order), self.batch_size):
+            batch = order[start : start + self.batch_size]
+            encoded = self._tokenizer(
+                [texts[i] for i in batch],
+                padding=True,
+                truncation=True,
+                max_length=self.max_length,
+                return_tensors="pt",
+            ).to(self.device)
+            with self._lock, torch.inference_mode():
+                hidden = self._model(**encoded).last_hidden_state
+            mask = encoded["attention_mask"].unsqueeze(-1).to(hidden.dtype)
+            pooled = (hidden * mask).sum(dim=1) / mask.sum(dim=1).clamp(min=1e-9)
+            pooled = torch.nn.functional.normalize(pooled, p=2, dim=1)
+            for i, vector in zip(batch, pooled.cpu().tolist()):
+                vectors[i] = vector
+        return vectors
+
+    def embed_documents(self, texts):
+        return self._embed(list(texts))
+
+    def embed_query(self, text):
+        return self._embed([text])[0]
@@ -0,0 +1,26 @@
+"""add job.user_id: only the user who queued a job reads its result
+
+Revision ID: 0b5e9d2c7f14
+Revises: 6c2d8a4f1e37
+Create Date: 2026-10-18 21:24:37.118452
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0b5e9d2c7f14'
+down_revision = '6c2d8a4f1e37'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('job', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('user_id', sa.Integer(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('job', schema=None) as batch_op:
+        batch_op.drop_column('user_id')
@@ -0,0 +1,35 @@
+"""add book.revision for the ETags, drop the description_version counter
+
+Revision ID: 1c6f3b8e2a47
+Revises: 4e8a2d6b1c90
+Create Date: 2026-10-19 10:12:37.418205
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '1c6f3b8e2a47'
+down_revision = '4e8a2d6b1c90'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('book', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('revision', sa.Integer(), server_default='0', nullable=False))
+
+    op.drop_table('description_version')
+
+
+def downgrade():
+    description_version = op.create_table('description_version',
+    sa.Column('id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('version', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.bulk_insert(description_version, [{'id': 1, 'version': 0}])
+
+    with op.batch_alter_table('book', schema=None) as batch_op:
+        batch_op.drop_column('revision')
@@ -0,0 +1,29 @@
+"""add description_fetch_lock table for cross-worker request coalescing
+
+Revision ID: 2b8e5f0d6c17
+Revises: 9e4b1d7c3a52
+Create Date: 2026-10-18 15:48:12.904316
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '2b8e5f0d6c17'
+down_revision = '9e4b1d7c3a52'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('description_fetch_lock',
+    sa.Column('key', sa.String(length=512), nullable=False),
+    sa.Column('owner', sa.String(length=32), nullable=False),
+    sa.Column('expires_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('key')
+    )
+
+
+def downgrade():
+    op.drop_table('description_fetch_lock')
@@ -0,0 +1,31 @@
+"""add book_description cache table
+
+Revision ID: 3f9c1a7b2d04
+Revises: eae7823d7884
+Create Date: 2026-10-18 09:12:31.418022
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f9c1a7b2d04'
+down_revision = 'eae7823d7884'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('book_description',
+    sa.Column('key', sa.String(length=512), nullable=False),
+    sa.Column('title', sa.String(length=255), nullable=False),
+    sa.Column('author', sa.String(length=255), nullable=False),
+    sa.Column('description', sa.Text(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('key')
+    )
+
+
+def downgrade():
+    op.drop_table('book_description')
@@ -0,0 +1,28 @@
+"""add book_change log: the books changed under each catalog version
+
+Revision ID: 4e8a2d6b1c90
+Revises: 7a3f5c1e9b62
+Create Date: 2026-10-18 23:05:51.208634
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '4e8a2d6b1c90'
+down_revision = '7a3f5c1e9b62'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('book_change',
+    sa.Column('version', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('book_id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.PrimaryKeyConstraint('version', 'book_id')
+    )
+
+
+def downgrade():
+    op.drop_table('book_change')
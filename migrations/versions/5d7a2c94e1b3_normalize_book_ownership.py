@@ -0,0 +1,89 @@
+"""normalize book ownership into user_books association table
+
+Revision ID: 5d7a2c94e1b3
+Revises: c52e9f13a8d6
+Create Date: 2026-10-18 11:26:52.804471
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5d7a2c94e1b3'
+down_revision = 'c52e9f13a8d6'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('user_books',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('book_id', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['book_store_users.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['book_id'], ['book.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('user_id', 'book_id')
+    )
+    op.create_index('ix_user_books_book_id', 'user_books', ['book_id'])
+    op.create_index('ix_book_price', 'book', ['price', 'id'])
+    op.create_index('ix_book_year_published', 'book', ['year_published', 'id'])
+
+    # Rows of book_users edited by their owner may no longer match any catalog
+    # entry: add them to the catalog so that no collection loses a book.
+    op.execute(
+        "INSERT INTO book (title, author, year_published, price) "
+        "SELECT bu.title, bu.author, MIN(bu.year_published), MIN(bu.price) "
+        "FROM book_users bu "
+        "WHERE NOT EXISTS ("
+        "  SELECT 1 FROM book b WHERE b.title = bu.title AND b.author = bu.author"
+        ") "
+        "GROUP BY bu.title, bu.author"
+    )
+
+    # Every ownership now points at the catalog row with the same title and author
+    op.execute(
+        "INSERT INTO user_books (user_id, book_id) "
+        "SELECT DISTINCT bu.user_id, b.id "
+        "FROM book_users bu "
+        "JOIN book b ON b.title = bu.title AND b.author = bu.author "
+        "WHERE bu.user_id IS NOT NULL"
+    )
+
+    op.drop_index('ix_book_users_user_id_year_published', table_name='book_users')
+    op.drop_index('ix_book_users_user_id_price', table_name='book_users')
+    op.drop_table('book_users')
+
+
+def downgrade():
+    op.create_table('book_users',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('title', sa.String(length=255), nullable=False),
+    sa.Column('author', sa.String(length=255), nullable=False),
+    sa.Column('year_published', sa.Integer(), nullable=False),
+    sa.Column('price', sa.Float(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['book_store_users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(
+        'ix_book_users_user_id_price', 'book_users', ['user_id', 'price', 'id']
+    )
+    op.create_index(
+        'ix_book_users_user_id_year_published',
+        'book_users',
+        ['user_id', 'year_published', 'id'],
+    )
+
+    # The old layout used the book id as primary key, so a book can only have
+    # one owner there: keep the first one.
+    op.execute(
+        "INSERT INTO book_users (id, title, author, year_published, price, user_id) "
+        "SELECT b.id, b.title, b.author, b.year_published, b.price, MIN(ub.user_id) "
+        "FROM user_books ub JOIN book b ON b.id = ub.book_id "
+        "GROUP BY b.id, b.title, b.author, b.year_published, b.price"
+    )
+
+    op.drop_index('ix_book_year_published', table_name='book')
+    op.drop_index('ix_book_price', table_name='book')
+    op.drop_index('ix_user_books_book_id', table_name='user_books')
+    op.drop_table('user_books')
@@ -0,0 +1,49 @@
+"""copy price and year_published to user_books for the per-user collection indexes
+
+Revision ID: 6c2d8a4f1e37
+Revises: f1a7c3e5b920
+Create Date: 2026-10-18 19:02:11.604183
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '6c2d8a4f1e37'
+down_revision = 'f1a7c3e5b920'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('user_books', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('price', sa.Float(), nullable=True))
+        batch_op.add_column(sa.Column('year_published', sa.Integer(), nullable=True))
+
+    op.execute(
+        "UPDATE user_books SET "
+        "price = (SELECT price FROM book WHERE book.id = user_books.book_id), "
+        "year_published = (SELECT year_published FROM book WHERE book.id = user_books.book_id)"
+    )
+
+    with op.batch_alter_table('user_books', schema=None) as batch_op:
+        batch_op.alter_column('price', existing_type=sa.Float(), nullable=False)
+        batch_op.alter_column('year_published', existing_type=sa.Integer(), nullable=False)
+        batch_op.create_index('ix_user_books_user_id_price', ['user_id', 'price', 'book_id'], unique=False)
+        batch_op.create_index('ix_user_books_user_id_year_published', ['user_id', 'year_published', 'book_id'], unique=False)
+
+    # Global (price, id) indexes can't order one user's books: the ones above do
+    op.drop_index('ix_book_year_published', table_name='book')
+    op.drop_index('ix_book_price', table_name='book')
+
+
+def downgrade():
+    op.create_index('ix_book_price', 'book', ['price', 'id'], unique=False)
+    op.create_index('ix_book_year_published', 'book', ['year_published', 'id'], unique=False)
+
+    with op.batch_alter_table('user_books', schema=None) as batch_op:
+        batch_op.drop_index('ix_user_books_user_id_year_published')
+        batch_op.drop_index('ix_user_books_user_id_price')
+        batch_op.drop_column('year_published')
+        batch_op.drop_column('price')
@@ -0,0 +1,29 @@
+"""add description_version counter for the ETag of /fetch_description
+
+Revision ID: 7a3f5c1e9b62
+Revises: 0b5e9d2c7f14
+Create Date: 2026-10-18 22:41:09.531207
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7a3f5c1e9b62'
+down_revision = '0b5e9d2c7f14'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    description_version = op.create_table('description_version',
+    sa.Column('id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('version', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.bulk_insert(description_version, [{'id': 1, 'version': 0}])
+
+
+def downgrade():
+    op.drop_table('description_version')
@@ -0,0 +1,40 @@
+"""add indexes for hot lookups
+
+Revision ID: 8b41d6e0c7a2
+Revises: 3f9c1a7b2d04
+Create Date: 2026-10-18 10:03:47.552917
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8b41d6e0c7a2'
+down_revision = '3f9c1a7b2d04'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # book_users keeps its own copy of title/author/price, so removing duplicate
+    # catalog rows (keeping the oldest) doesn't lose anything from the collections
+    op.execute(
+        "DELETE FROM book WHERE id NOT IN "
+        "(SELECT MIN(id) FROM book GROUP BY title, author)"
+    )
+    op.create_index('uq_book_title_author', 'book', ['title', 'author'], unique=True)
+    op.create_index(
+        'ix_book_users_user_id_price', 'book_users', ['user_id', 'price', 'id']
+    )
+    op.create_index(
+        'ix_book_users_user_id_year_published',
+        'book_users',
+        ['user_id', 'year_published', 'id'],
+    )
+
+
+def downgrade():
+    op.drop_index('ix_book_users_user_id_year_published', table_name='book_users')
+    op.drop_index('ix_book_users_user_id_price', table_name='book_users')
+    op.drop_index('uq_book_title_author', table_name='book')
@@ -0,0 +1,43 @@
+"""add full-text and trigram indexes for the catalog search
+
+Revision ID: 9e4b1d7c3a52
+Revises: 5d7a2c94e1b3
+Create Date: 2026-10-18 15:02:37.518204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9e4b1d7c3a52'
+down_revision = '5d7a2c94e1b3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # SQLite uses the in-process inverted index of catalog_search.py instead
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+
+    # Expression indexes: the expressions must match the queries in catalog_search.py
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_book_search ON book USING gin "
+        "(to_tsvector('simple', coalesce(title, '') || ' ' || coalesce(author, '') "
+        "|| ' ' || coalesce(genres, '')))"
+    )
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_book_title_author_trgm ON book USING gin "
+        "(lower(title || ' ' || author) gin_trgm_ops)"
+    )
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+
+    # pg_trgm stays installed: other objects of the database may use it
+    op.execute("DROP INDEX IF EXISTS ix_book_title_author_trgm")
+    op.execute("DROP INDEX IF EXISTS ix_book_search")
@@ -0,0 +1,35 @@
+"""add collection versions and the user_book_change log for delta sync
+
+Revision ID: a4c81f2e7d39
+Revises: 2b8e5f0d6c17
+Create Date: 2026-10-18 16:21:37.518204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a4c81f2e7d39'
+down_revision = '2b8e5f0d6c17'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('book_store_users', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('collection_version', sa.Integer(), server_default='0', nullable=False))
+
+    op.create_table('user_book_change',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('version', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('book_id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['book_store_users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('user_id', 'version', 'book_id')
+    )
+
+
+def downgrade():
+    op.drop_table('user_book_change')
+    with op.batch_alter_table('book_store_users', schema=None) as batch_op:
+        batch_op.drop_column('collection_version')
@@ -0,0 +1,36 @@
+"""realign book id sequence with existing rows
+
+Revision ID: c52e9f13a8d6
+Revises: 8b41d6e0c7a2
+Create Date: 2026-10-18 10:41:09.113640
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c52e9f13a8d6'
+down_revision = '8b41d6e0c7a2'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # SQLite allocates INTEGER PRIMARY KEY values from max(id) on its own
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+
+    # book.id is a SERIAL column, but insertBooks.py and the old add_book wrote
+    # explicit ids, so book_id_seq may still be behind max(id). Make sure the
+    # sequence exists and owns the column, then move it past the existing rows.
+    op.execute("CREATE SEQUENCE IF NOT EXISTS book_id_seq OWNED BY book.id")
+    op.execute("ALTER TABLE book ALTER COLUMN id SET DEFAULT nextval('book_id_seq')")
+    op.execute(
+        "SELECT setval('book_id_seq', COALESCE(MAX(id), 0) + 1, false) FROM book"
+    )
+
+
+def downgrade():
+    # The sequence stays: book.id was already a SERIAL column before this revision
+    pass
@@ -0,0 +1,29 @@
+"""add catalog_version counter for the ETags of catalog pages
+
+Revision ID: d3e9b6a1f4c8
+Revises: a4c81f2e7d39
+Create Date: 2026-10-18 16:58:04.271935
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd3e9b6a1f4c8'
+down_revision = 'a4c81f2e7d39'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    catalog_version = op.create_table('catalog_version',
+    sa.Column('id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('version', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.bulk_insert(catalog_version, [{'id': 1, 'version': 0}])
+
+
+def downgrade():
+    op.drop_table('catalog_version')
@@ -0,0 +1,46 @@
+"""add job table for the queue of LLM jobs run by job_worker.py
+
+Revision ID: f1a7c3e5b920
+Revises: d3e9b6a1f4c8
+Create Date: 2026-10-18 18:12:40.518306
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f1a7c3e5b920'
+down_revision = 'd3e9b6a1f4c8'
+branch_labels = None
+depends_on = None
+
+PENDING = sa.text("status IN ('queued', 'running')")
+
+
+def upgrade():
+    op.create_table('job',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('kind', sa.String(length=50), nullable=False),
+    sa.Column('payload', sa.Text(), nullable=False),
+    sa.Column('dedupe_key', sa.String(length=255), nullable=True),
+    sa.Column('status', sa.String(length=16), nullable=False),
+    sa.Column('priority', sa.Integer(), nullable=False),
+    sa.Column('attempts', sa.Integer(), nullable=False),
+    sa.Column('max_attempts', sa.Integer(), nullable=False),
+    sa.Column('available_at', sa.DateTime(), nullable=False),
+    sa.Column('locked_until', sa.DateTime(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('finished_at', sa.DateTime(), nullable=True),
+    sa.Column('result', sa.Text(), nullable=True),
+    sa.Column('error', sa.Text(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('uq_job_pending_dedupe_key', 'job', ['dedupe_key'], unique=True, postgresql_where=PENDING, sqlite_where=PENDING)
+    op.create_index('ix_job_claim', 'job', ['status', 'priority', 'id'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_job_claim', table_name='job')
+    op.drop_index('uq_job_pending_dedupe_key', table_name='job')
+    op.drop_table('job')
@@ -0,0 +1,84 @@
+import base64
+import binascii
+import json
+
+from sqlalchemy import and_, or_
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+
+class InvalidCursor(ValueError):
+    """Raised when a pagination cursor is malformed or belongs to another ordering."""
+
+
+def encode_cursor(payload):
+    """Turn the keyset position into an opaque, URL-safe string."""
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    padded = cursor + "=" * (-len(cursor) % 4)
+    try:
+        return json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (binascii.Error, ValueError) as e:
+        raise InvalidCursor("Invalid cursor") from e
+
+
+def page_size(limit):
+    """Clamp the requested page size to ``[1, MAX_PAGE_SIZE]``."""
+    if limit is None:
+        return DEFAULT_PAGE_SIZE
+    return max(1, min(limit, MAX_PAGE_SIZE))
+
+
+def keyset_paginate(
+    query, sort_column, id_column, descending=False, limit=None, cursor=None
+):
+    """Return ``(rows, next_cursor)`` for one page of ``query``.
+
+    Rows are ordered by ``(sort_column, id_column)`` so the order is total even
+    when several rows share the same sort value; the cursor stores the position
+    of the last row and the next page starts strictly after it. ``sort_column``
+    may be ``id_column`` itself.
+    """
+    limit = page_size(limit)
+    columns = [id_column] if sort_column is id_column else [sort_column, id_column]
+    ordering = f"{sort_column.key}:{'desc' if descending else 'asc'}"
+
+    if cursor:
+        position = decode_cursor(cursor)
+        if not isinstance(position, dict) or position.get("o") != ordering:
+            raise InvalidCursor("Cursor does not match the requested ordering")
+        values = position.get("v")
+        if not isinstance(values, list) or len(values) != len(columns):
+            raise InvalidCursor("Invalid cursor")
+
+        def after(column, value):
+            return column < value if descending else column > value
+
+        if len(columns) == 1:
+            query = query.filter(after(id_column, values[0]))
+        else:
+            query = query.filter(
+                or_(
+                    after(sort_column, values[0]),
+                    and_(sort_column == values[0], after(id_column, values[1])),
+                )
+            )
+
+    query = query.order_by(
+        *[column.desc() if descending else column.asc() for column in columns]
+    )
+    # Fetch one extra row to know whether there is a next page
+    rows = query.limit(limit + 1).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_cursor(
+            {"o": ordering, "v": [getattr(last, column.key) for column in columns]}
+        )
+    return rows, next_cursor
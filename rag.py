@@ -1,69 +1,619 @@
-import os
-from langchain_community.document_loaders.csv_loader import CSVLoader
-from langchain_openai import ChatOpenAI, OpenAIEmbeddings
-from langchain_community.vectorstores import FAISS
-from langchain.chains.combine_documents import create_stuff_documents_chain
-from langchain.chains import create_retrieval_chain
-from langchain import hub
-import time
-
-# Set your OpenAI API key
-os.environ["OPENAI_API_KEY"] = os.getenv("OPENAI_API_KEY")
-
-
-# Function to initialize the system (embedding model, vector store, etc.)
-def initialize_rag_system():
-    # Load your CSV file
-    loader = CSVLoader("books.csv")
-    documents = loader.load()
-
-    # Create embeddings for your documents or load from disk if available
-    embedding_model = OpenAIEmbeddings()
-
-    # Check if the FAISS index already exists
-    if os.path.exists("faiss_index"):
-        print("Loading FAISS index from disk...")
-        # Load FAISS index from disk
-        vector_store = FAISS.load_local(
-            "faiss_index", embedding_model, allow_dangerous_deserialization=True
-        )
-    else:
-        print("Creating FAISS index...")
-        # If FAISS index doesn't exist, create it
-        vector_store = FAISS.from_documents(documents, embedding_model)
-        vector_store.save_local("faiss_index")
-
-    # Set up the retriever using the FAISS vector store's retriever interface
-    retriever = vector_store.as_retriever(
-        search_type="similarity_score_threshold", search_kwargs={"score_threshold": 0.5}
-    )
-
-    # Load the custom prompt from the hub
-    retrieval_qa_chat_prompt = hub.pull("langchain-ai/retrieval-qa-chat")
-
-    # Set up the LLM
-    llm = ChatOpenAI(
-        model_name="gpt-4o-mini", openai_api_key=os.environ["OPENAI_API_KEY"]
-    )
-
-    # Create a chain that combines the LLM and the retrieval prompt
-    combine_docs_chain = create_stuff_documents_chain(llm, retrieval_qa_chat_prompt)
-
-    # Create the final retrieval chain
-    retrieval_chain = create_retrieval_chain(retriever, combine_docs_chain)
-
-    return retrieval_chain
-
-
-# Function to get book recommendations dynamically
-def get_book_recommendations(query):
-    """Run the RAG system to get recommendations for the provided query."""
-    retrieval_chain = initialize_rag_system()
-
-    start_time = time.time()
-    # Run the query through the retrieval chain
-    response = retrieval_chain.invoke({"input": query})
-    end_time = time.time()
-
-    print(f"Time taken to retrieve answer: {end_time - start_time:.2f} seconds")
-    return response["answer"]
+import copy
+import logging
+import os
+import threading
+from langchain_community.document_loaders.csv_loader import CSVLoader
+from langchain_openai import ChatOpenAI, OpenAIEmbeddings
+from langchain_community.vectorstores import FAISS
+from langchain.chains.combine_documents import create_stuff_documents_chain
+from langchain.chains import create_retrieval_chain
+from langchain import hub
+import time
+
+import book_index
+from llm_gateway import gateway
+from recommendation_cache import RecommendationCache, SEMANTIC_CACHE_THRESHOLD
+from embedding_cache import (
+    EMBEDDING_CACHE_PATH,
+    CachedEmbeddings,
+    SQLiteEmbeddingStore,
+)
+
+logger = logging.getLogger(__name__)
+
+# Set your OpenAI API key
+os.environ["OPENAI_API_KEY"] = os.getenv("OPENAI_API_KEY")
+
+BOOKS_CSV_PATH = "books.csv"
+FAISS_INDEX_PATH = "faiss_index"
+
+# Backend degli embedding: "openai" (API remota) o "local" (modello transformers su CPU)
+EMBEDDING_BACKEND = os.getenv("RAG_EMBEDDING_BACKEND", "openai")
+LOCAL_EMBEDDING_MODEL = os.getenv(
+    "RAG_LOCAL_EMBEDDING_MODEL", "sentence-transformers/all-MiniLM-L6-v2"
+)
+
+# Rilevanza minima (0-1) dei libri recuperati, sovrascrivibile per richiesta
+SCORE_THRESHOLD = float(os.getenv("RAG_SCORE_THRESHOLD", "0.5"))
+DEFAULT_TOP_K = 4
+MAX_TOP_K = 50
+
+# Ogni quanti secondi controllare se l'indice FAISS su disco è cambiato
+RELOAD_CHECK_INTERVAL = float(os.getenv("RAG_RELOAD_CHECK_INTERVAL", "5"))
+
+# Funzione che restituisce i libri del catalogo (id, title, author, genres), impostata dall'app
+_catalog_source = None
+
+
+def set_catalog_source(source):
+    """Index the books returned by ``source(book_ids=None)`` instead of books.csv.
+
+    ``source`` is called with None for the whole catalog, or with a list of ids.
+    """
+    global _catalog_source
+    _catalog_source = source
+
+
+def create_base_embedding_model(backend=EMBEDDING_BACKEND):
+    """Return the embedding model of the configured backend."""
+    if backend == "openai":
+        return OpenAIEmbeddings(
+            http_client=gateway.backend.http_client, timeout=gateway.timeout
+        )
+    if backend == "local":
+        # Imported here: transformers and torch are only needed by this backend
+        from local_embeddings import LocalEmbeddings
+
+        return LocalEmbeddings(LOCAL_EMBEDDING_MODEL)
+    raise ValueError(f"Unknown embedding backend: {backend}")
+
+
+def embedding_model_id(model):
+    """Identify the model behind ``model``, e.g. "openai:text-embedding-ada-002"."""
+    if isinstance(model, CachedEmbeddings):
+        model = model.model
+    if isinstance(model, OpenAIEmbeddings):
+        return f"openai:{model.model}"
+    return getattr(model, "model_id", None) or type(model).__name__
+
+
+def create_embedding_model(model=None):
+    """Return ``model`` (the configured backend by default) behind the embedding cache.
+
+    Set RAG_EMBEDDING_CACHE to an empty string to disable the cache.
+    """
+    if model is None:
+        model = create_base_embedding_model()
+    if not EMBEDDING_CACHE_PATH:
+        return model
+    # The model id is part of the cache key: vectors of different models never mix
+    return CachedEmbeddings(
+        model, SQLiteEmbeddingStore(EMBEDDING_CACHE_PATH), embedding_model_id(model)
+    )
+
+
+# Attesa prima di riprovare un aggiornamento dell'indice fallito (raddoppia a ogni errore)
+SYNC_RETRY_DELAY = 5.0
+SYNC_MAX_RETRY_DELAY = 300.0
+
+
+def _index_version():
+    """Return the version of the FAISS index on disk (changes whenever it's saved)."""
+    return book_index.index_version(FAISS_INDEX_PATH)
+
+
+# Function to load the FAISS vector store, creating it from the CSV if needed (no catalog source)
+def load_vector_store(embedding_model):
+    # Check if the FAISS index already exists
+    if os.path.exists(FAISS_INDEX_PATH):
+        index_path = book_index.current_index_path(FAISS_INDEX_PATH)
+        book_index.check_embedding_id(index_path, embedding_model_id(embedding_model))
+        logger.info("Loading FAISS index from disk...")
+        # Load FAISS index from disk
+        return FAISS.load_local(
+            index_path, embedding_model, allow_dangerous_deserialization=True
+        )
+
+    logger.info("Creating FAISS index...")
+    # Load your CSV file (only needed when the index has to be built)
+    loader = CSVLoader(BOOKS_CSV_PATH)
+    documents = loader.load()
+
+    # If FAISS index doesn't exist, create it
+    vector_store = FAISS.from_documents(documents, embedding_model)
+    vector_store.save_local(FAISS_INDEX_PATH)
+    book_index.write_embedding_id(FAISS_INDEX_PATH, embedding_model_id(embedding_model))
+    return vector_store
+
+
+class RecommenderEngine:
+    """Process-wide RAG engine: built once, shared by all request threads.
+
+    The prompt, the LLM client and the embedding model are created once; only
+    the FAISS index (and the chains that wrap it) is reloaded when the files in
+    ``faiss_index`` change on disk.
+
+    With a catalog source, the index mirrors the book table: a manifest records
+    the content hash of every indexed book, so loading the index only embeds the
+    books added or changed since it was saved, and catalog updates made by the
+    app are applied in the background with ``request_sync``.
+    """
+
+    def __init__(self, embedding_model=None):
+        self._lock = threading.Lock()
+        # Base embedding model (OpenAI when None); tests can pass a fake one
+        self._base_embedding_model = embedding_model
+        self._embedding_model = None
+        self._embedding_id = None
+        self._prompt = None
+        self._llm = None
+        self.vector_store = None
+        self.retrieval_chain = None
+        # Prompt + LLM over already retrieved documents (doesn't depend on the index)
+        self.combine_docs_chain = None
+        # Incremented every time the index changes (cached answers of older generations are stale)
+        self.generation = 0
+        self._manifest = None
+        self._index_version = None
+        self._last_check = 0.0
+        self._pending_lock = threading.Lock()
+        self._pending_ids = set()
+        self._sync_thread = None
+        self.stats = {
+            "ready": False,
+            "startup_seconds": None,
+            "started_at": None,
+            "reloads": 0,
+            "last_reload_seconds": None,
+            "last_reload_at": None,
+            "last_sync": None,
+            "embedding": None,
+        }
+
+    def _build_chain(self, score_threshold=SCORE_THRESHOLD):
+        # Set up the retriever using the FAISS vector store's retriever interface
+        retriever = self.vector_store.as_retriever(
+            search_type="similarity_score_threshold",
+            search_kwargs={"score_threshold": score_threshold},
+        )
+
+        # Create the final retrieval chain
+        return create_retrieval_chain(retriever, self.combine_docs_chain)
+
+    def _read_index(self):
+        """Return the saved index and its manifest, or ``(None, None)``.
+
+        An index built from books.csv has no manifest: it's rebuilt from the
+        book table. Call it under ``book_index.index_lock``.
+        """
+        index_path = book_index.current_index_path(FAISS_INDEX_PATH)
+        manifest = book_index.load_manifest(index_path)
+        if manifest is None:
+            return None, None
+        book_index.check_embedding_id(index_path, self._embedding_id)
+        logger.info("Loading FAISS index from disk...")
+        vector_store = FAISS.load_local(
+            index_path, self._embedding_model, allow_dangerous_deserialization=True
+        )
+        return vector_store, manifest
+
+    def _load_index(self):
+        """Load the index from disk and bring it up to date with the catalog."""
+        if _catalog_source is None:
+            vector_store = load_vector_store(self._embedding_model)
+            self._index_version = _index_version()
+            return vector_store
+
+        start_time = time.perf_counter()
+        # One worker at a time: the first one builds or updates the index,
+        # the others then load it with nothing left to embed
+        with book_index.index_lock(FAISS_INDEX_PATH):
+            vector_store, manifest = self._read_index()
+            if manifest is None:
+                logger.info("Creating FAISS index from the book table...")
+                manifest = {}
+
+            vector_store, stats = book_index.sync_index(
+                vector_store, manifest, _catalog_source(), self._embedding_model
+            )
+            if vector_store is None:
+                raise RuntimeError("The book catalog is empty: nothing to recommend")
+            if (
+                stats["embedded"]
+                or stats["removed"]
+                or not os.path.exists(FAISS_INDEX_PATH)
+            ):
+                book_index.save_index(
+                    vector_store, manifest, FAISS_INDEX_PATH, self._embedding_id
+                )
+            self._index_version = _index_version()
+
+        self._manifest = manifest
+        stats["seconds"] = round(time.perf_counter() - start_time, 3)
+        self.stats["last_sync"] = stats
+        return vector_store
+
+    def _start(self):
+        start_time = time.perf_counter()
+
+        # Create embeddings for your documents (cached on disk, so unchanged books are never re-embedded)
+        self._embedding_model = create_embedding_model(self._base_embedding_model)
+        self._embedding_id = embedding_model_id(self._embedding_model)
+
+        # Load the custom prompt from the hub
+        self._prompt = hub.pull("langchain-ai/retrieval-qa-chat")
+
+        # Set up the LLM
+        # Same pooled connections and timeout as the other LLM calls; retries
+        # stay with the SDK because the chain doesn't go through gateway.chat
+        self._llm = ChatOpenAI(
+            model_name="gpt-4o-mini",
+            openai_api_key=os.environ["OPENAI_API_KEY"],
+            http_client=gateway.backend.http_client,
+            http_async_client=gateway.backend.async_http_client,
+            timeout=gateway.timeout,
+            max_retries=gateway.max_retries,
+        )
+        # Create a chain that combines the LLM and the retrieval prompt
+        self.combine_docs_chain = create_stuff_documents_chain(self._llm, self._prompt)
+
+        self.vector_store = self._load_index()
+        self.retrieval_chain = self._build_chain()
+        self.generation += 1
+
+        elapsed = time.perf_counter() - start_time
+        self.stats.update(
+            ready=True,
+            startup_seconds=round(elapsed, 3),
+            started_at=time.time(),
+            embedding=self._embedding_id,
+        )
+        logger.info("RAG engine ready in %.2f seconds", elapsed)
+
+    def _reload(self):
+        start_time = time.perf_counter()
+
+        self.vector_store = self._load_index()
+        self.retrieval_chain = self._build_chain()
+        self.generation += 1
+
+        elapsed = time.perf_counter() - start_time
+        self.stats["reloads"] += 1
+        self.stats["last_reload_seconds"] = round(elapsed, 3)
+        self.stats["last_reload_at"] = time.time()
+        logger.info("FAISS index reloaded in %.2f seconds", elapsed)
+
+    def _index_changed(self):
+        now = time.monotonic()
+        if now - self._last_check < RELOAD_CHECK_INTERVAL:
+            return False
+        self._last_check = now
+        return _index_version() != self._index_version
+
+    def ensure_ready(self):
+        """Build the engine on first use and reload it if the index changed."""
+        if self.retrieval_chain is not None and not self._index_changed():
+            return self
+        with self._lock:
+            # Another thread may have finished the work while we were waiting
+            if self.retrieval_chain is None:
+                self._start()
+            elif _index_version() != self._index_version:
+                self._reload()
+        return self
+
+    def sync_books(self, book_ids):
+        """Re-index the given books (added, changed or deleted in the catalog).
+
+        The update is applied to an in-memory copy of the index, which then
+        replaces the one used by the request threads. If another worker saved
+        a newer index meanwhile, the update is applied to that one instead, so
+        its changes aren't overwritten.
+        """
+        with self._lock, book_index.index_lock(FAISS_INDEX_PATH):
+            if self._manifest is None or _catalog_source is None:
+                return None  # Not started yet (the start will sync) or no catalog
+            start_time = time.perf_counter()
+
+            reloaded = _index_version() != self._index_version
+            vector_store, manifest = None, None
+            if reloaded:
+                vector_store, manifest = self._read_index()
+            if manifest is None:
+                vector_store = book_index.clone_vector_store(self.vector_store)
+                manifest = copy.deepcopy(self._manifest)
+            vector_store, stats = book_index.sync_index(
+                vector_store,
+                manifest,
+                _catalog_source(book_ids),
+                self._embedding_model,
+                book_ids=book_ids,
+            )
+            if stats["embedded"] or stats["removed"]:
+                book_index.save_index(
+                    vector_store, manifest, FAISS_INDEX_PATH, self._embedding_id
+                )
+            if reloaded or stats["embedded"] or stats["removed"]:
+                self._index_version = _index_version()
+                self.generation += 1
+
+            self.vector_store = vector_store
+            self._manifest = manifest
+            self.retrieval_chain = self._build_chain()
+            stats["seconds"] = round(time.perf_counter() - start_time, 3)
+            self.stats["last_sync"] = stats
+            return stats
+
+    def request_sync(self, book_ids):
+        """Schedule ``sync_books`` on a background thread (requests are merged)."""
+        with self._pending_lock:
+            self._pending_ids.update(book_ids)
+            if self._sync_thread is None:
+                self._sync_thread = threading.Thread(
+                    target=self._sync_worker, name="rag-index-sync", daemon=True
+                )
+                self._sync_thread.start()
+
+    def _sync_worker(self):
+        retry_delay = SYNC_RETRY_DELAY
+        while True:
+            with self._pending_lock:
+                book_ids = self._pending_ids
+                self._pending_ids = set()
+                if not book_ids:
+                    self._sync_thread = None
+                    return
+            try:
+                self.sync_books(sorted(book_ids))
+                retry_delay = SYNC_RETRY_DELAY
+            except Exception:
+                logger.exception(
+                    "Error while updating the FAISS index, retrying in %.0f seconds",
+                    retry_delay,
+                )
+                # Put the books back: they are synced with the next ones
+                with self._pending_lock:
+                    self._pending_ids.update(book_ids)
+                time.sleep(retry_delay)
+                retry_delay = min(retry_delay * 2, SYNC_MAX_RETRY_DELAY)
+
+
+_engine = RecommenderEngine()
+
+# Risposte già generate, riusate per query uguali o quasi uguali finché l'indice non cambia
+_recommendation_cache = RecommendationCache(
+    similarity_threshold=(
+        float(SEMANTIC_CACHE_THRESHOLD) if SEMANTIC_CACHE_THRESHOLD else None
+    )
+)
+
+
+def _embed_query(query):
+    return _engine._embedding_model.embed_query(query)
+
+
+def get_engine():
+    """Return the shared, ready-to-use recommender engine."""
+    return _engine.ensure_ready()
+
+
+def index_version():
+    """Version of the saved index this process searches, or None before it's loaded.
+
+    Workers that loaded the same index report the same version.
+    """
+    return _engine._index_version
+
+
+def warmup():
+    """Build the engine ahead of the first request (e.g. at app startup)."""
+    get_engine()
+
+
+def is_ready():
+    """True once the engine is built (using it won't block on the index build)."""
+    return _engine.retrieval_chain is not None
+
+
+_warmup_lock = threading.Lock()
+_warmup_thread = None
+
+
+def _warmup_worker():
+    try:
+        warmup()
+    except Exception:
+        logger.exception("Recommender warmup failed")
+
+
+def warmup_in_background():
+    """Start building the engine on a background thread, unless already under way."""
+    global _warmup_thread
+    with _warmup_lock:
+        if _warmup_thread is None or not _warmup_thread.is_alive():
+            _warmup_thread = threading.Thread(
+                target=_warmup_worker, name="rag-warmup", daemon=True
+            )
+            _warmup_thread.start()
+
+
+def schedule_index_update(book_ids):
+    """Tell the engine that these catalog books were added, changed or deleted."""
+    _engine.request_sync(book_ids)
+
+
+# Tempi delle risposte in streaming (time-to-first-token)
+_stream_stats_lock = threading.Lock()
+_stream_stats = {
+    "requests": 0,
+    "last_ttft_seconds": None,
+    "avg_ttft_seconds": None,
+    "avg_total_seconds": None,
+}
+
+
+def _record_stream(ttft, total):
+    with _stream_stats_lock:
+        n = _stream_stats["requests"] + 1
+        _stream_stats["requests"] = n
+        _stream_stats["last_ttft_seconds"] = ttft
+        if ttft is not None:
+            previous = _stream_stats["avg_ttft_seconds"] or 0.0
+            _stream_stats["avg_ttft_seconds"] = round(
+                previous + (ttft - previous) / n, 3
+            )
+        previous = _stream_stats["avg_total_seconds"] or 0.0
+        _stream_stats["avg_total_seconds"] = round(previous + (total - previous) / n, 3)
+
+
+def engine_stats():
+    """Return startup and reload timings of the shared engine."""
+    stats = dict(_engine.stats)
+    with _stream_stats_lock:
+        stats["streaming"] = dict(_stream_stats)
+    stats["recommendation_cache"] = _recommendation_cache.stats()
+    if isinstance(_engine._embedding_model, CachedEmbeddings):
+        stats["embedding_cache"] = _engine._embedding_model.stats()
+    return stats
+
+
+# Function to initialize the system (embedding model, vector store, etc.)
+def initialize_rag_system():
+    return get_engine().retrieval_chain
+
+
+def _retrieve(engine, query, vector, score_threshold):
+    """Return the documents the chain's retriever would, searching with ``vector``.
+
+    ``vector`` is the query embedding computed for the semantic cache lookup
+    (None when there was none): the query is embedded once per request.
+    """
+    if score_threshold is None:
+        score_threshold = SCORE_THRESHOLD
+    if vector is None:
+        vector = _embed_query(query)
+    vector_store = engine.vector_store
+    relevance = vector_store._select_relevance_score_fn()
+    results = vector_store.similarity_search_with_score_by_vector(
+        list(vector), k=DEFAULT_TOP_K
+    )
+    return [
+        document
+        for document, distance in results
+        if relevance(distance) >= score_threshold
+    ]
+
+
+def retrieve_books(query, k=DEFAULT_TOP_K, score_threshold=None):
+    """Return the ``k`` indexed books most similar to ``query``, without the LLM.
+
+    Returns ``(metadata, score)`` pairs, best first; scores are relevance
+    scores in [0, 1] and those below ``score_threshold`` are dropped.
+    """
+    vector_store = get_engine().vector_store
+    if score_threshold is None:
+        score_threshold = SCORE_THRESHOLD
+
+    start_time = time.perf_counter()
+    results = vector_store.similarity_search_with_relevance_scores(
+        query, k=k, score_threshold=score_threshold
+    )
+    elapsed = time.perf_counter() - start_time
+    logger.debug("Retrieved %d books in %.1f ms", len(results), elapsed * 1000)
+    return [(document.metadata, float(score)) for document, score in results]
+
+
+# Function to get book recommendations dynamically
+def get_book_recommendations(query, score_threshold=None):
+    """Run the RAG system to get recommendations for the provided query.
+
+    ``score_threshold`` overrides the minimum relevance of the retrieved books;
+    such answers bypass the recommendation cache.
+    """
+    return recommend(query, score_threshold)["answer"]
+
+
+def recommend(query, score_threshold=None):
+    """Like ``get_book_recommendations``, with the retrieved books.
+
+    Returns ``{"answer": ..., "sources": [...]}`` (see ``_source``).
+    """
+    engine = get_engine()
+    generation = engine.generation
+    cached, vector = None, None
+    if score_threshold is None:
+        cached, vector = _recommendation_cache.lookup(query, generation, _embed_query)
+    if cached is not None:
+        logger.debug("Recommendation served from the cache")
+        return cached
+
+    start_time = time.time()
+    # Retrieve the books, then generate the answer from them
+    # The LLM call counts against the gateway's concurrency limit and breaker
+    with gateway.slot():
+        documents = _retrieve(engine, query, vector, score_threshold)
+        answer = engine.combine_docs_chain.invoke(
+            {"input": query, "context": documents}
+        )
+    end_time = time.time()
+
+    logger.info("Time taken to retrieve answer: %.2f seconds", end_time - start_time)
+    recommendation = {
+        "answer": answer,
+        "sources": [_source(document) for document in documents],
+    }
+    if score_threshold is None:
+        _recommendation_cache.store(query, generation, recommendation, vector)
+    return recommendation
+
+
+def _source(document):
+    """The part of a retrieved document sent to the browser."""
+    return {**document.metadata, "text": document.page_content}
+
+
+def stream_book_recommendations(query, score_threshold=None):
+    """Yield ``(event, data)`` pairs while the answer for ``query`` is generated.
+
+    The retrieved books come first (``"sources"``), then the answer one
+    ``"token"`` at a time, then ``"done"`` with the time to first token.
+    A cached answer is sent as a single token.
+    """
+    engine = get_engine()
+    generation = engine.generation
+    start_time = time.perf_counter()
+    cached, vector = None, None
+    if score_threshold is None:
+        cached, vector = _recommendation_cache.lookup(query, generation, _embed_query)
+    if cached is not None:
+        yield "sources", cached["sources"]
+        yield "token", cached["answer"]
+        total = round(time.perf_counter() - start_time, 3)
+        yield "done", {"ttft_seconds": total, "total_seconds": total, "cached": True}
+        return
+
+    ttft = None
+    answer = []
+    with gateway.slot():
+        documents = _retrieve(engine, query, vector, score_threshold)
+        sources = [_source(document) for document in documents]
+        yield "sources", sources
+        for token in engine.combine_docs_chain.stream(
+            {"input": query, "context": documents}
+        ):
+            if token:
+                if ttft is None:
+                    ttft = round(time.perf_counter() - start_time, 3)
+                answer.append(token)
+                yield "token", token
+    total = round(time.perf_counter() - start_time, 3)
+
+    _record_stream(ttft, total)
+    logger.info(
+        "Time to first token: %s seconds, full answer: %.2f seconds", ttft, total
+    )
+    if score_threshold is None:
+        _recommendation_cache.store(
+            query, generation, {"answer": "".join(answer), "sources": sources}, vector
+        )
+    yield "done", {"ttft_seconds": ttft, "total_seconds": total, "cached": False}
@@ -0,0 +1,117 @@
+import os
+import re
+import threading
+
+import numpy as np
+
+from caching import TTLCache
+
+# Cache delle risposte del recommender: corrispondenza esatta e per similarità della query
+
+RECOMMENDATION_CACHE_SIZE = int(os.getenv("RECOMMENDATION_CACHE_SIZE", "512"))
+RECOMMENDATION_CACHE_TTL = int(os.getenv("RECOMMENDATION_CACHE_TTL", "3600"))
+# Similarità coseno minima per riusare la risposta di una query simile (vuoto per disattivare)
+SEMANTIC_CACHE_THRESHOLD = os.getenv("RECOMMENDATION_CACHE_SIMILARITY", "0.95")
+
+
+def normalize_query(query):
+    """Lowercase the query, collapse whitespace and drop trailing punctuation."""
+    return re.sub(r"\s+", " ", query).strip().lower().rstrip("?!.")
+
+
+def _unit(vector):
+    vector = np.asarray(vector, dtype=np.float32)
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+class RecommendationCache:
+    """LRU/TTL cache of recommender answers for one index generation.
+
+    A lookup first tries the normalized query; on a miss, and when
+    ``similarity_threshold`` is set, it embeds the query and reuses the answer
+    of the most similar cached query if their cosine similarity reaches the
+    threshold. Answers depend on the index, so entries of an older index
+    generation are dropped.
+    """
+
+    def __init__(
+        self,
+        maxsize=RECOMMENDATION_CACHE_SIZE,
+        ttl=RECOMMENDATION_CACHE_TTL,
+        similarity_threshold=None,
+        clock=None,
+    ):
+        kwargs = {} if clock is None else {"clock": clock}
+        self._entries = TTLCache(maxsize=maxsize, ttl=ttl, **kwargs)
+        self.similarity_threshold = similarity_threshold
+        self._generation = None
+        self._lock = threading.Lock()
+        self.exact_hits = 0
+        self.semantic_hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def _check_generation(self, generation):
+        with self._lock:
+            if generation != self._generation:
+                if self._generation is not None:
+                    self.invalidations += 1
+                self._entries.clear()
+                self._generation = generation
+
+    def lookup(self, query, generation, embed=None):
+        """Return ``(answer, vector)``; ``answer`` is None on a miss.
+
+        ``embed(query)`` is only called for the semantic lookup; its vector is
+        returned so neither the retrieval nor ``store`` embeds the query again.
+        """
+        self._check_generation(generation)
+        key = normalize_query(query)
+        entry = self._entries.get(key)
+        if entry is not None:
+            self.exact_hits += 1
+            return entry[0], entry[1]
+
+        vector = None
+        if self.similarity_threshold is not None and embed is not None:
+            vector = embed(query)
+            candidates = [
+                value for _, value in self._entries.items() if value[1] is not None
+            ]
+            if candidates:
+                unit = _unit(vector)
+                similarities = np.stack([value[1] for value in candidates]) @ unit
+                best = int(np.argmax(similarities))
+                if similarities[best] >= self.similarity_threshold:
+                    self.semantic_hits += 1
+                    return candidates[best][0], vector
+
+        self.misses += 1
+        return None, vector
+
+    def store(self, query, generation, answer, vector=None):
+        with self._lock:
+            if generation != self._generation:
+                return  # The index changed while the answer was generated
+        if vector is not None:
+            vector = _unit(vector)
+        self._entries.set(normalize_query(query), (answer, vector))
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self):
+        lookups = self.exact_hits + self.semantic_hits + self.misses
+        hits = self.exact_hits + self.semantic_hits
+        return {
+            "size": len(self._entries),
+            "maxsize": self._entries.maxsize,
+            "ttl": self._entries.ttl,
+            "similarity_threshold": self.similarity_threshold,
+            "exact_hits": self.exact_hits,
+            "semantic_hits": self.semantic_hits,
+            "misses": self.misses,
+            "hit_rate": round(hits / lookups, 3) if lookups else None,
+            "invalidations": self.invalidations,
+        }
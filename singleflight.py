@@ -0,0 +1,122 @@
+import threading
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import delete
+from sqlalchemy.orm import Session
+
+from upsert import insert_for
+
+# Coalescenza delle richieste: una sola chiamata in corso per chiave, tra thread
+# (in memoria) e tra worker (tabella di lock nel database)
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Run ``fn`` once per key at a time; concurrent callers share its result.
+
+    The first caller for a key (the leader) runs the function; callers that
+    arrive while it runs wait for it and get the same result, or the same
+    exception.
+    """
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+        self.leaders = 0
+        self.followers = 0
+
+    def do(self, key, fn):
+        with self._lock:
+            call = self._calls.get(key)
+            if call is None:
+                call = self._calls[key] = _Call()
+                self.leaders += 1
+                leader = True
+            else:
+                self.followers += 1
+                leader = False
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    def stats(self):
+        return {"leaders": self.leaders, "followers": self.followers}
+
+
+def _utcnow():
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+class SQLLease:
+    """Short-lived per-key locks stored in a database table, shared by every worker.
+
+    ``model`` has ``key``, ``owner`` and ``expires_at`` columns. A lease that
+    outlives ``ttl`` seconds (its holder crashed) can be taken over. Leases are
+    taken and released on their own connection, outside the request's session.
+    """
+
+    def __init__(self, db, model, ttl=60):
+        self.db = db
+        self.model = model
+        self.ttl = ttl
+        self._owners = {}
+        self._lock = threading.Lock()
+
+    def acquire(self, key):
+        """Take the lease for ``key``; return False if another worker holds it."""
+        owner = uuid.uuid4().hex
+        now = _utcnow()
+        table = self.model.__table__
+        with Session(self.db.engine) as session:
+            statement = insert_for(session, table).values(
+                key=key, owner=owner, expires_at=now + timedelta(seconds=self.ttl)
+            )
+            # Taken over only when the current lease has expired
+            statement = statement.on_conflict_do_update(
+                index_elements=[table.c.key],
+                set_={
+                    "owner": statement.excluded.owner,
+                    "expires_at": statement.excluded.expires_at,
+                },
+                where=table.c.expires_at < now,
+            ).returning(table.c.owner)
+            acquired = session.execute(statement).scalar_one_or_none() == owner
+            session.commit()
+        if acquired:
+            with self._lock:
+                self._owners[key] = owner
+        return acquired
+
+    def release(self, key):
+        with self._lock:
+            owner = self._owners.pop(key, None)
+        if owner is None:
+            return
+        table = self.model.__table__
+        with Session(self.db.engine) as session:
+            # Only our own lease: after an expiry it may belong to someone else
+            session.execute(
+                delete(table).where(table.c.key == key, table.c.owner == owner)
+            )
+            session.commit()
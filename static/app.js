@@ -65,7 +65,12 @@ document.addEventListener("DOMContentLoaded", () => {
       },
       body: JSON.stringify(userBookData),
     })
-      .then((response) => response.json())
+      .then((response) =>
+        response.json().then((data) => {
+          // e.g. a 403 when renaming a book other users own: keep the form open
+          if (!response.ok) throw new Error(data.message);
+        }),
+      )
       .then(() => {
         fetchUserBooks(); // Refresh the list of UserBooks
         editUserBookForm.reset();
@@ -79,38 +84,234 @@ document.addEventListener("DOMContentLoaded", () => {
   // More JavaScript code can go here if needed.
 });
 
-// Fetch and display the list of UserBooks
-function fetchUserBooks(queryString = "") {
-  console.log("Running fetchUserBooks.js");
+// The user's collection is loaded once and kept in IndexedDB with its version;
+// later loads only fetch the changes after that version (GET /user_books?since=)
+// and filters, sorts and search run on the local copy
+const PAGE_SIZE = 50;
+const COLLECTION_DB = "book-store";
+const COLLECTION_STORE = "collections";
 
-  // Make a GET request with the query string
-  fetch(`/user_books${queryString}`)
-    .then((response) => response.json())
-    .then((data) => {
-      const userBooksList = document.getElementById("books-list");
-      userBooksList.innerHTML = "";
-
-      // Add the UserBooks to the HTML table
-      data.forEach((userBook) => {
-        userBooksList.innerHTML += `
-            <tr>
-              <td><a href="/book/${userBook.id}">${userBook.title}</a></td>
-              <td>${userBook.author}</td>
-              <td>${userBook.year_published}</td>
-              <td>${userBook.price}</td>
-              <td>
-                <button class="delete" onclick="deleteUserBook(${userBook.id})">Delete</button>
-                <button class="edit" onclick="editUserBook(${userBook.id}, '${userBook.title}', '${userBook.author}', ${userBook.year_published}, ${userBook.price})">Edit</button>
-              </td>
-            </tr>
-          `;
-      });
+let collection = { version: 0, books: new Map() };
+let collectionLoaded = null;
+let collectionDb = null;
+let syncQueue = Promise.resolve();
+
+// Current view of the collection and the rows rendered so far
+const view = {
+  priceMin: null,
+  priceMax: null,
+  yearMin: null,
+  yearMax: null,
+  search: "",
+  sortField: "",
+  sortDirection: "asc",
+};
+let visibleBooks = [];
+let renderedCount = 0;
+
+// One cached collection per user of the browser
+function collectionKey() {
+  return document.body.dataset.userId;
+}
+
+function openCollectionDb() {
+  if (!collectionDb) {
+    collectionDb = new Promise((resolve, reject) => {
+      if (!window.indexedDB) {
+        reject(new Error("IndexedDB is not available"));
+        return;
+      }
+      const request = indexedDB.open(COLLECTION_DB, 1);
+      request.onupgradeneeded = () =>
+        request.result.createObjectStore(COLLECTION_STORE);
+      request.onsuccess = () => resolve(request.result);
+      request.onerror = () => reject(request.error);
+    });
+  }
+  return collectionDb;
+}
+
+function readCachedCollection() {
+  return openCollectionDb().then(
+    (db) =>
+      new Promise((resolve, reject) => {
+        const request = db
+          .transaction(COLLECTION_STORE)
+          .objectStore(COLLECTION_STORE)
+          .get(collectionKey());
+        request.onsuccess = () => resolve(request.result || null);
+        request.onerror = () => reject(request.error);
+      }),
+  );
+}
+
+function saveCachedCollection() {
+  return openCollectionDb().then(
+    (db) =>
+      new Promise((resolve, reject) => {
+        const transaction = db.transaction(COLLECTION_STORE, "readwrite");
+        transaction.objectStore(COLLECTION_STORE).put(
+          {
+            version: collection.version,
+            books: Array.from(collection.books.values()),
+          },
+          collectionKey(),
+        );
+        transaction.oncomplete = () => resolve();
+        transaction.onerror = () => reject(transaction.error);
+      }),
+  );
+}
+
+// Merge the changes sent by the server into the local collection
+function applyCollectionDelta(delta) {
+  const changed = delta.full || delta.books.length || delta.deleted.length;
+  if (delta.full) collection.books = new Map();
+  delta.books.forEach((book) => collection.books.set(book.id, book));
+  delta.deleted.forEach((id) => collection.books.delete(id));
+  collection.version = delta.version;
+
+  if (changed) {
+    renderUserBooks();
+    saveCachedCollection().catch((error) => {
+      console.warn("Collection not cached:", error);
+    });
+  }
+}
+
+// Fetch the changes after the local version (one sync at a time)
+function syncCollection() {
+  syncQueue = syncQueue
+    .then(() => {
+      // The first load gets the whole collection: let the server stream it
+      const stream = collection.version === 0 ? "&stream=1" : "";
+      return fetch(`/user_books?since=${collection.version}${stream}`);
+    })
+    .then((response) => {
+      if (!response.ok) {
+        throw new Error(`Failed to sync UserBooks. Status: ${response.status}`);
+      }
+      return response.json();
     })
+    .then(applyCollectionDelta)
     .catch((error) => {
       console.error("Error:", error);
     });
+  return syncQueue;
+}
+
+// Show the cached collection right away (first call only), then sync it
+function fetchUserBooks() {
+  console.log("Running fetchUserBooks.js");
+
+  if (!collectionLoaded) {
+    collectionLoaded = readCachedCollection()
+      .then((cached) => {
+        if (!cached) return;
+        collection = {
+          version: cached.version,
+          books: new Map(cached.books.map((book) => [book.id, book])),
+        };
+        renderUserBooks();
+      })
+      .catch((error) => {
+        console.warn("Collection cache unavailable:", error);
+      });
+  }
+  return collectionLoaded.then(syncCollection);
+}
+
+// Build the table row of a UserBook. Titles and authors are typed by the
+// users: they are set as text, never parsed as HTML
+function renderUserBookRow(userBook) {
+  const row = document.createElement("tr");
+  const cell = (content) => {
+    const td = document.createElement("td");
+    td.append(content);
+    row.appendChild(td);
+  };
+
+  const link = document.createElement("a");
+  link.href = `/book/${encodeURIComponent(userBook.id)}`;
+  link.textContent = userBook.title;
+  cell(link);
+  cell(userBook.author);
+  cell(String(userBook.year_published));
+  cell(String(userBook.price));
+
+  const deleteButton = document.createElement("button");
+  deleteButton.className = "delete";
+  deleteButton.textContent = "Delete";
+  deleteButton.addEventListener("click", () => deleteUserBook(userBook.id));
+  const editButton = document.createElement("button");
+  editButton.className = "edit";
+  editButton.textContent = "Edit";
+  editButton.addEventListener("click", () =>
+    editUserBook(
+      userBook.id,
+      userBook.title,
+      userBook.author,
+      userBook.year_published,
+      userBook.price,
+    ),
+  );
+  const actions = document.createElement("td");
+  actions.append(deleteButton, " ", editButton);
+  row.appendChild(actions);
+  return row;
+}
+
+function matchesView(userBook) {
+  return (
+    (view.priceMin === null || userBook.price >= view.priceMin) &&
+    (view.priceMax === null || userBook.price <= view.priceMax) &&
+    (view.yearMin === null || userBook.year_published >= view.yearMin) &&
+    (view.yearMax === null || userBook.year_published <= view.yearMax) &&
+    (!view.search ||
+      userBook.title.toLowerCase().includes(view.search) ||
+      userBook.author.toLowerCase().includes(view.search))
+  );
+}
+
+function compareValues(a, b) {
+  if (typeof a === "string" && typeof b === "string") return a.localeCompare(b);
+  return a < b ? -1 : a > b ? 1 : 0;
 }
 
+// Filter and sort the local collection, then display its first page
+function renderUserBooks() {
+  const field = view.sortField || "id";
+  const sign = view.sortDirection === "desc" ? -1 : 1;
+  // Ties are broken by id, as in the server's ordering
+  visibleBooks = Array.from(collection.books.values())
+    .filter(matchesView)
+    .sort((a, b) => sign * (compareValues(a[field], b[field]) || a.id - b.id));
+
+  renderedCount = Math.min(PAGE_SIZE, visibleBooks.length);
+  document
+    .getElementById("books-list")
+    .replaceChildren(
+      ...visibleBooks.slice(0, renderedCount).map(renderUserBookRow),
+    );
+}
+
+// Append the next page of the filtered collection, if there is one
+function loadMoreUserBooks() {
+  if (renderedCount >= visibleBooks.length) return;
+  const page = visibleBooks.slice(renderedCount, renderedCount + PAGE_SIZE);
+  document.getElementById("books-list").append(...page.map(renderUserBookRow));
+  renderedCount += page.length;
+}
+
+// Infinite scroll: render the next page when the end of the table becomes visible
+document.addEventListener("DOMContentLoaded", () => {
+  const sentinel = document.createElement("div");
+  document.getElementById("books-table").after(sentinel);
+  new IntersectionObserver((entries) => {
+    if (entries.some((entry) => entry.isIntersecting)) loadMoreUserBooks();
+  }).observe(sentinel);
+});
+
 // Delete a UserBook by ID
 function deleteUserBook(id) {
   fetch(`/user_books/${id}`, { method: "DELETE" })
@@ -134,105 +335,41 @@ function editUserBook(id, title, author, year_published, price) {
   document.getElementById("edit-price").value = price;
 }
 
-// Search and filter UserBooks by title or author
+// Search UserBooks by title or author (in the local collection)
 function searchUserBooks() {
-  const query = document.getElementById("search-query").value.toLowerCase();
-
-  fetch("/user_books")
-    .then((response) => response.json())
-    .then((data) => {
-      const userBooksList = document.getElementById("books-list");
-      userBooksList.innerHTML = "";
-      data
-        .filter((userBook) => {
-          return (
-            userBook.title.toLowerCase().includes(query) ||
-            userBook.author.toLowerCase().includes(query)
-          );
-        })
-        .forEach((userBook) => {
-          userBooksList.innerHTML += `
-                    <tr>
-                        <td>${userBook.title}</td>
-                        <td>${userBook.author}</td>
-                        <td>${userBook.year_published}</td>
-                        <td>${userBook.price}</td>
-                        <td>
-                            <button class="delete" onclick="deleteUserBook(${userBook.id})">Delete</button>
-                            <button class="edit" onclick="editUserBook(${userBook.id}, '${userBook.title}', '${userBook.author}', ${userBook.year_published}, ${userBook.price})">Edit</button>
-                        </td>
-                    </tr>
-                `;
-        });
-    });
+  view.search = document.getElementById("search-query").value.toLowerCase();
+  renderUserBooks();
 }
 
-let currentSortField = "";
-let currentSortDirection = "asc";
-
 function sortUserBooks(field) {
   // Invert the sort direction if sorting by the same field
-  if (currentSortField === field) {
-    currentSortDirection = currentSortDirection === "asc" ? "desc" : "asc";
+  if (view.sortField === field) {
+    view.sortDirection = view.sortDirection === "asc" ? "desc" : "asc";
   } else {
-    currentSortField = field;
-    currentSortDirection = "asc"; // Default to ascending when a new field is selected
+    view.sortField = field;
+    view.sortDirection = "asc"; // Default to ascending when a new field is selected
   }
+  renderUserBooks();
+}
 
-  // Make a GET request with the sorting query parameters
-  const queryString = new URLSearchParams({
-    sort_field: currentSortField,
-    sort_direction: currentSortDirection,
-  });
-
-  fetch(`/user_books?${queryString}`)
-    .then((response) => response.json())
-    .then((data) => {
-      const userBooksList = document.getElementById("books-list");
-      userBooksList.innerHTML = ""; // Clear the list
-
-      // Add the sorted UserBooks to the HTML table body
-      data.forEach((userBook) => {
-        userBooksList.innerHTML += `
-          <tr>
-            <td>${userBook.title}</td>
-            <td>${userBook.author}</td>
-            <td>${userBook.year_published}</td>
-            <td>${userBook.price}</td>
-            <td>
-              <button class="delete" onclick="deleteUserBook(${userBook.id})">Delete</button>
-              <button class="edit" onclick="editUserBook(${userBook.id}, '${userBook.title}', '${userBook.author}', ${userBook.year_published}, ${userBook.price})">Edit</button>
-            </td>
-          </tr>
-        `;
-      });
-    })
-    .catch((error) => {
-      console.error("Error:", error);
-    });
+// Read a number filter (null when the field is empty)
+function filterValue(id) {
+  const value = document.getElementById(id).value;
+  return value === "" ? null : Number(value);
 }
 
 // Function to apply filters
 function applyFilters() {
   console.log("Applying filters...");
 
-  const priceMin = document.getElementById("price-min").value;
-  const priceMax = document.getElementById("price-max").value;
-  const yearMin = document.getElementById("year-min").value;
-  const yearMax = document.getElementById("year-max").value;
-
-  // Construct the query string based on the filter values
-  let queryString = new URLSearchParams();
-  if (priceMin) queryString.append("price_min", priceMin);
-  if (priceMax) queryString.append("price_max", priceMax);
-  if (yearMin) queryString.append("year_min", yearMin);
-  if (yearMax) queryString.append("year_max", yearMax);
-
-  // Fetch the UserBooks with the query parameters
-  fetchUserBooks("?" + queryString.toString());
+  view.priceMin = filterValue("price-min");
+  view.priceMax = filterValue("price-max");
+  view.yearMin = filterValue("year-min");
+  view.yearMax = filterValue("year-max");
+  renderUserBooks();
 }
 
-// Reset filters and reload the page without any query parameters
+// Reset filters and show the whole collection
 function resetFilters() {
   // Reset the form values
   document.getElementById("year-min").value = "";
@@ -240,6 +377,6 @@ function resetFilters() {
   document.getElementById("price-min").value = "";
   document.getElementById("price-max").value = "";
 
-  // Reload the page to show all books without any filters
-  fetchBooks();
+  view.priceMin = view.priceMax = view.yearMin = view.yearMax = null;
+  renderUserBooks();
 }
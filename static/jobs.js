@@ -0,0 +1,54 @@
+// Wait for a job queued by the server (202 + status_url, see /jobs/<id>)
+const JOB_FIRST_DELAY = 1000;
+const JOB_MAX_DELAY = 5000;
+// Without a running job_worker.py the job never finishes: give up after this
+const JOB_MAX_WAIT = 60000;
+
+// Resolve with the job's result; reject when it fails or takes too long
+// (the error has timedOut set, so the page can tell the two apart).
+// onProgress, if given, is called with each new partial result of a
+// running job (the worker saves it at most every JOB_PROGRESS_INTERVAL).
+function waitForJob(statusUrl, onProgress = null, maxWait = JOB_MAX_WAIT) {
+  const deadline = Date.now() + maxWait;
+  let delay = JOB_FIRST_DELAY;
+  let lastPartial = null;
+  return new Promise((resolve, reject) => {
+    const poll = () => {
+      fetch(statusUrl)
+        .then((response) => {
+          if (!response.ok) {
+            throw new Error(`Job status ${response.status}`);
+          }
+          return response.json();
+        })
+        .then((job) => {
+          if (job.status === "done") {
+            resolve(job.result);
+            return;
+          }
+          if (job.status === "failed") {
+            reject(new Error(job.error || "Job failed"));
+            return;
+          }
+          if (Date.now() + delay > deadline) {
+            const error = new Error("The job is taking too long");
+            error.timedOut = true;
+            reject(error);
+            return;
+          }
+          const partial = JSON.stringify(job.result);
+          if (onProgress && job.result != null && partial !== lastPartial) {
+            lastPartial = partial;
+            onProgress(job.result);
+            // The job is making progress: check again soon
+            delay = JOB_FIRST_DELAY;
+          }
+          setTimeout(poll, delay);
+          // Back off: a slow or silent job isn't polled every second
+          delay = Math.min(delay * 2, JOB_MAX_DELAY);
+        })
+        .catch(reject);
+    };
+    poll();
+  });
+}
@@ -0,0 +1,850 @@
+import html
+import io
+import json
+import re
+
+import pytest
+from sqlalchemy import event
+from sqlalchemy.pool import StaticPool
+
+import get_bookDescription
+import rag
+from job_queue import Worker
+from app import (
+    JOB_HANDLERS,
+    Book,
+    User,
+    UserBookChange,
+    UserBooks,
+    catalog_search,
+    create_app,
+    db,
+    description_cache,
+    description_job,
+    job_queue,
+    user_cache,
+)
+
+
+@pytest.fixture
+def app():
+    app = create_app(
+        {
+            "TESTING": True,
+            "SECRET_KEY": "test",
+            "SQLALCHEMY_DATABASE_URI": "sqlite://",
+            "SQLALCHEMY_ENGINE_OPTIONS": {"poolclass": StaticPool},
+        }
+    )
+    with app.app_context():
+        db.create_all()
+    user_cache.clear()
+    yield app
+    user_cache.clear()
+
+
+def logged_in_client(app, username):
+    client = app.test_client()
+    client.post("/register", data={"username": username, "password": "secret"})
+    client.post("/login", data={"username": username, "password": "secret"})
+    return client
+
+
+@pytest.fixture
+def client(app):
+    return logged_in_client(app, "reader")
+
+
+def sse_events(body):
+    """Split a text/event-stream body into ``(event, data)`` pairs."""
+    assert body.endswith("\n\n")
+    events = []
+    for block in body[:-2].split("\n\n"):
+        event_line, data_line = block.split("\n")
+        assert event_line.startswith("event: ") and data_line.startswith("data: ")
+        events.append((event_line[7:], json.loads(data_line[6:])))
+    return events
+
+
+def test_stream_sends_sources_tokens_and_done(client, monkeypatch):
+    def fake_stream(query, score_threshold=None):
+        yield "sources", [{"book_id": 1, "title": "Dune"}]
+        yield "token", "Read "
+        yield "token", "Dune\nnow"
+        yield "done", {"ttft_seconds": 0.1, "total_seconds": 0.2, "cached": False}
+
+    monkeypatch.setattr(rag, "stream_book_recommendations", fake_stream)
+    response = client.post("/get_recommendations/stream", json={"query": "spice"})
+
+    assert response.status_code == 200
+    assert response.mimetype == "text/event-stream"
+    assert response.headers["Cache-Control"] == "no-cache"
+    assert response.headers["X-Accel-Buffering"] == "no"
+    assert sse_events(response.get_data(as_text=True)) == [
+        ("sources", [{"book_id": 1, "title": "Dune"}]),
+        ("token", "Read "),
+        # A newline in a token stays inside the JSON string: one data line per event
+        ("token", "Dune\nnow"),
+        ("done", {"ttft_seconds": 0.1, "total_seconds": 0.2, "cached": False}),
+    ]
+
+
+def test_stream_ends_with_an_error_event(client, monkeypatch):
+    def failing_stream(query, score_threshold=None):
+        yield "token", "Read "
+        raise RuntimeError("LLM timeout")
+
+    monkeypatch.setattr(rag, "stream_book_recommendations", failing_stream)
+    response = client.post("/get_recommendations/stream", json={"query": "spice"})
+
+    assert sse_events(response.get_data(as_text=True)) == [
+        ("token", "Read "),
+        ("error", {"message": "Error occurred during recommendation"}),
+    ]
+
+
+def test_stream_rejects_a_missing_query(client):
+    response = client.post("/get_recommendations/stream", json={})
+    assert response.status_code == 400
+
+
+@pytest.mark.parametrize("threshold", [0, 0.5, 1])
+def test_retrieve_returns_scored_books(app, client, monkeypatch, threshold):
+    with app.app_context():
+        db.session.add_all(
+            [
+                Book(
+                    id=1, title="Dune", author="Herbert", year_published=1965, price=9.5
+                ),
+                Book(
+                    id=2,
+                    title="Hyperion",
+                    author="Simmons",
+                    year_published=1989,
+                    price=8.0,
+                ),
+            ]
+        )
+        db.session.commit()
+    calls = []
+
+    def fake_retrieve(query, k, score_threshold):
+        calls.append((query, k, score_threshold))
+        # Book 3 was deleted after the index was last synced
+        return [({"book_id": 2}, 0.91234), ({"book_id": 3}, 0.8), ({"book_id": 1}, 0.7)]
+
+    monkeypatch.setattr(rag, "retrieve_books", fake_retrieve)
+    response = client.post(
+        "/get_recommendations",
+        json={
+            "query": "space opera",
+            "mode": "retrieve",
+            "k": 3,
+            "score_threshold": threshold,
+        },
+    )
+
+    assert response.status_code == 200
+    assert calls == [("space opera", 3, float(threshold))]
+    assert response.get_json() == {
+        "books": [
+            {
+                "id": 2,
+                "title": "Hyperion",
+                "author": "Simmons",
+                "year_published": 1989,
+                "price": 8.0,
+                "genres": None,
+                "score": 0.9123,
+            },
+            {
+                "id": 1,
+                "title": "Dune",
+                "author": "Herbert",
+                "year_published": 1965,
+                "price": 9.5,
+                "genres": None,
+                "score": 0.7,
+            },
+        ]
+    }
+
+
+@pytest.mark.parametrize("threshold", [-0.1, 1.5, "0.5", "high", True, [0.5]])
+def test_invalid_score_threshold_is_rejected(client, monkeypatch, threshold):
+    monkeypatch.setattr(rag, "retrieve_books", pytest.fail)
+    response = client.post(
+        "/get_recommendations",
+        json={"query": "space opera", "mode": "retrieve", "score_threshold": threshold},
+    )
+
+    assert response.status_code == 400
+    assert response.get_json() == {"message": "score_threshold must be between 0 and 1"}
+
+
+@pytest.mark.parametrize("k", [0, rag.MAX_TOP_K + 1, "5"])
+def test_retrieve_rejects_an_invalid_k(client, k):
+    response = client.post(
+        "/get_recommendations",
+        json={"query": "space opera", "mode": "retrieve", "k": k},
+    )
+    assert response.status_code == 400
+
+
+def test_first_search_does_not_build_the_recommender(app, client, monkeypatch):
+    with app.app_context():
+        db.session.add(
+            Book(id=1, title="Dune", author="Herbert", year_published=1965, price=9.5)
+        )
+        db.session.commit()
+    monkeypatch.setattr(catalog_search, "_index", None)
+    warmups = []
+    monkeypatch.setattr(rag, "is_ready", lambda: False)
+    monkeypatch.setattr(rag, "warmup_in_background", lambda: warmups.append(1))
+    monkeypatch.setattr(rag, "retrieve_books", pytest.fail)
+
+    response = client.get("/inventory?q=dune")
+
+    # Text results right away; the engine is built on a background thread
+    assert response.status_code == 200
+    assert "Dune" in response.get_data(as_text=True)
+    assert warmups == [1]
+
+
+def user_selects(app, client, path):
+    """Request ``path`` and return how many queries read the users table."""
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if "FROM book_store_users" in statement:
+            statements.append(statement)
+
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        assert client.get(path).status_code == 200
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+    return len(statements)
+
+
+def test_cached_user_skips_the_select(app, client):
+    user_cache.clear()
+    assert user_selects(app, client, "/recommender") == 1
+    assert user_selects(app, client, "/recommender") == 0
+
+
+def test_logout_evicts_the_cached_user(app, client):
+    client.get("/recommender")
+    with app.app_context():
+        user_id = db.session.scalar(db.select(User.id))
+    assert user_cache.get(user_id) is not None
+
+    client.get("/logout")
+    assert user_cache.get(user_id) is None
+
+
+def test_updating_a_user_evicts_it(app, client):
+    client.get("/recommender")
+    with app.app_context():
+        user = db.session.scalar(db.select(User))
+        assert user_cache.get(user.id) is not None
+
+        user.set_password("changed")
+        db.session.commit()
+        assert user_cache.get(user.id) is None
+
+        # Deleted users are evicted too
+        client.get("/recommender")
+        assert user_cache.get(user.id) is not None
+        db.session.delete(user)
+        db.session.commit()
+        assert user_cache.get(user.id) is None
+
+
+def catalog_etag(client):
+    return client.get("/inventory").headers["ETag"]
+
+
+def test_description_writes_change_the_description_etag(app, client, monkeypatch):
+    with app.app_context():
+        db.session.add(
+            Book(id=1, title="Dune", author="Herbert", year_published=1965, price=9.5)
+        )
+        db.session.commit()
+    description_cache.memory.clear()
+    monkeypatch.setattr(
+        get_bookDescription, "generate_book_description", lambda title, author: "Spice"
+    )
+    inventory_etag = catalog_etag(client)
+    assert client.get("/fetch_description/1").status_code == 202
+
+    # Stored by the job worker
+    with app.app_context():
+        description_job({"book_id": 1})
+    stored = client.get("/fetch_description/1")
+    assert stored.get_json() == {"description": "Spice"}
+    etag = {"If-None-Match": stored.headers["ETag"]}
+    assert client.get("/fetch_description/1", headers=etag).status_code == 304
+
+    # Rewritten by the enricher: a revalidation gets the new description, not a 304
+    with app.app_context():
+        description_cache.set("Dune", "Herbert", "Sand")
+    rewritten = client.get("/fetch_description/1", headers=etag)
+    assert rewritten.status_code == 200
+    assert rewritten.get_json() == {"description": "Sand"}
+
+    etag = {"If-None-Match": rewritten.headers["ETag"]}
+    assert client.delete("/fetch_description/1").status_code == 200
+    assert client.get("/fetch_description/1", headers=etag).status_code == 202
+
+    # Descriptions aren't part of the catalog pages
+    assert catalog_etag(client) == inventory_etag
+
+
+def test_etags_only_change_with_the_books_they_show(app, client):
+    with app.app_context():
+        db.session.add_all(
+            [
+                Book(
+                    id=1, title="Dune", author="Herbert", year_published=1965, price=9.5
+                ),
+                Book(id=2, title="Emma", author="Austen", year_published=1815, price=5),
+                Book(
+                    id=3, title="Ulysses", author="Joyce", year_published=1922, price=7
+                ),
+            ]
+        )
+        db.session.commit()
+        description_cache.set("Dune", "Herbert", "Spice")
+    description_etag = client.get("/fetch_description/1").headers["ETag"]
+    first_page = client.get("/inventory?limit=1").headers["ETag"]
+
+    # Another book's description and a book beyond the next page
+    with app.app_context():
+        description_cache.set("Emma", "Austen", "Matchmaking")
+    client.post("/add_to_collection/3")
+    assert client.put("/user_books/3", json={"price": 8}).status_code == 200
+    assert client.get("/fetch_description/1").headers["ETag"] == description_etag
+    assert client.get("/inventory?limit=1").headers["ETag"] == first_page
+
+    client.post("/add_to_collection/1")
+    assert client.put("/user_books/1", json={"price": 8}).status_code == 200
+    assert client.get("/inventory?limit=1").headers["ETag"] != first_page
+
+
+def test_only_new_books_change_the_catalog_version(app, client):
+    book = {"title": "Dune", "author": "Herbert", "year_published": 1965, "price": 9.5}
+    assert client.post("/user_books", json=book).status_code == 201
+    inventory_etag = catalog_etag(client)
+
+    # Another user adds the same book: only an ownership row is written
+    other = logged_in_client(app, "other")
+    assert other.post("/user_books", json=book).status_code == 201
+    assert catalog_etag(client) == inventory_etag
+
+    book["title"] = "Dune Messiah"
+    assert other.post("/user_books", json=book).status_code == 201
+    assert catalog_etag(client) != inventory_etag
+
+
+def test_jobs_are_only_readable_by_their_user(app, client):
+    with app.app_context():
+        db.session.add(
+            Book(id=1, title="Dune", author="Herbert", year_published=1965, price=9.5)
+        )
+        db.session.commit()
+    description_cache.memory.clear()
+    other = logged_in_client(app, "other")
+
+    recommendation = client.post("/get_recommendations", json={"query": "spice"})
+    assert recommendation.status_code == 202
+    status_url = recommendation.get_json()["status_url"]
+    assert client.get(status_url).get_json()["status"] == "queued"
+    assert "user_id" not in client.get(status_url).get_json()
+    assert other.get(status_url).status_code == 404
+
+    # The same query from another user is another job
+    assert (
+        other.post("/get_recommendations", json={"query": "spice"}).get_json()["job_id"]
+        != recommendation.get_json()["job_id"]
+    )
+
+    # A description is catalog data: everyone waiting for it shares the job
+    description = client.get("/fetch_description/1").get_json()
+    assert other.get("/fetch_description/1").get_json() == description
+    assert other.get(description["status_url"]).status_code == 200
+
+
+def fake_stream(query, score_threshold=None):
+    yield "sources", [{"title": "Dune"}]
+    yield "token", "Read "
+    yield "token", f"Dune ({query})"
+    yield "done", {"ttft_seconds": 0.1, "total_seconds": 0.2, "cached": False}
+
+
+def test_recommender_page_streams_the_recommendation_job(app, client, monkeypatch):
+    monkeypatch.setattr(rag, "stream_book_recommendations", fake_stream)
+    page = client.get("/recommender").get_data(as_text=True)
+    assert "jobs.js" in page and "waitForJob(data.status_url, render)" in page
+
+    queued = client.post("/get_recommendations", json={"query": "spice"})
+    assert queued.status_code == 202
+    partials = []
+    with app.app_context():
+        worker = Worker(job_queue, JOB_HANDLERS, progress_interval=0)
+        original = job_queue.progress
+
+        def record_progress(job, partial):
+            partials.append(json.loads(json.dumps(partial)))
+            return original(job, partial)
+
+        monkeypatch.setattr(job_queue, "progress", record_progress)
+        assert worker.run_once()
+
+    # The sources are published before the answer, then the answer grows
+    assert [partial["recommendation"] for partial in partials] == [
+        "",
+        "Read ",
+        "Read Dune (spice)",
+    ]
+    assert partials[0]["sources"] == [{"title": "Dune"}]
+
+    job = client.get(queued.get_json()["status_url"]).get_json()
+    assert job["status"] == "done"
+    assert job["result"] == {
+        "recommendation": "Read Dune (spice)",
+        "sources": [{"title": "Dune"}],
+        "timings": {"ttft_seconds": 0.1, "total_seconds": 0.2, "cached": False},
+    }
+
+
+def test_job_status_shows_the_partial_result(app, client):
+    queued = client.post("/get_recommendations", json={"query": "spice"}).get_json()
+    assert "events_url" not in queued
+    with app.app_context():
+        job = job_queue.claim()
+        job_queue.progress(job, {"recommendation": "Read", "sources": []})
+
+    response = client.get(queued["status_url"])
+    assert response.get_json()["status"] == "running"
+    assert response.get_json()["result"] == {"recommendation": "Read", "sources": []}
+    assert response.headers["Retry-After"] == "1"
+
+    other = logged_in_client(app, "other")
+    assert other.get(queued["status_url"]).status_code == 404
+
+
+def test_search_etag_follows_the_saved_index(client, monkeypatch):
+    monkeypatch.setattr(rag, "is_ready", lambda: False)
+    monkeypatch.setattr(rag, "warmup_in_background", lambda: None)
+    # The version of the index on disk, the same in every worker that loaded it
+    monkeypatch.setattr(rag, "index_version", lambda: ("book_index.v-1", 100.0))
+    etag = client.get("/inventory?q=dune").headers["ETag"]
+    assert client.get("/inventory?q=dune").headers["ETag"] == etag
+
+    monkeypatch.setattr(rag, "index_version", lambda: ("book_index.v-2", 200.0))
+    assert client.get("/inventory?q=dune").headers["ETag"] != etag
+
+
+def owned_books(app, username):
+    """``{title: (price, year_published)}`` of the user's collection rows."""
+    with app.app_context():
+        rows = db.session.execute(
+            db.select(Book.title, UserBooks.price, UserBooks.year_published)
+            .join(UserBooks, UserBooks.book_id == Book.id)
+            .join(User, User.id == UserBooks.user_id)
+            .where(User.username == username)
+        )
+        return {title: (price, year) for title, price, year in rows}
+
+
+BULK_CSV = b"""title,author,year_published,price,genres
+Dune,Frank Herbert,1965,9.99,Science Fiction
+Emma,Jane Austen,1815,4.50,
+,Nobody,2000,1.00,
+Dune,Frank Herbert,1965,9.99,Science Fiction
+Ulysses,James Joyce,1922,nan,
+"""
+
+
+def test_bulk_import_of_a_raw_csv_body(app, client):
+    response = client.post("/user_books/bulk", data=BULK_CSV, content_type="text/csv")
+
+    assert response.status_code == 200
+    report = response.get_json()
+    assert (report["total"], report["added"], report["already_owned"]) == (5, 2, 1)
+    assert report["success"] is False
+    assert report["errors"] == [
+        {"row": 3, "error": "Missing title"},
+        {"row": 5, "error": "price must be a finite number"},
+    ]
+    assert owned_books(app, "reader") == {
+        "Dune": (9.99, 1965),
+        "Emma": (4.5, 1815),
+    }
+    # The imported books reach the client through the delta sync
+    delta = client.get("/user_books?since=0").get_json()
+    assert sorted(book["title"] for book in delta["books"]) == ["Dune", "Emma"]
+
+
+def test_bulk_import_of_a_multipart_jsonl_upload(app, client):
+    client.post("/user_books/bulk", data=BULK_CSV, content_type="text/csv")
+    other = logged_in_client(app, "other")
+    jsonl = b"""{"title": "Dune", "author": "Frank Herbert", "year_published": 1965, "price": 9.99}
+{"title": "Ulysses", "author": "James Joyce", "year_published": 1922, "price": 12}
+not json
+["a", "list"]
+"""
+    response = other.post(
+        "/user_books/bulk",
+        data={"file": (io.BytesIO(jsonl), "books.jsonl")},
+        content_type="multipart/form-data",
+    )
+
+    assert response.status_code == 200
+    report = response.get_json()
+    assert (report["total"], report["added"], report["failed"]) == (4, 2, 2)
+    assert [error["row"] for error in report["errors"]] == [3, 4]
+    assert report["errors"][1]["error"] == "Each line must be a JSON object"
+    assert owned_books(app, "other") == {
+        "Dune": (9.99, 1965),
+        "Ulysses": (12.0, 1922),
+    }
+    # Dune is the catalog book the first user imported, now owned by both
+    with app.app_context():
+        assert (
+            db.session.scalar(
+                db.select(db.func.count()).select_from(Book).where(Book.title == "Dune")
+            )
+            == 1
+        )
+    assert "Ulysses" not in owned_books(app, "reader")
+
+
+def test_bulk_import_rejects_an_unknown_format(client):
+    response = client.post(
+        "/user_books/bulk?format=xlsx", data=b"", content_type="text/csv"
+    )
+    assert response.status_code == 400
+    assert response.get_json()["message"] == "Unsupported format: xlsx"
+
+
+@pytest.fixture
+def shared_book(app, client):
+    """Book 1 (Dune) owned by "reader" and "other", plus book 2 (Emma) owned by "reader"."""
+    with app.app_context():
+        db.session.add_all(
+            [
+                Book(
+                    id=1, title="Dune", author="Herbert", year_published=1965, price=9.5
+                ),
+                Book(id=2, title="Emma", author="Austen", year_published=1815, price=5),
+            ]
+        )
+        db.session.commit()
+    other = logged_in_client(app, "other")
+    for owner, book_id in ((client, 1), (client, 2), (other, 1)):
+        assert owner.post(f"/add_to_collection/{book_id}").status_code == 200
+    return other
+
+
+def changes_of(app, username):
+    """The ``(version, book_id)`` pairs logged for the user's collection."""
+    with app.app_context():
+        rows = db.session.execute(
+            db.select(UserBookChange.version, UserBookChange.book_id)
+            .join(User, User.id == UserBookChange.user_id)
+            .where(User.username == username)
+            .order_by(UserBookChange.version)
+        )
+        return [tuple(row) for row in rows]
+
+
+def test_add_to_collection(app, client, shared_book):
+    assert owned_books(app, "other") == {"Dune": (9.5, 1965)}
+    assert changes_of(app, "other") == [(1, 1)]
+
+    again = shared_book.post("/add_to_collection/1")
+    assert again.status_code == 400
+    assert shared_book.post("/add_to_collection/99").status_code == 404
+    # Nothing changed: no new version for the client to fetch
+    assert changes_of(app, "other") == [(1, 1)]
+
+
+def test_only_owners_update_and_delete_a_book(app, client, shared_book):
+    stranger = logged_in_client(app, "stranger")
+    assert stranger.put("/user_books/1", json={"price": 1}).status_code == 403
+    assert stranger.delete("/user_books/1").status_code == 403
+    assert client.put("/user_books/99", json={"price": 1}).status_code == 404
+    assert client.delete("/user_books/99").status_code == 404
+    assert owned_books(app, "reader")["Dune"] == (9.5, 1965)
+
+
+def test_update_propagates_to_every_owner(app, client, shared_book):
+    since = shared_book.get("/user_books?since=0").get_json()["version"]
+
+    response = client.put("/user_books/1", json={"price": 12, "year_published": 1966})
+
+    assert response.status_code == 200
+    # The sort fields of every owner's copy, and a change in every owner's log
+    assert owned_books(app, "reader")["Dune"] == (12, 1966)
+    assert owned_books(app, "other")["Dune"] == (12, 1966)
+    assert changes_of(app, "other")[-1] == (since + 1, 1)
+    delta = shared_book.get(f"/user_books?since={since}").get_json()
+    assert [(book["id"], book["price"]) for book in delta["books"]] == [(1, 12)]
+
+
+def test_renaming_a_book(app, client, shared_book):
+    # Other users own Dune: its title belongs to them too
+    response = client.put("/user_books/1", json={"title": "Dune Messiah"})
+    assert response.status_code == 403
+    assert owned_books(app, "other") == {"Dune": (9.5, 1965)}
+
+    # Emma is only in this collection, but can't take the name of another book
+    collision = client.put("/user_books/2", json={"title": "Dune", "author": "Herbert"})
+    assert collision.status_code == 409
+    assert owned_books(app, "reader")["Emma"] == (5, 1815)
+
+    assert client.put("/user_books/2", json={"title": "Persuasion"}).status_code == 200
+    assert "Persuasion" in owned_books(app, "reader")
+
+
+def test_delete_only_touches_the_owner_collection(app, client, shared_book):
+    since = client.get("/user_books?since=0").get_json()["version"]
+    other_changes = changes_of(app, "other")
+
+    assert client.delete("/user_books/1").status_code == 200
+
+    assert owned_books(app, "reader") == {"Emma": (5, 1815)}
+    assert owned_books(app, "other") == {"Dune": (9.5, 1965)}
+    assert changes_of(app, "other") == other_changes
+    delta = client.get(f"/user_books?since={since}").get_json()
+    assert (delta["books"], delta["deleted"]) == ([], [1])
+    assert client.delete("/user_books/1").status_code == 403
+
+
+def test_collection_delta_after_an_add_an_update_and_a_delete(app, client):
+    book = {"title": "Dune", "author": "Herbert", "year_published": 1965, "price": 9.5}
+    client.post("/user_books", json=book)
+    start = client.get("/user_books?since=0").get_json()
+    assert (start["full"], len(start["books"])) == (True, 1)
+
+    book["title"] = "Emma"
+    book_id = client.post("/user_books", json=book).get_json()["book_id"]
+    added = client.get(f"/user_books?since={start['version']}").get_json()
+    assert added["full"] is False
+    assert [(b["id"], b["title"]) for b in added["books"]] == [(book_id, "Emma")]
+
+    client.put(f"/user_books/{book_id}", json={"price": 11})
+    updated = client.get(f"/user_books?since={added['version']}").get_json()
+    assert [(b["id"], b["price"]) for b in updated["books"]] == [(book_id, 11)]
+    assert updated["deleted"] == []
+
+    client.delete(f"/user_books/{book_id}")
+    deleted = client.get(f"/user_books?since={updated['version']}").get_json()
+    assert (deleted["books"], deleted["deleted"]) == ([], [book_id])
+
+    # An old version gets every change after it, merged
+    old = client.get(f"/user_books?since={start['version']}").get_json()
+    assert (old["books"], old["deleted"], old["version"]) == (
+        [],
+        [book_id],
+        deleted["version"],
+    )
+    # Up to date: an empty delta
+    current = client.get(f"/user_books?since={deleted['version']}").get_json()
+    assert (current["books"], current["deleted"]) == ([], [])
+
+
+def test_unknown_or_invalid_since(app, client):
+    book = {"title": "Dune", "author": "Herbert", "year_published": 1965, "price": 9.5}
+    client.post("/user_books", json=book)
+
+    # A version from the future (e.g. a restored database): the whole collection
+    future = client.get("/user_books?since=99").get_json()
+    assert future["full"] is True
+    assert [b["title"] for b in future["books"]] == ["Dune"]
+    negative = client.get("/user_books?since=-1").get_json()
+    assert negative["full"] is True
+
+    response = client.get("/user_books?since=yesterday")
+    assert response.status_code == 400
+    assert response.get_json() == {"message": "since must be an integer"}
+
+
+def test_streamed_collection_matches_the_full_delta(app, client):
+    for index in range(3):
+        book = {
+            "title": f"Book {index}",
+            "author": "Author",
+            "year_published": 2000 + index,
+            "price": index,
+        }
+        client.post("/user_books", json=book)
+
+    streamed = client.get("/user_books?since=0&stream=1")
+    assert streamed.status_code == 200
+    assert streamed.is_streamed
+    assert (
+        json.loads(streamed.get_data(as_text=True))
+        == client.get("/user_books?since=0").get_json()
+    )
+    # The stream only applies to the full collection
+    delta = client.get("/user_books?since=1&stream=1").get_json()
+    assert delta["full"] is False
+
+
+def add_books(client, prices):
+    """Add a book per price to the client's collection; return their ids."""
+    return [
+        client.post(
+            "/user_books",
+            json={
+                "title": f"Book {index}",
+                "author": "Author",
+                "year_published": 2000 + index,
+                "price": price,
+            },
+        ).get_json()["book_id"]
+        for index, price in enumerate(prices)
+    ]
+
+
+def test_user_books_cursor_reaches_the_last_page(client):
+    ids = add_books(client, [5, 9, 7, 9, 5, 1])
+    path = "/user_books?sort_field=price&sort_direction=desc&price_min=2&limit=2"
+
+    pages, cursor = [], None
+    while True:
+        response = client.get(path + (f"&cursor={cursor}" if cursor else ""))
+        assert response.status_code == 200
+        page = response.get_json()
+        pages.append([book["id"] for book in page["books"]])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+
+    # Ties on the price are ordered by id (descending too); the filter holds on every page
+    assert pages == [[ids[3], ids[1]], [ids[2], ids[4]], [ids[0]]]
+
+    # A cursor only fits the ordering it came from
+    cursor = client.get(path).get_json()["next_cursor"]
+    other_sort = client.get(f"/user_books?sort_field=title&cursor={cursor}")
+    assert other_sort.status_code == 400
+    assert client.get("/user_books?cursor=garbage").status_code == 400
+
+
+def test_inventory_next_page_links_reach_the_last_page(client):
+    ids = add_books(client, [5, 9, 7, 1, 3])
+
+    seen, path = [], "/inventory?limit=2"
+    while path:
+        page = client.get(path).get_data(as_text=True)
+        seen += [
+            int(book_id) for book_id in re.findall(r"addToCollection\((\d+)\)", page)
+        ]
+        link = re.search(r'href="([^"]*cursor=[^"]*)"', page)
+        path = html.unescape(link.group(1)) if link else None
+
+    assert seen == sorted(ids)
+    assert client.get("/inventory?cursor=garbage").status_code == 400
+
+
+@pytest.fixture
+def searchable_catalog(app, monkeypatch):
+    with app.app_context():
+        db.session.add_all(
+            [
+                Book(
+                    id=1,
+                    title="Dune",
+                    author="Frank Herbert",
+                    year_published=1965,
+                    price=9.5,
+                    genres="Science Fiction",
+                ),
+                Book(
+                    id=2,
+                    title="Dune Messiah",
+                    author="Frank Herbert",
+                    year_published=1969,
+                    price=8,
+                    genres="Science Fiction",
+                ),
+                Book(
+                    id=3,
+                    title="Hyperion",
+                    author="Dan Simmons",
+                    year_published=1989,
+                    price=7,
+                    genres="Science Fiction",
+                ),
+                Book(
+                    id=4,
+                    title="Emma",
+                    author="Jane Austen",
+                    year_published=1815,
+                    price=5,
+                    genres="Romance",
+                ),
+            ]
+        )
+        db.session.commit()
+    # The index of an earlier test's database
+    monkeypatch.setattr(catalog_search, "_index", None)
+    monkeypatch.setattr(rag, "is_ready", lambda: False)
+    monkeypatch.setattr(rag, "warmup_in_background", lambda: None)
+
+
+def test_books_search(client, searchable_catalog):
+    assert client.get("/books/search").status_code == 400
+
+    response = client.get("/books/search?q=frank herbrt")
+    assert response.status_code == 200
+    books = response.get_json()["books"]
+    # A typo in the author still finds both of his books
+    assert {book["id"] for book in books} == {1, 2}
+    assert set(books[0]) == {
+        "id",
+        "title",
+        "author",
+        "year_published",
+        "price",
+        "genres",
+        "score",
+    }
+    assert books[0]["score"] >= books[1]["score"]
+
+
+def test_books_search_fuses_the_vector_results(client, searchable_catalog, monkeypatch):
+    monkeypatch.setattr(rag, "is_ready", lambda: True)
+    # Hyperion is similar in meaning only: no word in common with the query
+    monkeypatch.setattr(
+        rag,
+        "retrieve_books",
+        lambda query, k: [({"book_id": 3}, 0.9), ({"book_id": 1}, 0.8)],
+    )
+    books = client.get("/books/search?q=dune").get_json()["books"]
+    # Dune is first in both rankings; Hyperion, first in meaning, beats Dune
+    # Messiah, which is second in words only
+    assert [book["id"] for book in books] == [1, 3, 2]
+
+
+def test_books_search_pages(client, searchable_catalog):
+    ids, path = [], "/books/search?q=science fiction&limit=2"
+    cursor = None
+    while True:
+        page = client.get(path + (f"&cursor={cursor}" if cursor else "")).get_json()
+        ids += [book["id"] for book in page["books"]]
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+    assert sorted(ids) == [1, 2, 3]
+    assert len(set(ids)) == 3
+
+    # A cursor belongs to its query
+    first = client.get(path).get_json()["next_cursor"]
+    response = client.get(f"/books/search?q=romance&cursor={first}")
+    assert response.status_code == 400
@@ -0,0 +1,173 @@
+import os
+import threading
+from collections import namedtuple
+
+import pytest
+
+from langchain_community.embeddings import DeterministicFakeEmbedding
+from langchain_community.vectorstores import FAISS
+
+import rag
+from book_index import (
+    KEPT_VERSIONS,
+    EmbeddingMismatch,
+    check_embedding_id,
+    clone_vector_store,
+    current_index_path,
+    index_lock,
+    index_version,
+    load_manifest,
+    save_index,
+    sync_index,
+)
+
+Book = namedtuple("Book", ["id", "title", "author", "genres"])
+
+
+class CountingEmbeddings(DeterministicFakeEmbedding):
+    """Fake embeddings that remember how many texts were embedded."""
+
+    calls: list = []
+
+    def embed_documents(self, texts):
+        self.calls.append(len(texts))
+        return super().embed_documents(texts)
+
+
+def test_sync_index_only_embeds_changed_books(tmp_path):
+    embeddings = CountingEmbeddings(size=8, calls=[])
+    books = [Book(i, f"Book {i}", "Author", "Fiction") for i in range(1, 6)]
+
+    vector_store, stats = sync_index(None, {}, books, embeddings, batch_size=2)
+    assert stats == {"embedded": 5, "removed": 0, "indexed": 5}
+    assert embeddings.calls == [2, 2, 1]
+
+    # Nothing changed: nothing is embedded
+    manifest = {"books": {}}
+    vector_store, _ = sync_index(None, manifest, books, embeddings)
+    embeddings.calls.clear()
+    vector_store, stats = sync_index(vector_store, manifest, books, embeddings)
+    assert stats == {"embedded": 0, "removed": 0, "indexed": 5}
+    assert embeddings.calls == []
+
+    # Book 2 renamed, book 5 deleted, book 6 added
+    books[1] = Book(2, "Renamed", "Author", "Fiction")
+    catalog = books[:4] + [Book(6, "Book 6", "Author", None)]
+    vector_store, stats = sync_index(vector_store, manifest, catalog, embeddings)
+    assert stats == {"embedded": 2, "removed": 1, "indexed": 5}
+    assert embeddings.calls == [2]
+    titles = {doc.metadata["title"] for doc in vector_store.docstore._dict.values()}
+    assert titles == {"Book 1", "Renamed", "Book 3", "Book 4", "Book 6"}
+
+    save_index(vector_store, manifest, str(tmp_path / "index"))
+    assert load_manifest(str(tmp_path / "index")) == manifest
+    loaded = FAISS.load_local(
+        str(tmp_path / "index"), embeddings, allow_dangerous_deserialization=True
+    )
+    assert loaded.index.ntotal == 5
+
+
+def test_targeted_sync_leaves_the_original_store_untouched():
+    embeddings = DeterministicFakeEmbedding(size=8)
+    books = [Book(i, f"Book {i}", "Author", "Fiction") for i in range(1, 4)]
+    manifest = {}
+    vector_store, _ = sync_index(None, manifest, books, embeddings)
+
+    copy = clone_vector_store(vector_store)
+    # Only book 3 is checked: it no longer exists in the catalog
+    copy, stats = sync_index(copy, manifest, [], embeddings, book_ids=[3])
+    assert stats == {"embedded": 0, "removed": 1, "indexed": 2}
+    assert copy.index.ntotal == 2
+    assert vector_store.index.ntotal == 3
+
+
+def test_index_built_by_another_embedding_model_is_rejected(tmp_path):
+    embeddings = DeterministicFakeEmbedding(size=8)
+    books = [Book(1, "Book 1", "Author", "Fiction")]
+    manifest = {}
+    vector_store, _ = sync_index(None, manifest, books, embeddings)
+    index_path = str(tmp_path / "index")
+    save_index(vector_store, manifest, index_path, "local:some-model")
+
+    check_embedding_id(index_path, "local:some-model")
+    with pytest.raises(EmbeddingMismatch):
+        check_embedding_id(index_path, "openai:text-embedding-ada-002")
+
+
+def index_versions(tmp_path):
+    return sorted(name for name in os.listdir(tmp_path) if ".v-" in name)
+
+
+def test_save_index_swaps_versions_behind_a_symlink(tmp_path):
+    embeddings = DeterministicFakeEmbedding(size=8)
+    index_path = str(tmp_path / "index")
+    # An index saved as a plain directory becomes the first version
+    vector_store, _ = sync_index(None, {}, [Book(1, "Old", "A", None)], embeddings)
+    vector_store.save_local(index_path)
+
+    versions = []
+    for i in range(1, 5):
+        manifest = {}
+        books = [Book(j, f"Book {j}", "Author", None) for j in range(1, i + 1)]
+        vector_store, _ = sync_index(None, manifest, books, embeddings)
+        save_index(vector_store, manifest, index_path)
+        versions.append(index_version(index_path))
+
+        assert os.path.islink(index_path)
+        assert load_manifest(index_path) == manifest
+        assert len(index_versions(tmp_path)) <= KEPT_VERSIONS
+
+    assert len(set(versions)) == 4
+    loaded = FAISS.load_local(
+        current_index_path(index_path),
+        embeddings,
+        allow_dangerous_deserialization=True,
+    )
+    assert loaded.index.ntotal == 4
+
+
+def test_concurrent_saves_under_the_lock_all_succeed(tmp_path):
+    embeddings = DeterministicFakeEmbedding(size=8)
+    index_path = str(tmp_path / "index")
+    errors = []
+
+    def save(i):
+        try:
+            manifest = {}
+            vector_store, _ = sync_index(
+                None, manifest, [Book(i, f"Book {i}", "Author", None)], embeddings
+            )
+            with index_lock(index_path):
+                save_index(vector_store, manifest, index_path)
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=save, args=(i,)) for i in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert len(load_manifest(index_path)["books"]) == 1
+    assert len(index_versions(tmp_path)) == KEPT_VERSIONS
+
+
+def test_failed_sync_keeps_the_books_for_the_next_attempt(monkeypatch):
+    monkeypatch.setattr(rag, "SYNC_RETRY_DELAY", 0)
+    engine = rag.RecommenderEngine()
+    attempts = []
+
+    def sync_books(book_ids):
+        attempts.append(book_ids)
+        if len(attempts) == 1:
+            raise RuntimeError("embedding API down")
+
+    engine.sync_books = sync_books
+    engine.request_sync([3, 1])
+    thread = engine._sync_thread
+    if thread is not None:
+        thread.join(timeout=5)
+
+    assert attempts == [[1, 3], [1, 3]]
+    assert engine._pending_ids == set()
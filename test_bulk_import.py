@@ -0,0 +1,91 @@
+import io
+
+import pytest
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.orm import Session
+
+from app import Book, User, UserBooks, db
+from bulk_import import BulkImportError, iter_records, run_import, validate_record
+
+CSV_UPLOAD = b"""title,author,year_published,price,genres
+Dune,Frank Herbert,1965,9.99,Science Fiction
+Emma,Jane Austen,1815,4.50,
+,Nobody,2000,1.00,
+Dune,Frank Herbert,1965,9.99,Science Fiction
+Ulysses,James Joyce,not a year,12.00,
+"""
+
+
+@pytest.fixture
+def session():
+    engine = create_engine("sqlite://")
+    db.metadata.create_all(engine)
+    with Session(engine) as session:
+        session.add(User(id=1, username="reader", password_hash="x"))
+        session.commit()
+        yield session
+
+
+def import_bytes(session, data, fmt, chunk_size=2):
+    records = iter_records(io.BytesIO(data), fmt)
+    return run_import(session, Book, UserBooks, 1, records, chunk_size=chunk_size)
+
+
+def test_csv_import_reports_row_errors(session):
+    report = import_bytes(session, CSV_UPLOAD, "csv")
+
+    assert report["total"] == 5
+    assert report["added"] == 2
+    assert report["already_owned"] == 1  # the second Dune row
+    assert [error["row"] for error in report["errors"]] == [3, 5]
+    assert session.scalar(select(func.count()).select_from(Book)) == 2
+
+
+def test_import_is_idempotent_and_reuses_catalog_books(session):
+    session.add(Book(title="Emma", author="Jane Austen", year_published=1815, price=3))
+    session.commit()
+
+    import_bytes(session, CSV_UPLOAD, "csv")
+    report = import_bytes(session, CSV_UPLOAD, "csv")
+
+    assert report["added"] == 0
+    assert report["already_owned"] == 3
+    assert session.scalar(select(func.count()).select_from(Book)) == 2
+    assert session.scalar(select(func.count()).select_from(UserBooks)) == 2
+
+
+def test_jsonl_import(session):
+    data = (
+        b'{"title": "Dune", "author": "Frank Herbert", "year_published": 1965, "price": 9}\n'
+        b"\n"
+        b"not json\n"
+        b'{"title": "Emma", "author": "Jane Austen", "year_published": 1815, "price": 4}\n'
+    )
+    report = import_bytes(session, data, "jsonl")
+
+    assert report["added"] == 2
+    assert report["errors"][0]["row"] == 3
+
+
+def test_csv_without_required_columns_is_rejected(session):
+    with pytest.raises(BulkImportError):
+        import_bytes(session, b"name,price\nDune,9\n", "csv")
+
+
+@pytest.mark.parametrize(
+    "price, year, error",
+    [
+        ("nan", 2000, "price must be a finite number"),
+        ("inf", 2000, "price must be a finite number"),
+        ("-inf", 2000, "price must be a finite number"),
+        (1.0, float("inf"), "year_published must be an integer"),
+    ],
+)
+def test_non_finite_numbers_are_rejected(price, year, error):
+    record = {
+        "title": "Dune",
+        "author": "Herbert",
+        "price": price,
+        "year_published": year,
+    }
+    assert validate_record(record) == (None, error)
@@ -0,0 +1,231 @@
+from collections import namedtuple
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import insert, text
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from app import Book as BookModel
+from catalog_search import (
+    FULL_TEXT_QUERY,
+    FUZZY_DOCUMENT,
+    FUZZY_QUERY,
+    SEARCH_DOCUMENT,
+    CatalogSearch,
+    InvertedIndex,
+    reciprocal_rank_fusion,
+    tokenize,
+)
+
+Book = namedtuple("Book", ["id", "title", "author", "genres"])
+
+
+def build_index():
+    index = InvertedIndex()
+    index.add(1, "Harry Potter and the Philosopher's Stone", "J.K. Rowling", "Fantasy")
+    index.add(2, "The Hobbit", "J.R.R. Tolkien", "Fantasy")
+    index.add(3, "Dune", "Frank Herbert", "Science Fiction")
+    index.add(4, "Cien años de soledad", "Gabriel García Márquez", "Fiction")
+    return index
+
+
+def test_tokenize_drops_case_and_accents():
+    assert tokenize("Cien Años, de SOLEDAD") == ["cien", "anos", "de", "soledad"]
+
+
+def test_inverted_index_ranks_matching_books():
+    index = build_index()
+    assert [book_id for book_id, _ in index.search("tolkien hobbit", 10)] == [2]
+    assert {book_id for book_id, _ in index.search("fantasy", 10)} == {1, 2}
+    assert index.search("garcia marquez", 10)[0][0] == 4
+
+
+def test_inverted_index_tolerates_typos():
+    index = build_index()
+    assert index.search("hary poter", 10)[0][0] == 1
+    assert index.search("herbret dune", 10)[0][0] == 3
+
+
+def test_removed_and_updated_books_leave_the_index():
+    index = build_index()
+    index.remove(3)
+    assert index.search("dune", 10) == []
+
+    index.add(2, "The Silmarillion", "J.R.R. Tolkien", "Fantasy")
+    assert index.search("hobbit", 10) == []
+    assert index.search("silmarillion", 10)[0][0] == 2
+    assert len(index) == 3
+
+
+def test_reciprocal_rank_fusion_rewards_agreement():
+    fused = reciprocal_rank_fusion([[1, 2, 3], [3, 1], [4]])
+    assert [book_id for book_id, _ in fused] == [1, 3, 4, 2]
+
+
+class FakeCatalog:
+    """The catalog table, its version and change log, as seen by every process."""
+
+    def __init__(self):
+        self.books = {1: Book(1, "Dune", "Frank Herbert", "Science Fiction")}
+        self.version = 1
+        self.log = {}  # version -> changed book ids
+        self.reads = []
+
+    def __call__(self, book_ids=None):
+        self.reads.append(None if book_ids is None else sorted(book_ids))
+        if book_ids is None:
+            return list(self.books.values())
+        return [self.books[i] for i in book_ids if i in self.books]
+
+    def add(self, book):
+        self.books[book.id] = book
+        self.version += 1
+        self.log[self.version] = {book.id}
+
+    def changes(self, since, version):
+        return {
+            book_id
+            for logged, book_ids in self.log.items()
+            if since < logged <= version
+            for book_id in book_ids
+        }
+
+
+def catalog_search(catalog, changes=True):
+    sqlite = SimpleNamespace(
+        engine=SimpleNamespace(dialect=SimpleNamespace(name="sqlite"))
+    )
+    return CatalogSearch(
+        sqlite,
+        catalog,
+        version=lambda: catalog.version,
+        changes=catalog.changes if changes else None,
+    )
+
+
+def test_books_added_by_other_processes_become_searchable():
+    catalog = FakeCatalog()
+    search = catalog_search(catalog)
+    assert [book_id for book_id, _ in search.search("dune", 10)] == [1]
+
+    # Added through other workers: only the changed books are read
+    catalog.add(Book(2, "Hyperion", "Dan Simmons", "Science Fiction"))
+    catalog.add(Book(3, "Solaris", "Stanislaw Lem", "Science Fiction"))
+    assert [book_id for book_id, _ in search.search("hyperion", 10)] == [2]
+    assert [book_id for book_id, _ in search.search("solaris", 10)] == [3]
+    assert catalog.reads == [None, [2, 3]]
+
+    # Nothing changed: the index isn't touched
+    search.search("dune", 10)
+    assert len(catalog.reads) == 2
+
+
+def test_changed_books_are_reindexed():
+    catalog = FakeCatalog()
+    search = catalog_search(catalog)
+    search.search("dune", 10)
+
+    catalog.add(Book(1, "Dune Messiah", "Frank Herbert", "Science Fiction"))
+    search.refresh()
+    assert [book_id for book_id, _ in search.search("messiah", 10)] == [1]
+    assert catalog.reads == [None, [1]]
+
+
+def test_without_a_change_log_the_index_is_rebuilt():
+    catalog = FakeCatalog()
+    search = catalog_search(catalog, changes=False)
+    search.search("dune", 10)
+
+    catalog.add(Book(2, "Hyperion", "Dan Simmons", "Science Fiction"))
+    assert [book_id for book_id, _ in search.search("hyperion", 10)] == [2]
+    assert catalog.reads == [None, None]
+
+
+def test_searches_dont_wait_for_another_thread_catching_up():
+    catalog = FakeCatalog()
+    search = catalog_search(catalog)
+    search.search("dune", 10)
+    catalog.add(Book(2, "Hyperion", "Dan Simmons", "Science Fiction"))
+
+    # Another thread holds the lock while it applies the changes
+    with search._lock:
+        assert [book_id for book_id, _ in search.search("dune", 10)] == [1]
+        assert search.search("hyperion", 10) == []
+    assert [book_id for book_id, _ in search.search("hyperion", 10)] == [2]
+
+
+# Same indexes as migration 9e4b1d7c3a52 (create_all doesn't make them)
+SEARCH_INDEX = f"CREATE INDEX ix_book_search ON book USING gin ({SEARCH_DOCUMENT})"
+FUZZY_INDEX = (
+    "CREATE INDEX ix_book_title_author_trgm ON book "
+    f"USING gin (({FUZZY_DOCUMENT}) gin_trgm_ops)"
+)
+
+
+@pytest.fixture
+def postgres_catalog(postgres_engine):
+    """A CatalogSearch on the SQL path, over a few books in PostgreSQL."""
+    with Session(postgres_engine) as session:
+        session.execute(
+            insert(BookModel),
+            [
+                {
+                    "id": book_id,
+                    "title": title,
+                    "author": author,
+                    "year_published": 1965,
+                    "price": 9.5,
+                }
+                for book_id, title, author in [
+                    (1, "The Hobbit", "J.R.R. Tolkien"),
+                    (2, "Hyperion", "Dan Simmons"),
+                    (3, "Dune", "Frank Herbert"),
+                    (4, "Dune Messiah", "Frank Herbert"),
+                ]
+            ],
+        )
+        session.execute(text(SEARCH_INDEX))
+        session.commit()
+        db = SimpleNamespace(engine=postgres_engine, session=session)
+        yield CatalogSearch(db, catalog=pytest.fail)
+
+
+def uses_index(session, query, params, index):
+    # Tiny table: forbid the sequential scan to see whether the index fits the query
+    session.execute(text("SET LOCAL enable_seqscan = off"))
+    plan = session.execute(text(f"EXPLAIN {query.text}"), params).scalars().all()
+    session.rollback()
+    return index in " ".join(plan)
+
+
+@pytest.mark.postgres
+def test_full_text_query_on_postgres(postgres_catalog):
+    session = postgres_catalog._db.session
+    params = {"query": "herbert dune", "limit": 10}
+    assert session.execute(FULL_TEXT_QUERY, params).scalars().all() == [3, 4]
+    # websearch_to_tsquery syntax: "-word" excludes the books with it
+    params["query"] = "herbert -messiah"
+    assert session.execute(FULL_TEXT_QUERY, params).scalars().all() == [3]
+    assert uses_index(session, FULL_TEXT_QUERY, params, "ix_book_search")
+
+
+@pytest.mark.postgres
+def test_fuzzy_query_on_postgres(postgres_catalog):
+    session = postgres_catalog._db.session
+    try:
+        session.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+        session.execute(text(FUZZY_INDEX))
+        session.commit()
+    except SQLAlchemyError:
+        session.rollback()
+        pytest.skip("pg_trgm is not available on this server")
+
+    # A typo: no full-text match, the trigram query finds the books anyway
+    params = {"query": "frank herbrt", "limit": 10}
+    assert session.execute(FULL_TEXT_QUERY, params).scalars().all() == []
+    assert set(session.execute(FUZZY_QUERY, params).scalars().all()) == {3, 4}
+    assert uses_index(session, FUZZY_QUERY, params, "ix_book_title_author_trgm")
+
+    results = postgres_catalog.search("frank herbrt", 10)
+    assert {book_id for book_id, _ in results} == {3, 4}
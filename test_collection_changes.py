@@ -0,0 +1,83 @@
+import pytest
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import Session
+
+from app import Book, BookChange, CatalogVersion, User, UserBookChange, UserBooks, db
+from collection_changes import (
+    bump_catalog_version,
+    catalog_version,
+    changed_book_ids,
+    changed_catalog_ids,
+    collection_version,
+    record_changes,
+)
+
+
+@pytest.fixture
+def session():
+    engine = create_engine("sqlite://")
+    db.metadata.create_all(engine)
+    with Session(engine) as session:
+        session.add_all(
+            [
+                User(id=1, username="reader", password_hash="x"),
+                User(id=2, username="other", password_hash="x"),
+                Book(
+                    id=1,
+                    title="Dune",
+                    author="Frank Herbert",
+                    year_published=1965,
+                    price=9,
+                ),
+                Book(
+                    id=2,
+                    title="Emma",
+                    author="Jane Austen",
+                    year_published=1815,
+                    price=4,
+                ),
+            ]
+        )
+        session.flush()
+        session.add_all(
+            [
+                UserBooks(user_id=1, book_id=1, price=9, year_published=1965),
+                UserBooks(user_id=2, book_id=1, price=9, year_published=1965),
+            ]
+        )
+        session.commit()
+        yield session
+
+
+def test_each_change_bumps_the_version(session):
+    assert record_changes(session, User, UserBookChange, [1], [1, 2]) == {1: 1}
+    assert record_changes(session, User, UserBookChange, [1], [2]) == {1: 2}
+    session.commit()
+
+    assert collection_version(session, User, 1) == 2
+    assert collection_version(session, User, 2) == 0
+    assert changed_book_ids(session, UserBookChange, 1, 0, 2) == {1, 2}
+    assert changed_book_ids(session, UserBookChange, 1, 1, 2) == {2}
+    assert changed_book_ids(session, UserBookChange, 1, 2, 2) == set()
+
+
+def test_shared_book_change_is_logged_for_every_owner(session):
+    owners = select(UserBooks.user_id).where(UserBooks.book_id == 1)
+    assert record_changes(session, User, UserBookChange, owners, [1]) == {1: 1, 2: 1}
+    assert changed_book_ids(session, UserBookChange, 2, 0, 1) == {1}
+
+
+def test_nothing_to_log(session):
+    assert record_changes(session, User, UserBookChange, [1], []) == {}
+    assert collection_version(session, User, 1) == 0
+
+
+def test_catalog_changes_are_logged_per_version(session):
+    assert bump_catalog_version(session, CatalogVersion, BookChange, [1, 2]) == 1
+    assert bump_catalog_version(session, CatalogVersion, BookChange, [2]) == 2
+    session.commit()
+
+    assert catalog_version(session, CatalogVersion) == 2
+    assert changed_catalog_ids(session, BookChange, 0, 2) == {1, 2}
+    assert changed_catalog_ids(session, BookChange, 1, 2) == {2}
+    assert changed_catalog_ids(session, BookChange, 2, 2) == set()
@@ -0,0 +1,128 @@
+import importlib
+
+import pytest
+from sqlalchemy.pool import StaticPool
+
+import config
+import rag
+from app import create_app, warm_up
+
+
+@pytest.fixture
+def env_config(monkeypatch):
+    """Re-read config.py under the environment set by the test."""
+
+    def load(**environ):
+        for name, value in environ.items():
+            monkeypatch.setenv(name, value)
+        return vars(importlib.reload(config).Config)
+
+    yield load
+    monkeypatch.undo()
+    importlib.reload(config)
+
+
+def test_create_app_requires_a_secret_key():
+    with pytest.raises(RuntimeError, match="SECRET_KEY"):
+        create_app({"SECRET_KEY": None, "SQLALCHEMY_DATABASE_URI": "sqlite://"})
+
+
+@pytest.mark.parametrize("mode", ["TESTING", "DEBUG"])
+def test_debug_and_testing_apps_get_a_random_secret_key(mode):
+    apps = [
+        create_app(
+            {mode: True, "SECRET_KEY": "", "SQLALCHEMY_DATABASE_URI": "sqlite://"}
+        )
+        for _ in range(2)
+    ]
+    keys = [app.config["SECRET_KEY"] for app in apps]
+    assert all(keys) and keys[0] != keys[1]
+
+
+def test_create_app_applies_the_given_settings():
+    app = create_app(
+        {
+            "TESTING": True,
+            "SECRET_KEY": "test",
+            "SQLALCHEMY_DATABASE_URI": "sqlite://",
+            "SQLALCHEMY_ENGINE_OPTIONS": {"poolclass": StaticPool},
+        }
+    )
+    assert app.config["SECRET_KEY"] == "test"
+    assert app.config["SQLALCHEMY_ENGINE_OPTIONS"] == {"poolclass": StaticPool}
+    assert "store.inventory" in app.view_functions
+
+
+def test_postgres_pool_options_come_from_the_environment(env_config):
+    settings = env_config(
+        DATABASE_URL="postgresql://reader@localhost/book_store",
+        DB_POOL_SIZE="3",
+        DB_MAX_OVERFLOW="1",
+        DB_POOL_TIMEOUT="5",
+        DB_POOL_RECYCLE="600",
+        DB_STATEMENT_TIMEOUT_MS="2500",
+    )
+    assert config.engine_options(settings) == {
+        "pool_size": 3,
+        "max_overflow": 1,
+        "pool_timeout": 5,
+        "pool_recycle": 600,
+        "pool_pre_ping": True,
+        "connect_args": {"options": "-c statement_timeout=2500"},
+    }
+
+
+def test_statement_timeout_can_be_disabled(env_config):
+    settings = env_config(
+        DATABASE_URL="postgresql://reader@localhost/book_store",
+        DB_STATEMENT_TIMEOUT_MS="0",
+    )
+    assert "connect_args" not in config.engine_options(settings)
+    assert config.engine_options(settings)["pool_size"] == 8
+
+
+def test_sqlite_keeps_the_default_pool(env_config):
+    settings = env_config(DATABASE_URL="sqlite:///books.db", DB_POOL_SIZE="3")
+    assert config.engine_options(settings) == {}
+
+
+def test_create_app_builds_the_engine_options():
+    app = create_app(
+        {
+            "TESTING": True,
+            "SQLALCHEMY_DATABASE_URI": "postgresql://reader@localhost/book_store",
+            "DB_POOL_SIZE": 3,
+            "DB_STATEMENT_TIMEOUT_MS": 0,
+        }
+    )
+    options = app.config["SQLALCHEMY_ENGINE_OPTIONS"]
+    assert options["pool_size"] == 3 and options["pool_pre_ping"] is True
+    assert "connect_args" not in options
+
+
+def test_warm_up_leaves_the_recommender_to_a_background_thread(monkeypatch):
+    app = create_app(
+        {
+            "TESTING": True,
+            "SECRET_KEY": "test",
+            "SQLALCHEMY_DATABASE_URI": "sqlite://",
+            "SQLALCHEMY_ENGINE_OPTIONS": {"poolclass": StaticPool},
+        }
+    )
+    calls = []
+    monkeypatch.setattr(rag, "warmup", lambda: calls.append("warmup"))
+    monkeypatch.setattr(
+        rag, "warmup_in_background", lambda: calls.append("warmup_in_background")
+    )
+    # gunicorn's post_worker_init: nothing here may build the FAISS index
+    warm_up(app)
+    assert calls == ["warmup_in_background"]
+
+
+def test_build_index_command(monkeypatch):
+    app = create_app({"TESTING": True, "SQLALCHEMY_DATABASE_URI": "sqlite://"})
+    calls = []
+    monkeypatch.setattr(rag, "warmup", lambda: calls.append("warmup"))
+    result = app.test_cli_runner().invoke(args=["build-index"])
+    assert result.exit_code == 0
+    assert calls == ["warmup"]
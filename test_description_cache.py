@@ -0,0 +1,135 @@
+from description_cache import DescriptionCache, normalize_key
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+# Persisted tier kept in a dict instead of the book_description table
+class DictStore:
+    def __init__(self):
+        self.rows = {}
+
+    def load(self, key):
+        return self.rows.get(key)
+
+    def save(self, key, title, author, description):
+        self.rows[key] = (description, clock())
+
+    def delete(self, key):
+        self.rows.pop(key, None)
+
+
+clock = FakeClock()
+
+
+def test_normalize_key_ignores_case_and_spacing():
+    assert normalize_key("  The  Hobbit ", "J.R.R. TOLKIEN") == normalize_key(
+        "the hobbit", "j.r.r. tolkien"
+    )
+
+
+def test_get_or_fetch_calls_llm_once():
+    calls = []
+
+    def fetch(title, author):
+        calls.append((title, author))
+        return "A hobbit goes on an adventure."
+
+    cache = DescriptionCache(DictStore(), clock=clock)
+    for _ in range(3):
+        assert cache.get_or_fetch("The Hobbit", "Tolkien", fetch).startswith("A hobbit")
+    assert len(calls) == 1
+
+
+def test_persisted_tier_survives_memory_eviction():
+    store = DictStore()
+    cache = DescriptionCache(store, maxsize=1, clock=clock)
+    cache.set("Book A", "Author", "desc A")
+    cache.set("Book B", "Author", "desc B")  # evicts Book A from memory
+
+    assert cache.get("Book A", "Author") == "desc A"
+    assert cache.store_hits == 1
+
+
+def test_expired_and_fallback_entries_are_refetched():
+    store = DictStore()
+    cache = DescriptionCache(store, ttl=60, clock=clock)
+    cache.get_or_fetch("Dune", "Herbert", lambda t, a: "n/a", fallback="n/a")
+    assert store.rows == {}
+
+    cache.set("Dune", "Herbert", "Spice.")
+    clock.now += 61
+    assert cache.get("Dune", "Herbert") is None
+
+
+def test_invalidate_removes_both_tiers():
+    store = DictStore()
+    cache = DescriptionCache(store, clock=clock)
+    cache.set("Dune", "Herbert", "Spice.")
+    cache.invalidate("Dune", "Herbert")
+    assert cache.get("Dune", "Herbert") is None
+    assert store.rows == {}
+
+
+def test_invalidation_by_another_process_expires_from_memory():
+    store = DictStore()
+    worker_a = DescriptionCache(store, memory_ttl=60, clock=clock)
+    worker_b = DescriptionCache(store, memory_ttl=60, clock=clock)
+    worker_a.set("Dune", "Herbert", "Spice.")
+    assert worker_b.get("Dune", "Herbert") == "Spice."
+
+    worker_a.invalidate("Dune", "Herbert")
+    clock.now += 61
+    assert worker_b.get("Dune", "Herbert") is None
+
+
+class CountingStore(DictStore):
+    """Counts the loads, i.e. the round trips to the book_description table."""
+
+    def __init__(self):
+        super().__init__()
+        self.loads = 0
+
+    def load(self, key):
+        self.loads += 1
+        return super().load(key)
+
+
+def test_job_regenerates_a_description_invalidated_by_another_process():
+    store = DictStore()
+    web = DescriptionCache(store, clock=clock)
+    job_worker = DescriptionCache(store, clock=clock)
+    job_worker.get_or_fetch("Dune", "Herbert", lambda title, author: "v1")
+
+    web.invalidate("Dune", "Herbert")
+    calls = []
+
+    def fetch(title, author):
+        calls.append(title)
+        return "v2"
+
+    # The worker's memory still has v1: a refresh only trusts the store
+    description = job_worker.get_or_fetch("Dune", "Herbert", fetch, refresh=True)
+    assert description == "v2"
+    assert calls == ["Dune"]
+    assert store.rows[normalize_key("Dune", "Herbert")][0] == "v2"
+
+
+def test_memory_hits_skip_the_store():
+    store = CountingStore()
+    cache = DescriptionCache(store, ttl=3600, memory_ttl=7200, clock=clock)
+    cache.set("Dune", "Herbert", "Spice.")
+    for _ in range(3):
+        assert cache.get("Dune", "Herbert") == "Spice."
+    assert store.loads == 0
+
+    # A refresh reads the store; the copy still expires with the stored row
+    assert cache.get("Dune", "Herbert", refresh=True) == "Spice."
+    assert store.loads == 1
+    clock.now += 3601
+    assert cache.get("Dune", "Herbert") is None
@@ -0,0 +1,44 @@
+from langchain_community.embeddings import DeterministicFakeEmbedding
+
+from embedding_cache import CachedEmbeddings, SQLiteEmbeddingStore
+
+
+class CountingEmbeddings(DeterministicFakeEmbedding):
+    """Fake embeddings that remember the batches they were asked to embed."""
+
+    calls: list = []
+
+    def embed_documents(self, texts):
+        self.calls.append(list(texts))
+        return super().embed_documents(texts)
+
+
+def test_cached_embeddings_only_embed_new_texts(tmp_path):
+    model = CountingEmbeddings(size=8, calls=[])
+    path = str(tmp_path / "embeddings.sqlite3")
+    embeddings = CachedEmbeddings(
+        model, SQLiteEmbeddingStore(path), "fake", batch_size=2
+    )
+
+    first = embeddings.embed_documents(["a", "b", "c", "a"])
+    # "a" is embedded once; misses go out two at a time
+    assert model.calls == [["a", "b"], ["c"]]
+    assert first[0] == first[3]
+
+    # A new process (new store on the same file) only pays for the new text
+    model.calls.clear()
+    embeddings = CachedEmbeddings(model, SQLiteEmbeddingStore(path), "fake")
+    second = embeddings.embed_documents(["b", "d", "a"])
+    assert model.calls == [["d"]]
+    assert second[0] == first[1]
+    assert embeddings.stats()["hits"] == 2
+
+
+def test_cache_keys_include_the_model_name():
+    model = CountingEmbeddings(size=8, calls=[])
+    store = SQLiteEmbeddingStore(":memory:")
+
+    CachedEmbeddings(model, store, "model-a").embed_documents(["same text"])
+    CachedEmbeddings(model, store, "model-b").embed_documents(["same text"])
+    assert len(model.calls) == 2
+    assert len(store) == 2
@@ -0,0 +1,105 @@
+import json
+from collections import namedtuple
+from unittest.mock import patch, MagicMock
+
+import httpx
+import openai
+
+from enrich_descriptions import DescriptionEnricher
+from get_bookDescription import generate_book_description
+
+Book = namedtuple("Book", ["id", "title", "author"])
+
+
+def mock_response(content):
+    response = MagicMock()
+    response.choices = [MagicMock()]
+    response.choices[0].message.content = content
+    return response
+
+
+# Mock the API call so the enrichment pipeline runs without the network
+@patch("get_bookDescription.client.chat.completions.create")
+def test_enricher_saves_descriptions_and_checkpoint(mock_completion, tmp_path):
+    mock_completion.return_value = mock_response("Mocked description")
+    saved = {}
+    checkpoint_path = tmp_path / "checkpoint.json"
+
+    enricher = DescriptionEnricher(
+        generate_book_description,
+        lambda book, description: saved.update({book.id: description}),
+        concurrency=2,
+        checkpoint_path=str(checkpoint_path),
+    )
+    batches = [
+        [Book(1, "Book 1", "Author"), Book(2, "Book 2", "Author")],
+        [Book(5, "Book 5", "Author")],
+    ]
+    enricher.run(batches)
+
+    assert saved == {
+        1: "Mocked description",
+        2: "Mocked description",
+        5: "Mocked description",
+    }
+    checkpoint = json.loads(checkpoint_path.read_text())
+    assert checkpoint["last_book_id"] == 5
+    assert checkpoint["done"] == 3
+
+
+@patch("get_bookDescription.client.chat.completions.create")
+def test_enricher_retries_transient_errors(mock_completion, tmp_path):
+    request = httpx.Request("POST", "https://api.openai.com/v1/chat/completions")
+    mock_completion.side_effect = [
+        openai.APIConnectionError(request=request),
+        mock_response("Second time lucky"),
+    ]
+    saved = {}
+    sleeps = []
+
+    enricher = DescriptionEnricher(
+        # As in main(): no gateway retries, the enricher's loop does the retrying
+        lambda title, author: generate_book_description(title, author, max_retries=0),
+        lambda book, description: saved.update({book.id: description}),
+        checkpoint_path=str(tmp_path / "checkpoint.json"),
+        base_delay=1.0,
+        sleep=sleeps.append,
+    )
+    checkpoint = enricher.run([[Book(1, "Book 1", "Author")]])
+
+    assert saved == {1: "Second time lucky"}
+    assert checkpoint["failed"] == []
+    assert mock_completion.call_count == 2
+    # One backoff (full jitter, at most base_delay) between the two attempts
+    assert len(sleeps) == 1
+    assert 0 <= sleeps[0] <= 1.0
+
+
+def test_enricher_retries_the_books_that_failed_before(tmp_path):
+    checkpoint_path = tmp_path / "checkpoint.json"
+    checkpoint_path.write_text(
+        json.dumps({"last_book_id": 5, "done": 3, "failed": [2, 4]})
+    )
+    saved = {}
+
+    def generate(title, author):
+        if title == "Book 4":
+            raise ValueError("still no luck")
+        return f"About {title}"
+
+    enricher = DescriptionEnricher(
+        generate,
+        lambda book, description: saved.update({book.id: description}),
+        checkpoint_path=str(checkpoint_path),
+    )
+    # The failed books first (see failed_description_batches), then the new ones
+    checkpoint = enricher.run(
+        [
+            [Book(2, "Book 2", "Author"), Book(4, "Book 4", "Author")],
+            [Book(7, "Book 7", "Author")],
+        ]
+    )
+
+    assert saved == {2: "About Book 2", 7: "About Book 7"}
+    assert checkpoint == {"last_book_id": 7, "done": 5, "failed": [4]}
+    assert json.loads(checkpoint_path.read_text()) == checkpoint
@@ -0,0 +1,54 @@
+from flask import Flask, jsonify
+
+from http_cache import conditional
+
+calls = []
+versions = {"books": 1}
+
+
+def make_app():
+    app = Flask(__name__)
+
+    @app.route("/books")
+    @conditional(lambda: (versions["books"],))
+    def books():
+        calls.append("books")
+        return jsonify({"version": versions["books"]})
+
+    @app.route("/missing")
+    @conditional(lambda: (versions["books"],))
+    def missing():
+        return jsonify({"message": "Not found"}), 404
+
+    return app
+
+
+def test_matching_etag_skips_the_view():
+    client = make_app().test_client()
+    calls.clear()
+
+    response = client.get("/books")
+    etag = response.headers["ETag"]
+    assert response.headers["Cache-Control"] == "private, no-cache"
+
+    response = client.get("/books", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.headers["ETag"] == etag
+    assert calls == ["books"]
+
+
+def test_etag_changes_with_the_version_and_the_query():
+    client = make_app().test_client()
+    etag = client.get("/books").headers["ETag"]
+
+    assert (
+        client.get("/books?page=2", headers={"If-None-Match": etag}).status_code == 200
+    )
+    versions["books"] += 1
+    assert client.get("/books", headers={"If-None-Match": etag}).status_code == 200
+
+
+def test_errors_get_no_etag():
+    response = make_app().test_client().get("/missing")
+    assert response.status_code == 404
+    assert "ETag" not in response.headers
@@ -0,0 +1,265 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.pool import StaticPool
+
+from app import Job
+from job_queue import (
+    BACKGROUND_PRIORITY,
+    DONE,
+    FAILED,
+    INTERACTIVE_PRIORITY,
+    QUEUED,
+    RUNNING,
+    JobQueue,
+    Worker,
+)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = datetime(2026, 1, 1)
+
+    def __call__(self):
+        return self.now
+
+    def advance(self, seconds):
+        self.now += timedelta(seconds=seconds)
+
+
+def make_queue(**kwargs):
+    engine = create_engine(
+        "sqlite://",
+        poolclass=StaticPool,
+        connect_args={"check_same_thread": False},
+    )
+    Job.__table__.create(engine)
+    clock = FakeClock()
+    queue = JobQueue(
+        SimpleNamespace(engine=engine), Job, clock=clock, retry_delay=0, **kwargs
+    )
+    return queue, clock
+
+
+def test_pending_jobs_with_the_same_key_are_shared():
+    queue, _ = make_queue()
+    first = queue.enqueue("description", {"book_id": 1}, dedupe_key="description:1")
+    second = queue.enqueue("description", {"book_id": 1}, dedupe_key="description:1")
+    other = queue.enqueue("description", {"book_id": 2}, dedupe_key="description:2")
+
+    assert first == second
+    assert other != first
+    assert queue.stats()[QUEUED] == 2
+
+
+def test_an_interactive_request_promotes_a_queued_background_job():
+    queue, _ = make_queue()
+    batch = [
+        queue.enqueue(
+            "description", {"book_id": book_id}, dedupe_key=f"description:{book_id}"
+        )
+        for book_id in (1, 2, 3)
+    ]
+
+    # A visitor opens book 3 while the batch is still queued
+    visited = queue.enqueue(
+        "description",
+        {"book_id": 3},
+        priority=INTERACTIVE_PRIORITY,
+        dedupe_key="description:3",
+    )
+    # Queuing the batch again doesn't demote it
+    queue.enqueue("description", {"book_id": 3}, dedupe_key="description:3")
+
+    assert visited == batch[2]
+    assert [queue.claim()["id"] for _ in range(3)] == [batch[2], batch[0], batch[1]]
+
+
+def test_finished_job_does_not_block_a_new_one():
+    queue, _ = make_queue()
+    first = queue.enqueue("description", {"book_id": 1}, dedupe_key="description:1")
+    queue.complete(queue.claim(), {"description": "A story"})
+
+    second = queue.enqueue("description", {"book_id": 1}, dedupe_key="description:1")
+
+    assert second != first
+    assert queue.get(first)["result"] == {"description": "A story"}
+
+
+def test_claim_takes_the_highest_priority_then_the_oldest():
+    queue, _ = make_queue()
+    batch = queue.enqueue("description", {"book_id": 1}, priority=BACKGROUND_PRIORITY)
+    first = queue.enqueue("description", {"book_id": 2}, priority=INTERACTIVE_PRIORITY)
+    second = queue.enqueue("recommendation", {"query": "x"}, INTERACTIVE_PRIORITY)
+
+    assert [queue.claim()["id"] for _ in range(3)] == [first, second, batch]
+    assert queue.claim() is None
+
+
+def test_claim_filters_by_kind():
+    queue, _ = make_queue()
+    queue.enqueue("recommendation", {"query": "x"}, priority=INTERACTIVE_PRIORITY)
+    description = queue.enqueue("description", {"book_id": 1})
+
+    job = queue.claim(["description"])
+
+    assert job["id"] == description
+    assert job["payload"] == {"book_id": 1}
+    assert queue.claim(["description"]) is None
+
+
+def test_job_is_claimed_again_after_the_visibility_timeout():
+    queue, clock = make_queue(visibility_timeout=30)
+    job_id = queue.enqueue("description", {"book_id": 1})
+    assert queue.claim()["attempts"] == 1
+
+    clock.advance(10)
+    assert queue.claim() is None
+
+    clock.advance(30)
+    job = queue.claim()
+    assert job["id"] == job_id
+    assert job["attempts"] == 2
+    assert queue.get(job_id)["status"] == RUNNING
+
+
+def test_a_late_worker_cannot_overwrite_the_new_attempt():
+    queue, clock = make_queue(visibility_timeout=30)
+    job_id = queue.enqueue("description", {"book_id": 1})
+    stuck = queue.claim()
+
+    clock.advance(31)
+    retry = queue.claim()
+    assert retry["id"] == job_id
+
+    # The first worker wakes up after the job was claimed again
+    assert not queue.complete(stuck, {"description": "late"})
+    assert not queue.fail(stuck, RuntimeError("late"))
+    assert queue.get(job_id)["status"] == RUNNING
+
+    assert queue.complete(retry, {"description": "A story"})
+    assert queue.get(job_id)["result"] == {"description": "A story"}
+
+
+def test_failed_attempts_are_retried_then_the_job_fails():
+    queue, clock = make_queue()
+    job_id = queue.enqueue("description", {"book_id": 1}, max_attempts=2)
+
+    queue.fail(queue.claim(), RuntimeError("rate limited"))
+    assert queue.get(job_id)["status"] == QUEUED
+
+    clock.advance(1)
+    queue.fail(queue.claim(), RuntimeError("rate limited again"))
+
+    job = queue.get(job_id)
+    assert job["status"] == FAILED
+    assert job["error"] == "rate limited again"
+    assert queue.claim() is None
+
+
+def test_maintain_fails_abandoned_jobs_and_purges_old_ones():
+    queue, clock = make_queue(visibility_timeout=30, retention=60)
+    abandoned = queue.enqueue("description", {"book_id": 1}, max_attempts=1)
+    queue.claim()
+    done = queue.enqueue("description", {"book_id": 2})
+    queue.complete(queue.claim(), {"description": "A story"})
+
+    clock.advance(31)
+    queue.maintain()
+    assert queue.get(abandoned)["status"] == FAILED
+    assert queue.get(done)["status"] == DONE
+
+    clock.advance(61)
+    queue.maintain()
+    assert queue.get(abandoned) is None
+    assert queue.get(done) is None
+
+
+def test_worker_runs_the_handler_and_records_its_result():
+    queue, clock = make_queue()
+    calls = []
+
+    def describe(payload, progress):
+        calls.append(payload)
+        if len(calls) == 1:
+            raise RuntimeError("timeout")
+        return {"description": f"Book {payload['book_id']}"}
+
+    worker = Worker(queue, {"description": describe})
+    job_id = queue.enqueue("description", {"book_id": 7})
+
+    assert worker.run_once()
+    assert queue.get(job_id)["status"] == QUEUED
+    clock.advance(1)
+    assert worker.run_once()
+    assert not worker.run_once()
+
+    job = queue.get(job_id)
+    assert job["status"] == DONE
+    assert job["result"] == {"description": "Book 7"}
+    assert (worker.done, worker.failed) == (1, 1)
+
+
+def test_handler_progress_is_readable_while_the_job_runs():
+    queue, clock = make_queue(visibility_timeout=30)
+    job_id = queue.enqueue("recommendation", {"query": "x"})
+    seen = []
+
+    def recommend(payload, progress):
+        progress({"recommendation": "Read"})
+        # Saved at most every progress_interval: this one is skipped
+        progress({"recommendation": "Read Dune"})
+        seen.append(queue.get(job_id))
+        return {"recommendation": "Read Dune."}
+
+    worker = Worker(queue, {"recommendation": recommend}, progress_interval=60)
+    assert worker.run_once()
+
+    assert seen[0]["status"] == RUNNING
+    assert seen[0]["result"] == {"recommendation": "Read"}
+    assert queue.get(job_id)["result"] == {"recommendation": "Read Dune."}
+
+
+def test_a_failed_attempt_drops_its_partial_result():
+    queue, _ = make_queue()
+    job_id = queue.enqueue("recommendation", {"query": "x"})
+    job = queue.claim()
+    assert queue.progress(job, {"recommendation": "Read"})
+
+    queue.fail(job, RuntimeError("connection reset"))
+    assert queue.get(job_id)["result"] is None
+    assert not queue.progress(job, {"recommendation": "Read Dune"})
+
+
+@pytest.mark.postgres
+def test_concurrent_enqueues_share_one_job_on_postgres(postgres_engine):
+    # ON CONFLICT must infer the partial unique index uq_job_pending_dedupe_key
+    queue = JobQueue(SimpleNamespace(engine=postgres_engine), Job)
+    table = Job.__table__
+    for round_number in range(20):
+        key = f"description:{round_number}"
+        barrier = threading.Barrier(2)
+
+        def enqueue(priority):
+            barrier.wait()
+            return queue.enqueue(
+                "description", {"book_id": 1}, priority=priority, dedupe_key=key
+            )
+
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            job_ids = list(
+                pool.map(enqueue, [BACKGROUND_PRIORITY, INTERACTIVE_PRIORITY])
+            )
+
+        assert job_ids[0] == job_ids[1]
+        with postgres_engine.connect() as connection:
+            rows = connection.execute(
+                select(func.count(), func.max(table.c.priority)).where(
+                    table.c.dedupe_key == key
+                )
+            ).one()
+        assert tuple(rows) == (1, INTERACTIVE_PRIORITY)
@@ -0,0 +1,29 @@
+import json
+from datetime import datetime
+
+from flask import Flask, jsonify
+
+from json_backend import FastJSONProvider, dumps, iter_json_object
+
+
+def test_streamed_object_is_valid_json():
+    items = [{"id": i, "title": f"Libro {i} è"} for i in range(7)]
+    body = b"".join(iter_json_object({"version": 3}, "books", items, chunk_size=3))
+    assert json.loads(body) == {"version": 3, "books": items}
+
+
+def test_streamed_object_without_items_or_fields():
+    assert json.loads(b"".join(iter_json_object({}, "books", []))) == {"books": []}
+
+
+def test_provider_matches_flask_encoding():
+    app = Flask(__name__)
+    app.json = FastJSONProvider(app)
+    data = {"b": 1, "a": datetime(2024, 5, 1, 12, 30), "c": None}
+    with app.app_context():
+        body = jsonify(data).get_data()
+    assert body == b'{"a":"Wed, 01 May 2024 12:30:00 GMT","b":1,"c":null}\n'
+
+
+def test_dumps_returns_bytes():
+    assert dumps({"id": 1}) == b'{"id":1}'
@@ -0,0 +1,92 @@
+import asyncio
+import threading
+
+import httpx
+import openai
+import pytest
+
+from llm_gateway import CircuitBreaker, FakeBackend, LLMGateway, LLMUnavailable
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def connection_error():
+    request = httpx.Request("POST", "https://api.openai.com/v1/chat/completions")
+    return openai.APIConnectionError(request=request)
+
+
+def test_chat_retries_transient_errors():
+    answers = [connection_error(), "Second time lucky"]
+
+    def respond(messages):
+        answer = answers.pop(0)
+        if isinstance(answer, Exception):
+            raise answer
+        return answer
+
+    delays = []
+    gateway = LLMGateway(FakeBackend(respond), sleep=delays.append)
+    assert gateway.chat("Describe Dune") == "Second time lucky"
+    assert len(delays) == 1
+    assert gateway.stats()["retries"] == 1
+
+
+def test_circuit_opens_after_repeated_failures_and_recovers():
+    clock = FakeClock()
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=30, clock=clock)
+    failing = True
+
+    def respond(messages):
+        if failing:
+            raise connection_error()
+        return "ok"
+
+    backend = FakeBackend(respond)
+    gateway = LLMGateway(backend, max_retries=0, breaker=breaker)
+    for _ in range(2):
+        with pytest.raises(openai.APIConnectionError):
+            gateway.chat("hello")
+
+    # Open: fail fast without calling the backend
+    calls = len(backend.calls)
+    with pytest.raises(LLMUnavailable):
+        gateway.chat("hello")
+    assert len(backend.calls) == calls
+
+    # After the reset timeout one trial call goes through and closes the circuit
+    clock.now += 31
+    failing = False
+    assert gateway.chat("hello") == "ok"
+    assert breaker.state == "closed"
+
+
+def test_async_fan_out_respects_the_concurrency_limit():
+    in_flight = 0
+    peak = 0
+    lock = threading.Lock()
+
+    class SlowBackend(FakeBackend):
+        async def acomplete(self, messages, model, max_tokens, timeout):
+            nonlocal in_flight, peak
+            with lock:
+                in_flight += 1
+                peak = max(peak, in_flight)
+            await asyncio.sleep(0.01)
+            with lock:
+                in_flight -= 1
+            return messages[-1]["content"].upper()
+
+    gateway = LLMGateway(SlowBackend(), max_concurrency=3)
+
+    async def fan_out():
+        return await asyncio.gather(*(gateway.achat(f"book {i}") for i in range(10)))
+
+    answers = asyncio.run(fan_out())
+    assert answers == [f"BOOK {i}" for i in range(10)]
+    assert peak == 3
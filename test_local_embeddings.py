@@ -0,0 +1,45 @@
+import math
+
+import pytest
+
+torch = pytest.importorskip("torch")
+transformers = pytest.importorskip("transformers")
+
+from local_embeddings import LocalEmbeddings
+
+WORDS = ["book", "author", "dune", "frank", "herbert", "emma", "jane", "austen"]
+
+
+@pytest.fixture(scope="module")
+def model_path(tmp_path_factory):
+    """A tiny random BERT saved locally, so the test never downloads a model."""
+    path = tmp_path_factory.mktemp("tiny-bert")
+    vocab = path / "vocab.txt"
+    vocab.write_text("\n".join(["[PAD]", "[UNK]", "[CLS]", "[SEP]", "[MASK]", *WORDS]))
+    transformers.BertTokenizer(str(vocab)).save_pretrained(path)
+    torch.manual_seed(0)
+    config = transformers.BertConfig(
+        vocab_size=len(WORDS) + 5,
+        hidden_size=8,
+        num_hidden_layers=1,
+        num_attention_heads=2,
+        intermediate_size=16,
+    )
+    transformers.BertModel(config).save_pretrained(path)
+    return str(path)
+
+
+def test_local_embeddings_are_normalized_and_keep_the_input_order(model_path):
+    embeddings = LocalEmbeddings(model_path, batch_size=2)
+    texts = ["dune frank herbert book", "emma", "jane austen book author", "book"]
+
+    vectors = embeddings.embed_documents(texts)
+
+    assert embeddings.model_id == f"local:{model_path}"
+    assert len(vectors) == len(texts)
+    for vector in vectors:
+        assert len(vector) == 8
+        assert math.isclose(math.sqrt(sum(x * x for x in vector)), 1.0, rel_tol=1e-5)
+    # Batched by length and padded, each text still gets its own vector
+    for text, vector in zip(texts, vectors):
+        assert embeddings.embed_query(text) == pytest.approx(vector, abs=1e-5)
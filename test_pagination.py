@@ -0,0 +1,65 @@
+import pytest
+from sqlalchemy import Column, Float, Integer, String, create_engine
+from sqlalchemy.orm import Session, declarative_base
+
+from pagination import InvalidCursor, keyset_paginate
+
+Base = declarative_base()
+
+
+class Item(Base):
+    __tablename__ = "item"
+    id = Column(Integer, primary_key=True)
+    title = Column(String(50), nullable=False)
+    price = Column(Float, nullable=False)
+
+
+@pytest.fixture
+def session():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    with Session(engine) as session:
+        # Several rows share the same price to exercise the id tie-breaker
+        session.add_all(
+            Item(id=i, title=f"Book {i}", price=float(i % 4)) for i in range(1, 12)
+        )
+        session.commit()
+        yield session
+
+
+def collect_pages(session, sort_column, descending, limit):
+    ids, cursor = [], None
+    while True:
+        rows, cursor = keyset_paginate(
+            session.query(Item), sort_column, Item.id, descending, limit, cursor
+        )
+        ids.extend(row.id for row in rows)
+        if cursor is None:
+            return ids
+
+
+@pytest.mark.parametrize("descending", [False, True])
+def test_pages_cover_every_row_once_in_order(session, descending):
+    expected = [
+        row.id
+        for row in session.query(Item).order_by(
+            *(
+                [Item.price.desc(), Item.id.desc()]
+                if descending
+                else [Item.price, Item.id]
+            )
+        )
+    ]
+    assert collect_pages(session, Item.price, descending, limit=3) == expected
+
+
+def test_id_ordering(session):
+    assert collect_pages(session, Item.id, False, limit=4) == list(range(1, 12))
+
+
+def test_cursor_from_another_ordering_is_rejected(session):
+    _, cursor = keyset_paginate(session.query(Item), Item.price, Item.id, limit=2)
+    with pytest.raises(InvalidCursor):
+        keyset_paginate(session.query(Item), Item.title, Item.id, cursor=cursor)
+    with pytest.raises(InvalidCursor):
+        keyset_paginate(session.query(Item), Item.id, Item.id, cursor="not-a-cursor")
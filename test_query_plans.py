@@ -0,0 +1,99 @@
+import pytest
+from sqlalchemy import create_engine, event, select, text
+from sqlalchemy.pool import StaticPool
+
+from app import Book, UserBooks, create_app, db, user_book_rows
+from pagination import encode_cursor, keyset_paginate
+
+# SQLite stand-in for PostgreSQL: the schema comes from the models, so the
+# indexes checked here are the ones declared in __table_args__.
+
+
+@pytest.fixture(scope="module")
+def engine():
+    engine = create_engine("sqlite://")
+    db.metadata.create_all(engine)
+    return engine
+
+
+@pytest.fixture
+def app_context():
+    app = create_app(
+        {
+            "TESTING": True,
+            "SQLALCHEMY_DATABASE_URI": "sqlite://",
+            "SQLALCHEMY_ENGINE_OPTIONS": {"poolclass": StaticPool},
+        }
+    )
+    with app.app_context():
+        db.create_all()
+        yield
+
+
+def query_plan(engine, statement):
+    sql = statement.compile(engine, compile_kwargs={"literal_binds": True})
+    with engine.connect() as connection:
+        rows = connection.execute(text(f"EXPLAIN QUERY PLAN {sql}")).fetchall()
+    return " ".join(row[-1] for row in rows)
+
+
+def executed_plan(run):
+    """Plan of the last SELECT executed by ``run()``, with its parameters."""
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        statements.append((statement, parameters))
+
+    event.listen(db.engine, "before_cursor_execute", capture)
+    try:
+        run()
+    finally:
+        event.remove(db.engine, "before_cursor_execute", capture)
+    statement, parameters = statements[-1]
+    with db.engine.connect() as connection:
+        rows = connection.exec_driver_sql(
+            f"EXPLAIN QUERY PLAN {statement}", parameters
+        ).fetchall()
+    return " ".join(row[-1] for row in rows)
+
+
+@pytest.mark.parametrize(
+    "sort_column, filter_column, index_name",
+    [
+        (UserBooks.price, UserBooks.price, "ix_user_books_user_id_price"),
+        (
+            UserBooks.year_published,
+            UserBooks.year_published,
+            "ix_user_books_user_id_year_published",
+        ),
+        # Default order (by id): the (user_id, book_id) primary key
+        (UserBooks.book_id, UserBooks.price, "sqlite_autoindex_user_books_1"),
+    ],
+)
+def test_user_books_page_uses_per_user_index(
+    app_context, sort_column, filter_column, index_name
+):
+    # The query of GET /user_books?price_min=...&sort_field=...&cursor=...
+    query = user_book_rows(1).filter(filter_column >= 5, filter_column <= 50)
+    ordering = f"{sort_column.key}:asc"
+    values = [7] if sort_column is UserBooks.book_id else [10, 7]
+    cursor = encode_cursor({"o": ordering, "v": values})
+
+    plan = executed_plan(
+        lambda: keyset_paginate(
+            query, sort_column, UserBooks.book_id, limit=20, cursor=cursor
+        )
+    )
+    assert f"SEARCH user_books USING INDEX {index_name} (user_id=?" in plan
+    assert "SEARCH book USING INTEGER PRIMARY KEY" in plan
+    assert "TEMP B-TREE" not in plan  # ORDER BY is served by the index
+
+
+def test_book_owners_lookup_uses_index(engine):
+    plan = query_plan(engine, select(UserBooks).where(UserBooks.book_id == 1))
+    assert "ix_user_books_book_id" in plan
+
+
+def test_book_dedupe_lookup_uses_unique_index(engine):
+    statement = select(Book).where(Book.title == "Dune", Book.author == "Frank Herbert")
+    assert "uq_book_title_author" in query_plan(engine, statement)
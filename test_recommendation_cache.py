@@ -0,0 +1,107 @@
+import time
+
+from langchain_community.embeddings import DeterministicFakeEmbedding
+from langchain_community.vectorstores import FAISS
+from langchain_core.runnables import RunnableLambda
+
+import rag
+from recommendation_cache import RecommendationCache, normalize_query
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+# Queries about the same book share a direction; the others are orthogonal
+VECTORS = {
+    "fantasy like harry potter": [1.0, 0.0, 0.0],
+    "fantasy books like harry potter": [0.99, 0.1, 0.0],
+    "books similar to dune": [0.0, 1.0, 0.0],
+}
+
+
+def embed(query):
+    return VECTORS[normalize_query(query)]
+
+
+def test_normalize_query_ignores_case_spacing_and_punctuation():
+    assert normalize_query("  Fantasy like   Harry Potter? ") == (
+        "fantasy like harry potter"
+    )
+
+
+def test_exact_and_semantic_hits():
+    cache = RecommendationCache(similarity_threshold=0.95)
+
+    answer, vector = cache.lookup("Fantasy like Harry Potter", 1, embed)
+    assert answer is None
+    cache.store("Fantasy like Harry Potter", 1, "Try Earthsea", vector)
+
+    assert cache.lookup("fantasy like harry potter!", 1, embed)[0] == "Try Earthsea"
+    assert cache.lookup("Fantasy books like Harry Potter", 1, embed)[0] == (
+        "Try Earthsea"
+    )
+    assert cache.lookup("Books similar to Dune", 1, embed)[0] is None
+
+    stats = cache.stats()
+    assert (stats["exact_hits"], stats["semantic_hits"], stats["misses"]) == (1, 1, 2)
+    assert stats["hit_rate"] == 0.5
+
+
+def test_entries_expire_and_are_dropped_when_the_index_changes():
+    clock = FakeClock()
+    cache = RecommendationCache(ttl=60, clock=clock)
+    assert cache.lookup("books similar to dune", 1)[0] is None
+    cache.store("books similar to dune", 1, "Try Hyperion")
+    assert cache.lookup("books similar to dune", 1)[0] == "Try Hyperion"
+
+    clock.now += 61
+    assert cache.lookup("books similar to dune", 1)[0] is None
+
+    cache.store("books similar to dune", 1, "Try Hyperion")
+    # A new index generation invalidates every answer
+    assert cache.lookup("books similar to dune", 2)[0] is None
+    assert cache.stats()["invalidations"] == 1
+
+
+class CountingEmbeddings(DeterministicFakeEmbedding):
+    """Fake embeddings that remember which queries were embedded."""
+
+    queries: list = []
+
+    def embed_query(self, text):
+        self.queries.append(text)
+        return super().embed_query(text)
+
+
+def test_a_cache_miss_embeds_the_query_once(monkeypatch):
+    embeddings = CountingEmbeddings(size=8, queries=[])
+    engine = rag.RecommenderEngine()
+    engine._embedding_model = embeddings
+    engine.vector_store = FAISS.from_texts(
+        ["Dune", "Hyperion"],
+        embeddings,
+        metadatas=[{"id": 1, "title": "Dune"}, {"id": 2, "title": "Hyperion"}],
+    )
+    engine.combine_docs_chain = RunnableLambda(
+        lambda inputs: f"{len(inputs['context'])} books"
+    )
+    # Already started and just checked: ensure_ready neither builds nor reloads
+    engine.retrieval_chain = object()
+    engine._last_check = time.monotonic()
+    monkeypatch.setattr(rag, "_engine", engine)
+    monkeypatch.setattr(rag, "SCORE_THRESHOLD", float("-inf"))
+    monkeypatch.setattr(
+        rag, "_recommendation_cache", RecommendationCache(similarity_threshold=0.95)
+    )
+
+    assert rag.get_book_recommendations("books like dune") == "2 books"
+    assert embeddings.queries == ["books like dune"]
+
+    # An exact hit doesn't embed at all
+    assert rag.get_book_recommendations("Books like Dune!") == "2 books"
+    assert embeddings.queries == ["books like dune"]
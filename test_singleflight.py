@@ -0,0 +1,111 @@
+import threading
+import time
+from types import SimpleNamespace
+
+from sqlalchemy import Column, DateTime, String, create_engine
+from sqlalchemy.orm import declarative_base
+from sqlalchemy.pool import StaticPool
+
+from description_cache import DescriptionCache
+from singleflight import SingleFlight, SQLLease
+
+Base = declarative_base()
+
+
+class FetchLock(Base):
+    __tablename__ = "fetch_lock"
+    key = Column(String(512), primary_key=True)
+    owner = Column(String(32), nullable=False)
+    expires_at = Column(DateTime, nullable=False)
+
+
+def sqlite_db():
+    engine = create_engine(
+        "sqlite://",
+        poolclass=StaticPool,
+        connect_args={"check_same_thread": False},
+    )
+    Base.metadata.create_all(engine)
+    return SimpleNamespace(engine=engine)
+
+
+class DictStore:
+    def __init__(self):
+        self.rows = {}
+
+    def load(self, key):
+        return self.rows.get(key)
+
+    def save(self, key, title, author, description):
+        self.rows[key] = (description, time.time())
+
+    def delete(self, key):
+        self.rows.pop(key, None)
+
+
+def test_concurrent_callers_share_one_call():
+    flight = SingleFlight()
+    calls = []
+    release = threading.Event()
+
+    def slow_fetch():
+        calls.append(1)
+        release.wait(5)
+        return "Shared description"
+
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(flight.do("dune", slow_fetch)))
+        for _ in range(8)
+    ]
+    for thread in threads:
+        thread.start()
+    while flight.followers < 7:
+        time.sleep(0.01)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert calls == [1]
+    assert results == ["Shared description"] * 8
+
+
+def test_lease_is_exclusive_until_released():
+    db = sqlite_db()
+    worker_a = SQLLease(db, FetchLock, ttl=60)
+    worker_b = SQLLease(db, FetchLock, ttl=60)
+
+    assert worker_a.acquire("dune|frank herbert")
+    assert not worker_b.acquire("dune|frank herbert")
+    worker_a.release("dune|frank herbert")
+    assert worker_b.acquire("dune|frank herbert")
+
+
+def test_expired_lease_can_be_taken_over():
+    db = sqlite_db()
+    crashed = SQLLease(db, FetchLock, ttl=-1)
+    assert crashed.acquire("dune|frank herbert")
+    assert SQLLease(db, FetchLock, ttl=60).acquire("dune|frank herbert")
+
+
+def test_worker_waits_for_the_description_another_worker_is_generating():
+    db = sqlite_db()
+    store = DictStore()
+    other_worker = SQLLease(db, FetchLock, ttl=60)
+    assert other_worker.acquire("dune|frank herbert")
+
+    def finish_other_worker(seconds):
+        # The other worker stores its result while this one is waiting
+        store.save("dune|frank herbert", "Dune", "Frank Herbert", "From worker A")
+
+    cache = DescriptionCache(
+        store, lease=SQLLease(db, FetchLock, ttl=60), sleep=finish_other_worker
+    )
+    fetches = []
+    description = cache.get_or_fetch(
+        "Dune", "Frank Herbert", lambda title, author: fetches.append(1)
+    )
+
+    assert description == "From worker A"
+    assert fetches == []
+    assert cache.stats()["remote_waits"] == 1
@@ -0,0 +1,58 @@
+from sqlalchemy import literal, select
+from sqlalchemy.dialects import postgresql, sqlite
+
+# INSERT ... ON CONFLICT is not part of the generic SQLAlchemy insert(): each
+# dialect has its own construct, with the same on_conflict_* API.
+_INSERTS = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}
+
+
+def insert_for(session, model):
+    """Return an INSERT for ``model`` that supports ON CONFLICT on the session's database."""
+    dialect = session.get_bind().dialect.name
+    try:
+        return _INSERTS[dialect](model)
+    except KeyError:
+        raise NotImplementedError(f"Upserts are not supported on {dialect}") from None
+
+
+def upsert_book(session, book_model, values):
+    """Insert a book, or find the existing one with the same title and author.
+
+    Returns ``(book_id, created)``. A new book takes a single round trip; for
+    an existing one the INSERT does nothing (the row isn't rewritten) and a
+    second query reads its id.
+    """
+    statement = (
+        insert_for(session, book_model)
+        .values(**values)
+        .on_conflict_do_nothing(index_elements=[book_model.title, book_model.author])
+        .returning(book_model.id)
+    )
+    book_id = session.execute(statement).scalar_one_or_none()
+    if book_id is not None:
+        return book_id, True
+    book_id = session.scalar(
+        select(book_model.id).where(
+            book_model.title == values["title"], book_model.author == values["author"]
+        )
+    )
+    return book_id, False
+
+
+def add_user_book(session, user_books_model, book_model, user_id, book_id):
+    """Link a catalog book to a user in one statement.
+
+    Returns True if the link was created, False if the user already owns the
+    book or the book doesn't exist (the INSERT selects from the catalog, so a
+    missing book simply inserts nothing).
+    """
+    source = select(
+        literal(user_id), book_model.id, book_model.price, book_model.year_published
+    ).where(book_model.id == book_id)
+    statement = (
+        insert_for(session, user_books_model)
+        .from_select(["user_id", "book_id", "price", "year_published"], source)
+        .on_conflict_do_nothing(index_elements=["user_id", "book_id"])
+        .returning(user_books_model.book_id)
+    )
+    return session.execute(statement).scalar_one_or_none() is not None